@@ -0,0 +1,125 @@
+"""
+Solves ordered Ramsey problems from the command line, e.g. in batch runs over several sizes of the avoiding graph.
+The live progress of the solver is printed to stderr, the found colorings to stdout in the special conditions format.
+A graph is given either as a GraphGenerator family with its integer arguments, or as a list of edges.
+
+Examples:
+    python batch_solve.py monotone_path:4 -n 9 10
+    python batch_solve.py monotone_path:5 --blue alternating_path:5 -n 10 11 12 --solver glucose --stall-timeout 60
+    python batch_solve.py "1 2, 2 3, 1 3" -n 6 --all --stats stats.json
+    python batch_solve.py monotone_path:5 -n 17 --symmetry-group circulant
+"""
+import argparse
+import json
+import sys
+import time
+
+from colored_graph import ColoredGraph
+from graph_generator import GraphGenerator
+from sat_generator import NAMED_EDGE_SYMMETRIES
+from preprocessing import PRESERVE_MODELS, PRESERVE_SATISFIABILITY
+from ramsey_solver import RamseySolver
+from sat_solver import SAT_SOLVERS, SolverStatus
+from solver_stats import SolverProgress
+
+
+def parse_graph(description, color):
+    """
+    :param description: Either "family:arguments" (e.g. "monotone_path:4" or "star:3,3"), or edges "1 2, 2 3, ..."
+    :param color: The color of the created graph, 'r' or 'b'
+    :return: The ColoredGraph structure
+    """
+    if ':' in description:
+        family, arguments = description.split(':', 1)
+        generator = getattr(GraphGenerator, family, None)
+        if generator is None or family.startswith('all_'):
+            raise ValueError("Unknown graph family " + family + ".")
+        return ColoredGraph.create_colored_graph_from_adj_list(generator(*map(int, arguments.split(','))), color)
+    edge_list = []
+    for edge in description.split(','):
+        v1, v2 = map(int, edge.split())
+        edge_list.append((min(v1, v2), max(v1, v2)))
+    size = max(max(edge) for edge in edge_list)
+    return ColoredGraph(size, edge_list, {edge: color for edge in edge_list})
+
+
+def coloring_to_text(coloring):
+    """
+    :return: The coloring in the special conditions format "1 2 r, 1 3 b, ..."
+    """
+    return ', '.join(str(v1) + " " + str(v2) + " " + color
+                     for (v1, v2), color in sorted(coloring.get_colored_edge_list()))
+
+
+def print_progress_hook(n):
+    """
+    :return: A SolverStats hook printing the live solver progress of the problem on n vertices to stderr
+    """
+    def hook(stats, event):
+        if event['event'] == 'progress':
+            progress = SolverProgress(**{key: value for key, value in event.items() if key != 'event'})
+            print("  n=" + str(n) + ": " + str(progress), file=sys.stderr, flush=True)
+    return hook
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solves ordered Ramsey problems for the given avoiding graph sizes.")
+    parser.add_argument("red", help="the red graph, e.g. monotone_path:4 or \"1 2, 2 3, 1 3\"")
+    parser.add_argument("--blue", help="the blue graph, the same as the red one if not specified")
+    parser.add_argument("-n", type=int, nargs='+', required=True, help="the sizes of the avoiding graph")
+    parser.add_argument("--solver", choices=sorted(SAT_SOLVERS), default="minisat")
+    parser.add_argument("--symmetric", action="store_true", help="enforce symmetric colorings")
+    parser.add_argument("--symmetry-group", nargs='+', choices=sorted(NAMED_EDGE_SYMMETRIES),
+                        help="search only the colorings invariant under these edge symmetries")
+    parser.add_argument("--all", action="store_true", help="enumerate all the colorings, not just one")
+    parser.add_argument("--timeout", type=float, help="the wall-clock limit of a single solver call in seconds")
+    parser.add_argument("--stall-timeout", type=float,
+                        help="kill the solver if it doesn't report any progress for this many seconds")
+    parser.add_argument("--memory-limit", type=int, help="the memory limit of the solver in megabytes")
+    parser.add_argument("--preprocessing", choices=(PRESERVE_MODELS, PRESERVE_SATISFIABILITY, "none"),
+                        default=PRESERVE_MODELS,
+                        help="the formula preprocessing, \"satisfiability\" may skip some colorings with --all")
+    parser.add_argument("--stats", help="a JSON file for the statistics of all the runs")
+    parser.add_argument("--quiet", action="store_true", help="don't print the solver progress")
+    args = parser.parse_args()
+
+    red_graph = parse_graph(args.red, 'r')
+    blue_graph = parse_graph(args.blue, 'b') if args.blue is not None else None
+    runs = []
+    for n in args.n:
+        start = time.time()
+        ramsey_solver = RamseySolver(n, red_graph, blue_graph, solver=args.solver, enforce_symmetry=args.symmetric,
+                                     timeout=args.timeout, memory_limit=args.memory_limit,
+                                     stall_timeout=args.stall_timeout,
+                                     preprocessing=None if args.preprocessing == "none" else args.preprocessing,
+                                     symmetry_group=args.symmetry_group)
+        if not args.quiet:
+            ramsey_solver.stats.add_hook(print_progress_hook(n))
+        count = 0
+        while True:
+            coloring = ramsey_solver.find_next_avoiding_drawing()
+            if coloring is None:
+                break
+            count += 1
+            print(coloring_to_text(coloring))
+            if not args.all:
+                break
+        # With --all, the enumeration is complete only if the last call was UNSAT
+        status = SolverStatus.SAT if count else ramsey_solver.status
+        elapsed = time.time() - start
+        print("n=%d: %s, %d coloring%s, %.2f s" % (n, status, count, "" if count == 1 else "s", elapsed),
+              file=sys.stderr, flush=True)
+        runs.append({"n": n, "status": status, "colorings": count,
+                     "complete": ramsey_solver.status == SolverStatus.UNSAT, "time": elapsed,
+                     "reduction": ramsey_solver.reduction_report.as_dict()
+                     if ramsey_solver.reduction_report is not None else None,
+                     "preprocessing": ramsey_solver.preprocessing_report.as_dict()
+                     if ramsey_solver.preprocessing_report is not None else None,
+                     "stats": ramsey_solver.stats.as_dict()})
+    if args.stats is not None:
+        with open(args.stats, 'w') as f:
+            json.dump(runs, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
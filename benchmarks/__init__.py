@@ -0,0 +1,7 @@
+"""
+Benchmarks of the encode -> solve -> decode pipeline. Run them from the repository root, e.g.
+
+    python -m benchmarks run --output results.json
+    python -m benchmarks run --baseline results.json
+    python -m benchmarks compare old.json new.json --threshold 0.2
+"""
@@ -0,0 +1,62 @@
+import argparse
+import json
+import sys
+
+from benchmarks.instances import get_instances
+from benchmarks.pipeline import run_benchmarks, compare_results, format_results
+from sat_solver import SAT_SOLVERS
+
+
+def _report_problems(problems):
+    for problem in problems:
+        print("REGRESSION " + problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmarks of the encode -> solve -> decode pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks and print the JSON results")
+    run_parser.add_argument("--suite", choices=("quick", "full"), default="quick")
+    run_parser.add_argument("--solver", choices=sorted(SAT_SOLVERS), default="minisat")
+    run_parser.add_argument("--repeats", type=int, default=3, help="the number of timed runs of every instance")
+    run_parser.add_argument("--output", help="the JSON file for the results, stdout if not specified")
+    run_parser.add_argument("--baseline", help="a JSON file of earlier results to compare the new ones with")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two JSON results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    for subparser in (run_parser, compare_parser):
+        subparser.add_argument("--threshold", type=float, default=0.2,
+                               help="the tolerated relative slowdown (or memory growth), 0.2 by default")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        print(format_results(current))
+        return _report_problems(compare_results(baseline, current, args.threshold))
+
+    results = run_benchmarks(get_instances(args.suite), args.solver, args.repeats,
+                             progress=lambda key, result: print(key + " " + result["status"], file=sys.stderr))
+    print(format_results(results), file=sys.stderr)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    return _report_problems(compare_results(baseline, results, args.threshold))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
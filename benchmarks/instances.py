@@ -0,0 +1,60 @@
+from colored_graph import ColoredGraph
+from graph_generator import GraphGenerator
+
+
+class BenchmarkInstance:
+    """
+    One ordered Ramsey problem of the benchmark matrix - the red and blue pattern, the number of vertices and the
+    expected answer (SAT if an avoiding coloring of K_n exists, UNSAT otherwise).
+    """
+
+    def __init__(self, name, red_adjacency_list, blue_adjacency_list, n, expected_status):
+        self.name = name
+        self.red_adjacency_list = red_adjacency_list
+        self.blue_adjacency_list = blue_adjacency_list
+        self.n = n
+        self.expected_status = expected_status
+
+    @property
+    def key(self):
+        """
+        The identifier of the instance in the results, e.g. "monotone_path_4/n=9".
+        """
+        return self.name + "/n=" + str(self.n)
+
+    def get_graphs(self):
+        """
+        :return: A pair of the red and blue ColoredGraph patterns
+        """
+        return (ColoredGraph.create_colored_graph_from_adj_list(self.red_adjacency_list, 'r'),
+                ColoredGraph.create_colored_graph_from_adj_list(self.blue_adjacency_list, 'b'))
+
+
+def _diagonal_pair(name, adjacency_list, last_sat_n):
+    """
+    :return: The two instances of a diagonal problem around its ordered Ramsey number - the largest n with an avoiding
+    coloring (SAT) and the smallest one without it (UNSAT)
+    """
+    return [BenchmarkInstance(name, adjacency_list, adjacency_list, last_sat_n, "SAT"),
+            BenchmarkInstance(name, adjacency_list, adjacency_list, last_sat_n + 1, "UNSAT")]
+
+
+def get_instances(suite="quick"):
+    """
+    :param suite: "quick" (each instance is solved within a second) or "full" (adds instances taking several seconds)
+    :return: A list of BenchmarkInstance structures
+    """
+    if suite not in ("quick", "full"):
+        raise ValueError("Unknown benchmark suite " + str(suite) + ".")
+    instances = []
+    # The numbers of the monotone paths follow from the Erdos-Szekeres theorem, R(P_k, P_l) = (k - 1)(l - 1) + 1
+    instances += _diagonal_pair("monotone_path_3", GraphGenerator.monotone_path(3), 4)
+    instances += _diagonal_pair("monotone_path_4", GraphGenerator.monotone_path(4), 9)
+    instances += _diagonal_pair("alternating_path_5", GraphGenerator.alternating_path(5), 8)
+    instances += _diagonal_pair("alternating_path_6", GraphGenerator.alternating_path(6), 11)
+    instances += _diagonal_pair("monotone_cycle_4", GraphGenerator.monotone_cycle(4), 13)
+    instances += _diagonal_pair("star_3_3", GraphGenerator.star(3, 3), 14)
+    instances += _diagonal_pair("full_3", GraphGenerator.full(3), 5)
+    if suite == "full":
+        instances += _diagonal_pair("monotone_path_5", GraphGenerator.monotone_path(5), 16)
+    return instances
@@ -0,0 +1,145 @@
+import platform
+import time
+import tracemalloc
+
+from preprocessing import clear_preprocessing_cache
+from ramsey_solver import RamseySolver
+from solver_stats import SolverStats, STAGES
+
+# The version of the JSON results format
+RESULTS_VERSION = 2
+
+
+class _MemoryTracer:
+    """
+    A SolverStats hook measuring the peak traced Python memory of the stages - the peak allocated above the memory
+    held when the previous stage ended (the stages of a RamseySolver run one after another).
+    """
+
+    def __init__(self):
+        self.peak_memory = {}
+        self._baseline = 0
+
+    def start(self):
+        tracemalloc.start()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def __call__(self, stats, event):
+        if event['event'] != 'stage':
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        stage = event['stage']
+        self.peak_memory[stage] = max(self.peak_memory.get(stage, 0), peak - self._baseline)
+        tracemalloc.reset_peak()
+        self._baseline = current
+
+
+def run_pipeline(instance, solver_name="minisat", trace_memory=False):
+    """
+    Finds one avoiding coloring by a RamseySolver, i.e. by the same pipeline as the applications, and reports the
+    times of its stages (see solver_stats.STAGES) measured by its SolverStats.
+    :param instance: A BenchmarkInstance
+    :param solver_name: One of the keys of SAT_SOLVERS
+    :param trace_memory: If True, the peak Python memory of every stage is traced as well. This slows the stages down,
+    so the times of such a run shouldn't be used
+    :return: A dict with the SolverStatus, the sizes of the formula passed to the solver and the per-stage times (and
+    peak memory)
+    """
+    # Every run preprocesses the formula, instead of the later ones reusing the result of the first one
+    clear_preprocessing_cache()
+    stats = SolverStats()
+    memory_tracer = _MemoryTracer()
+    if trace_memory:
+        stats.add_hook(memory_tracer)
+        memory_tracer.start()
+    try:
+        red_graph, blue_graph = instance.get_graphs()
+        ramsey_solver = RamseySolver(instance.n, red_graph, blue_graph, solver=solver_name, stats=stats)
+        coloring = ramsey_solver.find_next_avoiding_drawing()
+    finally:
+        if trace_memory:
+            memory_tracer.stop()
+    return {"status": ramsey_solver.status, "coloring": coloring, "clauses": stats.counters["clauses"],
+            "variables": stats.counters["variables"], "dimacs_bytes": stats.counters["bytes_written"],
+            "times": dict(stats.wall_times), "peak_memory": {stage: memory_tracer.peak_memory.get(stage, 0)
+                                                             for stage in STAGES}}
+
+
+def benchmark_instance(instance, solver_name="minisat", repeats=3):
+    """
+    Benchmarks one instance - the stage times are the minima over the repeated runs, the peak memory comes from one
+    extra traced run. Only the memory allocated by Python is traced, the solver process isn't included.
+    :return: The JSON serializable result dict of the instance
+    """
+    runs = [run_pipeline(instance, solver_name) for _ in range(repeats)]
+    traced_run = run_pipeline(instance, solver_name, trace_memory=True)
+    stages = {stage: {"time": min(run["times"][stage] for run in runs),
+                      "peak_memory": traced_run["peak_memory"][stage]} for stage in STAGES}
+    return {"name": instance.name, "n": instance.n, "expected_status": instance.expected_status,
+            "status": runs[0]["status"], "clauses": runs[0]["clauses"], "variables": runs[0]["variables"],
+            "dimacs_bytes": runs[0]["dimacs_bytes"], "stages": stages,
+            "total_time": sum(stage["time"] for stage in stages.values())}
+
+
+def run_benchmarks(instances, solver_name="minisat", repeats=3, progress=None):
+    """
+    :param instances: A list of BenchmarkInstance structures
+    :param progress: If specified, a function called with the key and the result of every finished instance
+    :return: The JSON serializable results of all the instances
+    """
+    results = {}
+    for instance in instances:
+        results[instance.key] = benchmark_instance(instance, solver_name, repeats)
+        if progress is not None:
+            progress(instance.key, results[instance.key])
+    return {"version": RESULTS_VERSION, "solver": solver_name, "repeats": repeats,
+            "python": platform.python_version(), "platform": platform.platform(), "created": time.time(),
+            "results": results}
+
+
+def compare_results(baseline, current, threshold=0.2, min_time=0.005, min_memory=65536):
+    """
+    Compares two benchmark results. A stage (or the total) regressed if it got slower or needed more memory by more
+    than the threshold fraction - measurements below min_time seconds or min_memory bytes are considered noise. A
+    status differing from the expected or the baseline one is reported as well.
+    :param baseline: The earlier results, or None to check only the statuses of the current ones
+    :return: A list of human readable problem descriptions, empty if there is no regression
+    """
+    problems = []
+    for key, result in current["results"].items():
+        if result["status"] != result["expected_status"]:
+            problems.append(key + ": status " + result["status"] + ", expected " + result["expected_status"])
+        baseline_result = baseline["results"].get(key) if baseline is not None else None
+        if baseline_result is None:
+            continue
+        if result["status"] != baseline_result["status"]:
+            problems.append(key + ": status " + result["status"] + ", baseline " + baseline_result["status"])
+        measurements = [("total time", baseline_result["total_time"], result["total_time"], min_time)]
+        for stage in STAGES:
+            if stage not in baseline_result["stages"]:
+                # A stage added after the baseline was taken
+                continue
+            old, new = baseline_result["stages"][stage], result["stages"][stage]
+            measurements.append((stage + " time", old["time"], new["time"], min_time))
+            measurements.append((stage + " peak memory", old["peak_memory"], new["peak_memory"], min_memory))
+        for label, old_value, new_value, noise in measurements:
+            if new_value > noise and new_value > old_value * (1 + threshold):
+                problems.append("%s: %s %.4g -> %.4g (%+.0f%%)" % (key, label, old_value, new_value,
+                                                                  100 * (new_value / old_value - 1) if old_value
+                                                                  else float('inf')))
+    return problems
+
+
+def format_results(results):
+    """
+    :return: A human readable table of the stage times (in milliseconds) of all the instances
+    """
+    lines = ["%-28s %-6s" % ("instance", "status") + "".join("%11s" % stage for stage in STAGES) + "%11s" % "total"]
+    for key, result in results["results"].items():
+        lines.append("%-28s %-6s" % (key, result["status"]) +
+                     "".join("%11.1f" % (1000 * result["stages"][stage]["time"]) for stage in STAGES) +
+                     "%11.1f" % (1000 * result["total_time"]))
+    return "\n".join(lines)
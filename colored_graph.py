@@ -1,9 +1,129 @@
-import networkx as nx
 import numpy as np
 import matplotlib
+import matplotlib.figure
+from matplotlib.collections import LineCollection
+from matplotlib.colors import ListedColormap, BoundaryNorm
 
 matplotlib.use('TkAgg')
 
+# The number of points every arc of the ordered graph visualization is approximated by
+ARC_RESOLUTION = 40
+VERTEX_COLOR = '#1f78b4'
+VERTEX_SIZE = 300
+
+# The matrix visualization values - 0 for a missing edge, 1 for a blue edge, 2 for a red one
+MATRIX_COLORMAP = ListedColormap(['white', 'blue', 'red'])
+MATRIX_NORM = BoundaryNorm([-1, 0.5, 1.5, 3], MATRIX_COLORMAP.N)
+
+
+def get_arc_segments(edges, below=False):
+    """
+    Computes the polylines of the arcs of an ordered graph visualization at once - the vertex v is placed at (v - 1, 0)
+    and the edge (u,v) is drawn as a semicircle over the segment between its vertices.
+    :param edges: An array of shape (m, 2) of the edges
+    :param below: If True, the arcs are drawn below the vertex line instead of above it
+    :return: An array of shape (m, ARC_RESOLUTION, 2), suitable for LineCollection.set_segments
+    """
+    edges = np.asarray(edges, dtype=float).reshape(-1, 2) - 1
+    centers = edges.mean(axis=1)[:, np.newaxis]
+    radii = (edges[:, 1] - edges[:, 0])[:, np.newaxis] / 2
+    angles = np.linspace(0, np.pi, ARC_RESOLUTION)
+    segments = np.empty((len(edges), ARC_RESOLUTION, 2))
+    segments[:, :, 0] = centers + radii * np.cos(angles)
+    segments[:, :, 1] = radii * np.sin(angles) * (-1 if below else 1)
+    return segments
+
+
+class OrderedGraphView:
+    """
+    An ordered graph visualization bound to one Ax - the vertices are placed on a line, red edges are arcs above it and
+    blue ones arcs below it. All arcs of one color form a single LineCollection, so drawing doesn't scale with the
+    number of matplotlib artists, and update only replaces the data of the existing artists.
+    """
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.size = None
+        self.red_arcs = LineCollection([], colors='red', zorder=1)
+        self.blue_arcs = LineCollection([], colors='blue', zorder=1)
+        ax.add_collection(self.red_arcs)
+        ax.add_collection(self.blue_arcs)
+        self.vertices = ax.scatter([], [], s=VERTEX_SIZE, c=VERTEX_COLOR, zorder=2)
+        self.labels = []
+        ax.tick_params(axis='both', which='both', bottom=False, left=False, labelbottom=False, labelleft=False)
+
+    def update(self, graph):
+        """
+        Shows the given ColoredGraph instead of the previous one. The vertices and labels are only recreated if the
+        number of vertices changes.
+        """
+        colored_edges = graph.get_colored_edge_list()
+        red_edges = [edge for edge, color in colored_edges if color == 'r']
+        blue_edges = [edge for edge, color in colored_edges if color == 'b']
+        self.red_arcs.set_segments(get_arc_segments(red_edges))
+        self.blue_arcs.set_segments(get_arc_segments(blue_edges, below=True))
+        if graph.size != self.size:
+            self._set_size(graph.size)
+
+    def _set_size(self, size):
+        self.size = size
+        self.vertices.set_offsets(np.column_stack((np.arange(size), np.zeros(size))))
+        for label in self.labels:
+            label.remove()
+        self.labels = [self.ax.text(v - 1, 0, str(v), ha='center', va='center', zorder=3)
+                       for v in range(1, size + 1)]
+        height = max(size - 1, 1) / 2
+        self.ax.set_xlim(-0.6, size - 0.4)
+        self.ax.set_ylim(-1.1 * height, 1.1 * height)
+
+
+def get_coloring_matrix(graph):
+    """
+    :param graph: A ColoredGraph structure
+    :return: An n x n uint8 array, the entry [i-1][j-1] of an edge (i,j) is 2 if it's red and 1 if it's blue, other
+    entries are 0
+    """
+    matrix = np.zeros((graph.size, graph.size), dtype='uint8')
+    colored_edges = graph.get_colored_edge_list()
+    if colored_edges:
+        edges = np.array([edge for edge, _ in colored_edges]) - 1
+        colors = np.array([color for _, color in colored_edges])
+        matrix[edges[:, 0], edges[:, 1]] = np.where(colors == 'r', 2, 1)
+    return matrix
+
+
+class MatrixView:
+    """
+    A red-blue matrix visualization bound to one Ax. The image is created once, update only replaces its data (and
+    the ticks if the number of vertices changes).
+    """
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.size = None
+        self.image = None
+
+    def update(self, graph):
+        """
+        Shows the given ColoredGraph instead of the previous one.
+        :return: True if only the image data changed (so it's enough to redraw the image artist), False if the whole
+        Ax has to be redrawn
+        """
+        matrix = get_coloring_matrix(graph)
+        if self.image is None:
+            self.image = self.ax.imshow(matrix, interpolation='nearest', cmap=MATRIX_COLORMAP, norm=MATRIX_NORM)
+        else:
+            self.image.set_data(matrix)
+        if graph.size == self.size:
+            return True
+        self.size = graph.size
+        self.image.set_extent((-0.5, self.size - 0.5, self.size - 0.5, -0.5))
+        self.ax.set_xticks(np.arange(0, self.size, 1))
+        self.ax.set_yticks(np.arange(0, self.size, 1))
+        self.ax.set_xticklabels(np.arange(1, self.size + 1, 1))
+        self.ax.set_yticklabels(np.arange(1, self.size + 1, 1))
+        return False
+
 
 class ColoredGraph:
     """
@@ -107,57 +227,27 @@ class ColoredGraph:
     def get_visualization(self, ax=None):
         """
         Returns a Figure, Ax pair containing the graph visualization as an ordered graph. Red edges will appear on the
-        top, blue ones on the bottom. Library networkx is used (with a slight change to support this behaviour).
+        top, blue ones on the bottom. See OrderedGraphView, which can be used directly for repeated redrawing.
         :param ax: If specified, it uses the ax to draw the visualization. If not, a new Figure object is created along
         with its ax.
         """
         if ax is None:
             fig = matplotlib.figure.Figure(figsize=(6, 3.5))
             ax = fig.add_subplot(111)
-        ax.plot()
-
-        G = nx.DiGraph()
-        edge_colors = []
-        for u, v in self.edge_list:
-            G.add_edge(u, v)
-        # Reusing the DiGraph self-made new edge ordering to supply the corresponding list of colors in correct order
-        for u, v in G.edges:
-            edge_colors.append(self.edge_coloring[(u, v)])
-        G.add_nodes_from(range(1, self.size + 1))
-        # Rad must be a minus value, elsewise the hack for inverting blue edges in nx_pylab.py won't work. The hack
-        # the only change from the original networkx package.
-        custom_connectionstyle = 'arc3, rad=-0.8'
-        nx.draw_networkx(G, pos={vertex: (vertex - 1, 0) for vertex in range(1, self.size + 1)},
-                         edge_color=edge_colors,
-                         connectionstyle=custom_connectionstyle,
-                         ax=ax)
+        OrderedGraphView(ax).update(self)
         return ax.figure, ax
 
     def get_matrix_visualization(self, ax=None):
         """
-        Returns a Figure, Ax pair containing the graph visualization as a red-blue matrix (non-existing edge is a white)
+        Returns a Figure, Ax pair containing the graph visualization as a red-blue matrix (non-existing edge is a white).
+        See MatrixView, which can be used directly for repeated redrawing.
         :param ax: If specified, it uses the ax to draw the visualization. If not, a new Figure object is created along
         with its ax.
         """
-        adj = np.zeros((self.size, self.size), dtype='uint8')
-        for edge, color in self.get_colored_edge_list():
-            i, j = edge
-            adj[i - 1][j - 1] = 2 if color == 'r' else 1
-        cmap = matplotlib.colors.ListedColormap(['white', 'blue', 'red'])
-        bounds = [-1, 0.5, 1.5, 3]
-        norm = matplotlib.colors.BoundaryNorm(bounds, cmap.N)
-
         if ax is None:
             fig = matplotlib.figure.Figure(figsize=(6, 3.7))
             ax = fig.add_subplot(111)
-        ax.plot()
-
-        ax.imshow(adj, interpolation='nearest', cmap=cmap, norm=norm)
-        ax.set_xticks(np.arange(0, self.size, 1))
-        ax.set_yticks(np.arange(0, self.size, 1))
-        ax.set_xticklabels(np.arange(1, self.size + 1, 1))
-        ax.set_yticklabels(np.arange(1, self.size + 1, 1))
-
+        MatrixView(ax).update(self)
         return ax.figure, ax
 
     @staticmethod
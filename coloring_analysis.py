@@ -0,0 +1,136 @@
+import matplotlib
+import matplotlib.figure
+import numpy as np
+
+from solution_archive import SolutionArchiveReader, archive_edges
+
+# The number of records processed at once, bounds the memory used by the temporary arrays
+DEFAULT_CHUNK_SIZE = 8192
+
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """
+    :param words: An array of unsigned 64-bit integers
+    :return: An array of the same shape holding the number of set bits of every word
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    return _POPCOUNT_TABLE[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def _pack_edges_to_words(edge_indices, record_size):
+    bits = np.zeros(record_size * 8, dtype=np.uint8)
+    bits[edge_indices] = 1
+    return np.packbits(bits, bitorder='little').view('<u8')
+
+
+class ColoringStatistics:
+    """
+    Statistics of a set of colorings of K_n stored in a solution archive:
+    - red_counts: for every edge (in archive_edges order) the number of colorings in which it is red,
+    - forced_red, forced_blue: boolean arrays of the edges which have the same color in all the colorings,
+    - red_degree_histogram: an n x n array, [v - 1][d] is the number of colorings in which vertex v has red degree d.
+    """
+
+    def __init__(self, n, count, colored, red_counts, forced_red, forced_blue, red_degree_histogram):
+        self.n = n
+        self.count = count
+        self.edges = archive_edges(n)
+        self.colored = colored
+        self.red_counts = red_counts
+        self.forced_red = forced_red
+        self.forced_blue = forced_blue
+        self.red_degree_histogram = red_degree_histogram
+
+    def get_red_frequencies(self):
+        """
+        :return: For every edge the fraction of colorings in which it is red (NaN for edges without a color)
+        """
+        frequencies = np.full(len(self.edges), np.nan)
+        if self.count:
+            frequencies[self.colored] = self.red_counts[self.colored] / self.count
+        return frequencies
+
+    def get_forced_edges(self):
+        """
+        :return: The edges with the same color in all the colorings, in the special conditions format
+        [((v1,v2), color), ...]
+        """
+        return [(edge, 'r' if red else 'b') for edge, red, blue in zip(self.edges, self.forced_red, self.forced_blue)
+                if red or blue]
+
+
+def compute_coloring_statistics(archive_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Computes ColoringStatistics of a solution archive. The memory-mapped records are processed in chunks by
+    vectorized bit operations, no ColoredGraph structures are created.
+    :param archive_file: The path of an archive written by SolutionArchiveWriter
+    :param chunk_size: The number of records processed at once
+    """
+    with SolutionArchiveReader(archive_file) as archive:
+        n, count, record_size = archive.n, len(archive), archive.record_size
+        edges = archive_edges(n)
+        number_of_edges = len(edges)
+        colored_words = archive.colored_edges_record.view('<u8')
+        # For every vertex the words marking the edges incident to it
+        incident_words = np.array([_pack_edges_to_words([k for k, edge in enumerate(edges) if v in edge], record_size)
+                                   for v in range(1, n + 1)])
+
+        blue_counts = np.zeros(number_of_edges, dtype=np.int64)
+        all_blue = np.full(colored_words.shape, np.iinfo(np.uint64).max, dtype=np.uint64)
+        any_blue = np.zeros(colored_words.shape, dtype=np.uint64)
+        red_degree_histogram = np.zeros((n, n), dtype=np.int64)
+        words = archive.get_words()
+        for start in range(0, count, chunk_size):
+            chunk = np.asarray(words[start:start + chunk_size])
+            all_blue &= np.bitwise_and.reduce(chunk, axis=0)
+            any_blue |= np.bitwise_or.reduce(chunk, axis=0)
+            blue_bits = np.unpackbits(chunk.view(np.uint8), axis=1, bitorder='little')[:, :number_of_edges]
+            blue_counts += blue_bits.sum(axis=0, dtype=np.int64)
+            red_words = ~chunk & colored_words
+            # red_degrees[c][v] is the red degree of vertex v + 1 in the coloring c of the chunk
+            red_incident_words = red_words[:, np.newaxis, :] & incident_words[np.newaxis, :, :]
+            red_degrees = popcount(red_incident_words).sum(axis=2, dtype=np.int64)
+            vertices = np.broadcast_to(np.arange(n), red_degrees.shape)
+            red_degree_histogram += np.bincount((vertices * n + red_degrees).ravel(),
+                                                minlength=n * n).reshape(n, n)
+
+        colored = archive.get_edge_bits(archive.colored_edges_record).astype(bool)
+        red_counts = np.where(colored, count - blue_counts, 0)
+        if count:
+            forced_red = colored & ~archive.get_edge_bits(any_blue.view(np.uint8)).astype(bool)
+            forced_blue = colored & archive.get_edge_bits(all_blue.view(np.uint8)).astype(bool)
+        else:
+            forced_red = forced_blue = np.zeros(number_of_edges, dtype=bool)
+    return ColoringStatistics(n, count, colored, red_counts, forced_red, forced_blue, red_degree_histogram)
+
+
+def get_edge_frequency_visualization(statistics, ax=None):
+    """
+    Returns a Figure, Ax pair containing the per-edge red frequencies as a heatmap in the layout of
+    ColoredGraph.get_matrix_visualization - red for edges red in every coloring, blue for edges always blue (edges
+    without a color are white).
+    :param statistics: A ColoringStatistics structure
+    :param ax: If specified, it uses the ax to draw the visualization. If not, a new Figure object is created along
+    with its ax.
+    """
+    n = statistics.n
+    frequencies = np.full((n, n), np.nan)
+    for (i, j), frequency in zip(statistics.edges, statistics.get_red_frequencies()):
+        frequencies[i - 1][j - 1] = frequency
+
+    if ax is None:
+        fig = matplotlib.figure.Figure(figsize=(6, 3.7))
+        ax = fig.add_subplot(111)
+    ax.plot()
+
+    image = ax.imshow(frequencies, interpolation='nearest', cmap='bwr', vmin=0, vmax=1)
+    ax.figure.colorbar(image, ax=ax, label="red frequency")
+    ax.set_xticks(np.arange(0, n, 1))
+    ax.set_yticks(np.arange(0, n, 1))
+    ax.set_xticklabels(np.arange(1, n + 1, 1))
+    ax.set_yticklabels(np.arange(1, n + 1, 1))
+
+    return ax.figure, ax
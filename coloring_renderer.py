@@ -0,0 +1,104 @@
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+
+import matplotlib
+import matplotlib.figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from solution_archive import SolutionArchiveReader
+
+
+def render_coloring_figure(avoiding_coloring, file_name):
+    """
+    Saves the two-panel figure (ordered graph and matrix visualization) of an avoiding coloring as an image. Only the
+    object oriented matplotlib API with the Agg canvas is used, so no pyplot figures are created and the function can
+    be run in any thread or process.
+    :param avoiding_coloring: A ColoredGraph structure
+    :param file_name: The path of the image file
+    """
+    fig = matplotlib.figure.Figure(figsize=(15, 6))
+    FigureCanvasAgg(fig)
+    gs = fig.add_gridspec(1, 2)
+    avoiding_coloring.get_visualization(ax=fig.add_subplot(gs[0, 0]))
+    avoiding_coloring.get_matrix_visualization(ax=fig.add_subplot(gs[0, 1]))
+    fig.tight_layout()
+    fig.savefig(file_name)
+
+
+def _initialize_renderer():
+    # colored_graph selects the interactive TkAgg backend on import, which must not be used in the workers
+    matplotlib.use('Agg')
+
+
+class ColoringRenderPool:
+    """
+    Renders avoiding colorings into image files on a pool of processes, so that solving and rendering overlap and the
+    rendering scales across cores. The colorings waiting for rendering form a bounded queue - submit blocks while it
+    is full, so a fast solver can't exhaust the memory.
+    """
+
+    def __init__(self, processes=None, max_pending=None):
+        """
+        :param processes: The number of rendering processes, defaults to the number of CPUs
+        :param max_pending: The maximal number of submitted colorings which are not rendered yet, defaults to twice
+        the number of processes
+        """
+        processes = processes or os.cpu_count() or 1
+        # The pool is created from worker threads of the multithreaded GUI, where forking isn't safe - the processes are
+        # started fresh and import only this module and the worker entry points
+        context = multiprocessing.get_context(
+            'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+        self.executor = concurrent.futures.ProcessPoolExecutor(processes, mp_context=context,
+                                                             initializer=_initialize_renderer)
+        self.errors = []
+        self._free_slots = threading.BoundedSemaphore(max_pending or 2 * processes)
+
+    def submit(self, avoiding_coloring, file_name):
+        """
+        Queues the coloring for rendering by render_coloring_figure, blocks while the queue is full.
+        """
+        self._free_slots.acquire()
+        future = self.executor.submit(render_coloring_figure, avoiding_coloring, file_name)
+        future.add_done_callback(self._rendering_done)
+
+    def _rendering_done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.errors.append(future.exception())
+        self._free_slots.release()
+
+    def close(self, cancel=False):
+        """
+        Waits until the queued colorings are rendered and stops the rendering processes.
+        :param cancel: If True, the colorings which didn't start rendering yet are dropped
+        """
+        self.executor.shutdown(wait=True, cancel_futures=cancel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(cancel=exc_type is not None)
+
+
+def render_archived_colorings(archive_file, target_directory, indices=None, processes=None):
+    """
+    Renders colorings stored in a solution archive into "<index>.png" files (indices starting from 1, matching the
+    order in which the colorings were found).
+    :param archive_file: The path of an archive written by SolutionArchiveWriter
+    :param target_directory: The directory for the images
+    :param indices: An iterable of the (one based) indices to be rendered, all colorings if not specified
+    :param processes: The number of rendering processes, defaults to the number of CPUs
+    :return: The number of rendered colorings
+    """
+    rendered = 0
+    with SolutionArchiveReader(archive_file) as archive, ColoringRenderPool(processes) as render_pool:
+        if indices is None:
+            indices = range(1, len(archive) + 1)
+        for index in indices:
+            render_pool.submit(archive[index - 1], os.path.join(target_directory, str(index) + ".png"))
+            rendered += 1
+    if render_pool.errors:
+        raise render_pool.errors[0]
+    return rendered
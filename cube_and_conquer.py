@@ -0,0 +1,182 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import time
+from collections import Counter
+from itertools import product
+
+from preprocessing import simplify_clauses
+from ramsey_solver import mapping_to_colored_graph
+from sat_generator import generate_general_ordered_ramsey_clauses, clause_list_to_sat_string, decode_edge, \
+    enforce_special_condition_clause, get_symmetry_edge_representatives, encode_over_edge_orbits
+from sat_solver import SAT_SOLVERS, SolverStatus
+
+# The solver running in the current pool worker, so that it can be killed along with the worker
+_worker_solver = None
+
+
+def _terminate_worker(signum, frame):
+    """
+    SIGTERM handler of the pool workers - kills the running solver process first, so it isn't left orphaned.
+    """
+    if _worker_solver is not None:
+        _worker_solver.cancel()
+    os._exit(1)
+
+
+def _initialize_worker():
+    signal.signal(signal.SIGTERM, _terminate_worker)
+
+
+def _solve_cube(task):
+    """
+    Solves the formula restricted by one cube in a separate solver process. Intended to be run in the process pool.
+    :param task: A tuple (cube index, SAT string of the whole formula, cube clauses, solver name, timeout, memory limit)
+    :return: A tuple (cube index, SolverStatus, variable mapping or None, elapsed wall-clock seconds)
+    """
+    global _worker_solver
+    index, sat_string, cube_clauses, solver, timeout, memory_limit = task
+    start = time.time()
+    _worker_solver = SAT_SOLVERS[solver](sat_string + ' & ' + clause_list_to_sat_string(cube_clauses), timeout,
+                                         memory_limit)
+    mapping = _worker_solver.find_next_solution(forbid_solution=False)
+    return index, _worker_solver.status, mapping, time.time() - start
+
+
+def select_cube_edges(clauses, n, number_of_edges):
+    """
+    Heuristically chooses the edges to split the formula on - the edges occurring in the most clauses, as fixing them
+    simplifies the remaining formula the most. Edges already fixed by unit clauses are skipped.
+    :return: A list of at most number_of_edges edges
+    """
+    fixed_variables = {abs(clause[0]) for clause in clauses if len(clause) == 1}
+    occurrences = Counter(abs(literal) for clause in clauses for literal in clause)
+    cube_variables = [variable for variable, _ in occurrences.most_common() if variable not in fixed_variables]
+    return [decode_edge(variable, n) for variable in cube_variables[:number_of_edges]]
+
+
+class CubeAndConquerSolver:
+    """
+    Decides whether an avoiding coloring exists by splitting the formula into 2^k cubes (every coloring of k chosen
+    edges) and solving the cubes on a pool of independent solver processes. The answer is UNSAT only if every cube is
+    refuted. Finished cubes are recorded in a report, which can be stored in a file and used to resume the computation.
+    """
+
+    def __init__(self, n, red_graph, blue_graph=None, solver="minisat", enforce_symmetry=False,
+                 special_conditions=None, cube_edges=None, number_of_cube_edges=6, processes=None, timeout=None,
+                 memory_limit=None, report_file=None, symmetry_group=None):
+        """
+        :param n, red_graph, blue_graph, solver, enforce_symmetry, special_conditions, symmetry_group: See
+        RamseySolver
+        :param cube_edges: A list of edges (v1,v2) whose colorings form the cubes. If not specified, the edges are
+        chosen heuristically by select_cube_edges
+        :param number_of_cube_edges: The number of heuristically chosen cube edges (i.e. there are 2^k cubes)
+        :param processes: The number of parallel solver processes, defaults to the number of CPUs
+        :param timeout: If specified, the wall-clock limit in seconds for solving a single cube
+        :param memory_limit: If specified, the memory limit in megabytes for every solver process
+        :param report_file: If specified, the per-cube report is continuously saved to this JSON file. If the file
+        already exists, the cubes refuted in it are skipped, i.e. the computation is resumed. The report holds a hash
+        of the formula, a report of a different formula (other patterns, symmetry or special conditions) is rejected.
+        """
+        if solver not in SAT_SOLVERS:
+            raise ValueError("Unknown SAT solver " + str(solver) + ".")
+        self.n = n
+        self.solver = solver
+        self.processes = processes
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.report_file = report_file
+        self.edge_representatives = get_symmetry_edge_representatives(n, enforce_symmetry, symmetry_group)
+        clauses, _ = simplify_clauses(generate_general_ordered_ramsey_clauses(n, red_graph, blue_graph,
+                                                                              enforce_symmetry, special_conditions,
+                                                                              symmetry_group))
+        self.sat_string = clause_list_to_sat_string(clauses)
+        formula_hash = hashlib.sha256(self.sat_string.encode()).hexdigest()
+        # SolverStatus of the last solve call, None before the first one
+        self.status = None
+        self.report = None
+        if report_file is not None and os.path.exists(report_file):
+            with open(report_file) as f:
+                self.report = json.load(f)
+            if self.report["n"] != n or self.report.get("formula_hash") != formula_hash or \
+                    (cube_edges is not None and [tuple(e) for e in self.report["cube_edges"]] != list(cube_edges)):
+                raise ValueError("The report file " + report_file + " belongs to a different computation.")
+            self.cube_edges = [tuple(e) for e in self.report["cube_edges"]]
+        else:
+            self.cube_edges = list(cube_edges) if cube_edges is not None else \
+                select_cube_edges(clauses, n, number_of_cube_edges)
+            self.report = {"n": n, "formula_hash": formula_hash, "cube_edges": self.cube_edges, "cubes": [
+                {"cube": list(colors), "status": None, "time": None}
+                for colors in product('rb', repeat=len(self.cube_edges))]}
+
+    def get_cube_special_conditions(self, index):
+        """
+        :return: The cube with the given index in the special conditions format [((v1,v2), color), ...]
+        """
+        return list(zip(self.cube_edges, self.report["cubes"][index]["cube"]))
+
+    def get_unfinished_cubes(self):
+        """
+        :return: Indices of the cubes which were not refuted yet
+        """
+        return [i for i, cube in enumerate(self.report["cubes"]) if cube["status"] != SolverStatus.UNSAT]
+
+    def solve(self):
+        """
+        Solves all the unfinished cubes in parallel. As soon as one cube turns out to be satisfiable, the remaining
+        solver processes are killed. Afterwards, self.status is SAT, UNSAT (all cubes refuted) or UNKNOWN (some cubes
+        timed out or failed - they can be resumed by calling solve again).
+        :return: An avoiding ColoredGraph coloring, or None if none was found
+        """
+        tasks = []
+        for index in self.get_unfinished_cubes():
+            cube_clauses = [enforce_special_condition_clause(self.n, i, j, color)
+                            for (i, j), color in self.get_cube_special_conditions(index)]
+            if self.edge_representatives is not None:
+                cube_clauses = encode_over_edge_orbits(cube_clauses, self.edge_representatives)
+            tasks.append((index, self.sat_string, cube_clauses, self.solver, self.timeout, self.memory_limit))
+
+        avoiding_coloring = None
+        pool = multiprocessing.Pool(self.processes, initializer=_initialize_worker)
+        try:
+            for index, status, mapping, elapsed in pool.imap_unordered(_solve_cube, tasks):
+                self.report["cubes"][index]["status"] = status
+                self.report["cubes"][index]["time"] = elapsed
+                self._save_report()
+                if status == SolverStatus.SAT:
+                    avoiding_coloring = mapping_to_colored_graph(mapping, self.n, self.edge_representatives)
+                    break
+        finally:
+            pool.terminate()
+            pool.join()
+
+        if avoiding_coloring is not None:
+            self.status = SolverStatus.SAT
+        elif not self.get_unfinished_cubes():
+            self.status = SolverStatus.UNSAT
+        else:
+            self.status = SolverStatus.UNKNOWN
+        return avoiding_coloring
+
+    def get_time_report(self):
+        """
+        :return: A human readable table with the status and solving time of every cube
+        """
+        lines = ["cube edges: " + ", ".join(str(v1) + " " + str(v2) for v1, v2 in self.cube_edges)]
+        for index, cube in enumerate(self.report["cubes"]):
+            elapsed = "-" if cube["time"] is None else "%.3f s" % cube["time"]
+            lines.append("%5d  %s  %-9s  %s" % (index, "".join(cube["cube"]), cube["status"] or "-", elapsed))
+        return "\n".join(lines)
+
+    def _save_report(self):
+        """
+        Atomically rewrites the report file (if specified), so that an interrupted computation can be resumed.
+        """
+        if self.report_file is None:
+            return
+        temporary_file = self.report_file + ".tmp"
+        with open(temporary_file, 'w') as f:
+            json.dump(self.report, f)
+        os.replace(temporary_file, self.report_file)
@@ -0,0 +1,171 @@
+import multiprocessing
+
+from colored_graph import ColoredGraph
+from sat_generator import generate_pattern_clauses, encode_edge
+
+# The patterns used by the current pool worker, set by _initialize_worker
+_worker_patterns = None
+
+
+def _initialize_worker(patterns):
+    global _worker_patterns
+    _worker_patterns = patterns
+
+
+def insert_vertex(edge_coloring, position):
+    """
+    Relabels a coloring of K_n as a partial coloring of K_{n+1} in which the vertex at the given position is new, i.e.
+    the vertices from position on are shifted by one.
+    :param edge_coloring: A dict edge: color
+    :return: The relabeled dict edge: color
+    """
+    def shift(v):
+        return v + 1 if v >= position else v
+    return {(shift(v1), shift(v2)): color for (v1, v2), color in edge_coloring.items()}
+
+
+def solve_small_cnf(clauses, assignment=None):
+    """
+    A simple DPLL procedure (unit propagation and branching on a literal of a shortest clause), sufficient for the
+    small formulas over the edges of one vertex.
+    :param clauses: A list of clauses (lists of integer literals)
+    :param assignment: The already assigned variables, a dict of int:bool
+    :return: A satisfying assignment (only the variables occurring in clauses are set) or None
+    """
+    assignment = dict(assignment or {})
+    while True:
+        reduced_clauses = []
+        unit = None
+        for clause in clauses:
+            remaining = []
+            for literal in clause:
+                value = assignment.get(abs(literal))
+                if value is None:
+                    remaining.append(literal)
+                elif value == (literal > 0):
+                    break
+            else:
+                if not remaining:
+                    return None
+                if len(remaining) == 1:
+                    unit = remaining[0]
+                reduced_clauses.append(remaining)
+        if not reduced_clauses:
+            return assignment
+        if unit is None:
+            break
+        assignment[abs(unit)] = unit > 0
+        clauses = reduced_clauses
+    branch_literal = min(reduced_clauses, key=len)[0]
+    for literal in (branch_literal, -branch_literal):
+        result = solve_small_cnf(reduced_clauses, _assign(assignment, literal))
+        if result is not None:
+            return result
+    return None
+
+
+def _assign(assignment, literal):
+    extended_assignment = dict(assignment)
+    extended_assignment[abs(literal)] = literal > 0
+    return extended_assignment
+
+
+def check_patterns_fit(patterns, size):
+    """
+    :param patterns: A list of pairs (adjacency list, color)
+    :raises ValueError: If one of the patterns is bigger than K_size
+    """
+    for adjacency_list, color in patterns:
+        if len(adjacency_list) > size:
+            raise ValueError("The " + ('red' if color == 'r' else 'blue') + " pattern has " +
+                             str(len(adjacency_list)) + " vertices, it doesn't fit in K_" + str(size) + ".")
+
+
+def extend_coloring(edge_coloring, n, position, patterns):
+    """
+    Tries to extend an avoiding coloring of K_n to an avoiding coloring of K_{n+1} by inserting a new vertex at the
+    given position. Only the pattern copies containing the new vertex have to be checked, so the problem is a small
+    formula over the n new edges (and the edges the original coloring didn't color).
+    :param edge_coloring: A dict edge: color of the K_n coloring
+    :param position: The position (from 1 to n+1) of the new vertex
+    :param patterns: A list of pairs (adjacency list, color) of the red and the blue pattern
+    :return: The extended dict edge: color, or None if there is no such extension
+    :raises ValueError: If one of the patterns doesn't fit in K_{n+1}
+    """
+    size = n + 1
+    check_patterns_fit(patterns, size)
+    fixed = {encode_edge(v1, v2, size): color == 'b'
+             for (v1, v2), color in insert_vertex(edge_coloring, position).items()}
+    clauses = []
+    for adjacency_list, color in patterns:
+        # The copies not needing the new vertex are copies in K_n, so the original coloring avoids them
+        for pattern_clause in generate_pattern_clauses(size, adjacency_list, invert=color == 'b', vertex=position):
+            clause = []
+            for literal in pattern_clause:
+                value = fixed.get(abs(literal))
+                if value is None:
+                    clause.append(literal)
+                elif value == (literal > 0):
+                    break
+            else:
+                if not clause:
+                    # The old edges already form a monochromatic copy together with the new (isolated) vertex
+                    return None
+                clauses.append(clause)
+    assignment = solve_small_cnf(clauses, fixed)
+    if assignment is None:
+        return None
+    extended_coloring = {}
+    for v1 in range(1, size + 1):
+        for v2 in range(v1 + 1, size + 1):
+            # Edges not occurring in any clause can have any color
+            extended_coloring[(v1, v2)] = 'b' if assignment.get(encode_edge(v1, v2, size), False) else 'r'
+    return extended_coloring
+
+
+def _extend_task(task):
+    """
+    Tries all the requested insertion positions for one coloring. Intended to be run in the process pool.
+    :return: A triple (coloring index, n, list of pairs (position, extended edge coloring))
+    """
+    index, edge_coloring, n, positions = task
+    extensions = []
+    for position in positions:
+        extended_coloring = extend_coloring(edge_coloring, n, position, _worker_patterns)
+        if extended_coloring is not None:
+            extensions.append((position, extended_coloring))
+    return index, n, extensions
+
+
+def extend_colorings(colorings, red_graph, blue_graph=None, positions=None, processes=None):
+    """
+    Grows avoiding colorings of K_n into avoiding colorings of K_{n+1} by vertex insertion. Every coloring is tried
+    to be extended at every position on a pool of processes, one extension per position is reported. As the
+    restriction of an avoiding coloring of K_{n+1} to any n vertices is an avoiding coloring of K_n, trying all the
+    avoiding colorings of K_n decides whether an avoiding coloring of K_{n+1} exists.
+    :param colorings: An iterable of ColoredGraph colorings of K_n, e.g. a SolutionArchiveReader
+    :param red_graph, blue_graph: ColoredGraph structures of the patterns (the diagonal case if blue_graph is None)
+    :param positions: If specified, the insertion positions to be tried, all from 1 to n+1 otherwise
+    :param processes: The number of processes, defaults to the number of CPUs
+    :raises ValueError: If one of the patterns doesn't fit in K_{n+1}
+    :return: A generator of triples (index of the original coloring, position of the new vertex, ColoredGraph
+    coloring of K_{n+1}), in no particular order. Closing the generator early stops the pool.
+    """
+    if blue_graph is None:
+        blue_graph = red_graph
+    patterns = [(red_graph.get_adjacency_list(), 'r'), (blue_graph.get_adjacency_list(), 'b')]
+
+    def tasks():
+        for index, coloring in enumerate(colorings):
+            n = coloring.size
+            check_patterns_fit(patterns, n + 1)
+            yield index, dict(coloring.edge_coloring), n, positions or range(1, n + 2)
+
+    pool = multiprocessing.Pool(processes, initializer=_initialize_worker, initargs=(patterns,))
+    try:
+        for index, n, extensions in pool.imap_unordered(_extend_task, tasks(), chunksize=16):
+            for position, extended_coloring in extensions:
+                yield index, position, ColoredGraph(n + 1, list(extended_coloring.keys()), extended_coloring)
+    finally:
+        pool.terminate()
+        pool.join()
@@ -1,4 +1,5 @@
 import os
+import queue
 import tkinter as tk
 import threading
 import concurrent.futures
@@ -7,9 +8,14 @@ import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
-from colored_graph import ColoredGraph
+from colored_graph import ColoredGraph, OrderedGraphView, MatrixView
+from coloring_renderer import ColoringRenderPool
+from solution_archive import SolutionArchiveWriter, DEFAULT_ARCHIVE_NAME, FLAG_SYMMETRIC, FLAG_SPECIAL_CONDITIONS
 from graph_generator import GraphGenerator
 from ramsey_solver import RamseySolver
+from sat_solver import SolverStatus
+from solution_browser import SolutionBrowser
+from solver_stats import SolverProgress
 
 matplotlib.use("Agg")
 
@@ -28,18 +34,21 @@ of these, and it takes the current red and blue graphs (because it has to create
 In short, the button takes the two specified graphs along with the specified underlying SAT solver and special conditions 
 and prompts you to choose the buttons on the right.
 
-Clicking 'Find next solution' tries to find a solution to the SAT problem and display you an avoiding colouring you haven't seen yet,
-if there is any. 'Copy graph as text' overwrites your clipboard with the currently displayed avoiding graph in the format
+Clicking 'Next solution' displays you an avoiding colouring you haven't seen yet, if there is any, 'Previous solution' steps
+back to the already seen ones. While you inspect a colouring, the next few are searched for in the background, so paging is
+usually immediate. 'Copy graph as text' overwrites your clipboard with the currently displayed avoiding graph in the format
 '1 2 r, 1 3 b, ..', which is exactly the format used in the Special conditions entry. It serves for advanced uses, when you e.g. want to 
 expand the current colouring by enforcing a part of it. You can also save the current figures to a chosen folder by the last button.
 
 Note that clicking 'Create new SAT formula' resets these already found solutions and starts searching for them from scratch.
 Also note that before clicking 'Create new SAT formula', the newly built graphs in the builders don't matter, as the previous
-(SAT) problem is still active while clicking 'Find next solution'.
+(SAT) problem is still active while clicking 'Next solution'.
 
 For advanced uses (e.g. when you want to exhaustively search for all possible solutions to a given SAT problem and
 view them with another tool), you can use the button 'Find all solutions in a separate thread'. This also creates a new formula
-for itself and saves all found avoiding colourings until they run out.
+for itself and saves all found avoiding colourings into the file 'colorings.archive' until they run out. Rendering the figures
+is slow, so they are only saved along if 'Render all figures' is checked. Otherwise render the ones you need later by
+'python render_colorings.py <archive> <directory>' (see its --range and --sample options).
 
 Please note that (depending on you PC specifications) you may encounter difficulties when trying to look for large avoiding graphs (of size ~16 and more).
 """
@@ -61,8 +70,9 @@ class GraphBuilder:
         self.color = color
         self.color_full_name = 'red' if color == 'r' else 'blue'
         self._initialize_control_frame()
+        self._initialize_canvas()
         self.width = 20
-        self.update_graph()
+        self._show_graph()
 
     def _initialize_control_frame(self):
         """
@@ -94,13 +104,24 @@ class GraphBuilder:
         self.edge_adder.grid(row=6, column=0, sticky='N')
         self.edge_adder.bind("<Return>", self.update_graph)
 
+    def _initialize_canvas(self):
+        """
+        Creates the label and the one persistent canvas the graph is redrawn into.
+        """
+        label = tk.Label(self.master_frame, text="Current " + self.color_full_name + " graph:",
+                         fg=self.color_full_name)
+        label.grid(row=0, column=1, sticky='N')
+        self.figure = matplotlib.figure.Figure(figsize=(6, 3.5))
+        self.view = OrderedGraphView(self.figure.add_subplot(111))
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.master_frame)
+        self.canvas.get_tk_widget().grid(row=1, column=1, sticky='N')
+
     def update_graph(self, event=None):
         """
         Processes  textbox input and adds/removes edges accordingly from the underlying graph. The behaviour is -
         if the edge is present in the graph, remove it, otherwise add it. The only allowed text is in the form of two
         separated integers denoting the new edge.
         """
-        self._show_graph()
         adder_content = self.edge_adder.get()
         self.edge_adder.delete(0, 100)
         if adder_content == "":
@@ -129,15 +150,10 @@ class GraphBuilder:
 
     def _show_graph(self):
         """
-        Displays the underlying graph in the Tkinter Canvas.
+        Redraws the underlying graph into the persistent Tkinter Canvas, only the data of the existing artists changes.
         """
-        fig, _ = self.graph.get_visualization()
-        label_red = tk.Label(self.master_frame, text="Current " + self.color_full_name + " graph:",
-                             fg=self.color_full_name)
-        label_red.grid(row=0, column=1, sticky='N')
-        canvas_red = FigureCanvasTkAgg(fig, master=self.master_frame)
-        canvas_red.draw()
-        canvas_red.get_tk_widget().grid(row=1, column=1, sticky='N')
+        self.view.update(self.graph)
+        self.canvas.draw_idle()
 
     def _reset_graph(self):
         """
@@ -167,11 +183,9 @@ G_DEFAULT_BLUE = ColoredGraph(4, [(1, 2), (2, 3), (3, 4)], {(1, 2): 'b', (2, 3):
 G_DEFAULT_RED.color_edges_monochromatic('r')
 G_DEFAULT_BLUE.color_edges_monochromatic('b')
 
-# Global variables keeping track of the current program state
-ramsey_solver = RamseySolver(5, G_DEFAULT_RED, G_DEFAULT_BLUE)
+# The RamseySolver used by the all solutions thread, kept so that its running solver call can be cancelled
+all_colorings_solver = None
 current_avoiding_graph = None
-current_graph_viz = None
-current_matrix_viz = None
 
 
 def general_help_popup():
@@ -180,69 +194,66 @@ def general_help_popup():
     help_label.grid(row=0, column=0)
 
 
-# Create the main window
-root = tk.Tk()
-root.title("Ordered Ramsey numbers utility")
-root.geometry('{}x{}'.format(1400, 900))
-
-# Create main frame containers
-control_menu_left = tk.Frame(root)
-control_menu_right = tk.Frame(root)
-input_graph_builder = tk.Frame(root)
-output_graph_visualiser = tk.Frame(root)
-red_graph_frame = tk.Frame(input_graph_builder)
-blue_graph_frame = tk.Frame(input_graph_builder)
-
-# Layout these main containers inside the main window
-control_menu_left.grid(row=0, column=0)
-control_menu_right.grid(row=0, column=1)
-input_graph_builder.grid(row=1, column=0)
-output_graph_visualiser.grid(row=1, column=1)
-red_graph_frame.grid(row=0, column=0)
-blue_graph_frame.grid(row=1, column=0)
-
-red_builder = GraphBuilder(red_graph_frame, G_DEFAULT_RED, 'r')
-blue_builder = GraphBuilder(blue_graph_frame, G_DEFAULT_BLUE, 'b')
-
-info_text_var = tk.StringVar(output_graph_visualiser)
-info_text_var.set("Press a button to see something here")
-
-# Draw empty figures to fill the space
-graph_viz_figure = matplotlib.figure.Figure(figsize=(6, 3.7))
-graph_viz_canvas = FigureCanvasTkAgg(graph_viz_figure, master=output_graph_visualiser)
-graph_viz_canvas.draw()
-graph_viz_canvas.get_tk_widget().grid(row=1, column=0)
-matrix_viz_figure = matplotlib.figure.Figure(figsize=(6, 3.7))
-matrix_viz_canvas = FigureCanvasTkAgg(matrix_viz_figure, master=output_graph_visualiser)
-matrix_viz_canvas.get_tk_widget().grid(row=2, column=0)
-matrix_viz_canvas.draw()
-
 # computation_executor, holding either None or concurrent.futures.ThreadPoolExecutor object
-side_executor_thread_interactive = None
 side_executor_thread_all_solutions = None
 # either None or concurrent.futures.Future object
-future_avoiding_coloring = None
 future_all_solutions = None
+# True while the user waits for the next coloring, i.e. it wasn't prefetched
+waiting_for_next_coloring = False
+
+# The worker threads can't touch the widgets - they put the functions to be run in the GUI thread into this queue and
+# wake up the main loop by a virtual event
+gui_events = queue.Queue()
 
 
-def periodic_thread_check():
+def post_gui_event(handler):
     """
-    Check every 200 ms the status of the side executor threads. If it finished running, displays the results and
-    change the button appearance.
+    Schedules the function handler to be called in the GUI thread. Safe to be called from any thread.
     """
-    global side_executor_thread_interactive, side_executor_thread_all_solutions
-    if side_executor_thread_interactive is not None:
-        if future_avoiding_coloring is not None and future_avoiding_coloring.done():
-            update_gui_with_found_coloring(future_avoiding_coloring.result())
-            side_executor_thread_interactive = None
-            next_solution_button['text'] = "Find next solution"
-            next_solution_button.config(fg="black")
-    if side_executor_thread_all_solutions is not None:
-        if future_all_solutions is not None and future_all_solutions.done():
-            side_executor_thread_all_solutions = None
-            all_solutions_button['text'] = "Find all solutions in a separate thread"
-            all_solutions_button.config(fg='black')
-    root.after(3000, periodic_thread_check)
+    gui_events.put(handler)
+    try:
+        root.event_generate("<<WorkerEvent>>", when="tail")
+    except (RuntimeError, tk.TclError):
+        # The main window is already destroyed
+        pass
+
+
+def process_gui_events(event=None):
+    """
+    Runs all the handlers posted by post_gui_event.
+    """
+    while True:
+        try:
+            handler = gui_events.get_nowait()
+        except queue.Empty:
+            return
+        handler()
+
+
+def create_solution_browser(solver):
+    """
+    :return: A SolutionBrowser over the solver, notifying the GUI thread about the prefetched colorings
+    """
+    browser = SolutionBrowser(solver, on_change=lambda: post_gui_event(lambda: solution_browser_changed(browser)))
+    solver.stats.add_hook(solver_progress_hook)
+    return browser
+
+
+def solver_progress_hook(stats, event):
+    """
+    A SolverStats hook passing the live progress of the running solver to the GUI thread.
+    """
+    if event['event'] == 'progress':
+        progress = SolverProgress(**{key: value for key, value in event.items() if key != 'event'})
+        post_gui_event(lambda: show_solver_progress(stats, progress))
+
+
+def show_solver_progress(stats, progress):
+    """
+    Shows the progress of the search in the info label, while the user waits for the next coloring.
+    """
+    if waiting_for_next_coloring and stats is ramsey_solver.stats:
+        info_text_var.set("Finding coloring for " + str(ramsey_solver.n) + " vertices... (" + str(progress) + ")")
 
 
 def get_special_conditions(maximum_vertex_num):
@@ -267,7 +278,6 @@ def get_special_conditions(maximum_vertex_num):
         return None
 
 
-
 def check_create_new_solver_preconditions():
     """
     Helper function, which checks the preconditions for creating a new SAT formula, so that it is not misused
@@ -298,11 +308,15 @@ def create_new_solver():
     if check_create_new_solver_preconditions():
         avoiding_graph_size = int(avoiding_graph_size_specifier.get())
         special_conditions_list = get_special_conditions(avoiding_graph_size)
-        global ramsey_solver
+        global ramsey_solver, solution_browser
+        solution_browser.stop()
+        set_waiting_for_next_coloring(False)
         ramsey_solver = RamseySolver(avoiding_graph_size, red_builder.graph, blue_builder.graph,
                                      solver=solver_box.get(),
                                      enforce_symmetry=bool(enforce_symmetry_var.get()),
                                      special_conditions=special_conditions_list)
+        solution_browser = create_solution_browser(ramsey_solver)
+        update_prefetched_label()
         info_text_var.set("↑↑↑ Created new SAT solver formula ↑↑↑")
         info_label.config(fg="black")
 
@@ -312,50 +326,91 @@ def update_gui_with_found_coloring(avoiding_drawing):
     Updates the graphs to display the (newly found) avoiding drawing.
     :param avoiding_drawing: Either ColoredGraph structure or None
     """
-    global current_graph_viz, current_matrix_viz, current_avoiding_graph
+    global current_avoiding_graph
     if avoiding_drawing is None:
-        info_text_var.set("Coloring (or next coloring) for " + str(ramsey_solver.n) + " vertices doesn't exist.")
-        info_label.config(fg="red")
+        status = solution_browser.status
+        if status == SolverStatus.ERROR:
+            info_text_var.set("The search failed: " + str(solution_browser.error))
+            info_label.config(fg="red")
+        elif status == SolverStatus.CANCELLED:
+            info_text_var.set("Computation cancelled")
+            info_label.config(fg="black")
+        elif status != SolverStatus.UNSAT:
+            info_text_var.set("The solver didn't finish (" + str(status) + "), try again.")
+            info_label.config(fg="red")
+        else:
+            info_text_var.set("Coloring (or next coloring) for " + str(ramsey_solver.n) + " vertices doesn't exist.")
+            info_label.config(fg="red")
         return
-    graph_fig, _ = avoiding_drawing.get_visualization()
-    matrix_fig, _ = avoiding_drawing.get_matrix_visualization()
-    current_avoiding_graph, current_graph_viz, current_matrix_viz = avoiding_drawing, graph_fig, matrix_fig
-    canvas_graph = FigureCanvasTkAgg(graph_fig, master=output_graph_visualiser)
-    canvas_graph.draw()
-    canvas_graph.get_tk_widget().grid(row=1, column=0, sticky='N')
-    canvas_graph = FigureCanvasTkAgg(matrix_fig, master=output_graph_visualiser)
-    canvas_graph.draw()
-    canvas_graph.get_tk_widget().grid(row=2, column=0, sticky='S')
-    info_text_var.set("Avoiding coloring for " + str(ramsey_solver.n) + ":")
+    current_avoiding_graph = avoiding_drawing
+    graph_viz_view.update(avoiding_drawing)
+    graph_viz_canvas.draw_idle()
+    if matrix_viz_view.update(avoiding_drawing):
+        # Only the image data changed, so only the image is redrawn and blitted
+        matrix_viz_view.ax.draw_artist(matrix_viz_view.image)
+        matrix_viz_canvas.blit(matrix_viz_view.ax.bbox)
+    else:
+        matrix_viz_canvas.draw_idle()
+    info_text_var.set("Avoiding coloring " + str(solution_browser.position + 1) + " for " + str(ramsey_solver.n) + ":")
     info_label.config(fg="green")
+    update_prefetched_label()
 
 
-def find_coloring():
+def set_waiting_for_next_coloring(waiting):
     """
-    Prompts the ramsey_solver for a next avoiding coloring in a separate thread.
+    Switches the next solution button between paging and terminating the running search.
     """
-    # TODO this part is maybe useless
-    global current_graph_viz, current_matrix_viz, current_avoiding_graph, side_executor_thread_interactive
-    if current_avoiding_graph is not None:
-        current_graph_viz.clf()
-        current_matrix_viz.clf()
+    global waiting_for_next_coloring
+    waiting_for_next_coloring = waiting
+    next_solution_button['text'] = "Terminate computation" if waiting else "Next solution"
+    next_solution_button.config(fg="red" if waiting else "black")
 
-    if side_executor_thread_interactive is not None:
-        side_executor_thread_interactive.shutdown()
-        side_executor_thread_interactive = None
-        next_solution_button['text'] = "Find next solution"
-        next_solution_button.config(fg="black")
-        info_text_var.set("Computation cancelled")
-        info_label.config(fg="black")
+
+def update_prefetched_label():
+    prefetched_text_var.set("Found ahead: " + str(solution_browser.get_prefetched_count()))
+
+
+def show_next_coloring():
+    """
+    Displays the next avoiding coloring of the solution_browser. If it isn't found yet, the button terminates the
+    search until it is.
+    """
+    if waiting_for_next_coloring:
+        # The browser notifies solution_browser_changed once the search stops
+        solution_browser.stop()
         return
+    avoiding_coloring = solution_browser.next()
+    if avoiding_coloring is not None:
+        update_gui_with_found_coloring(avoiding_coloring)
+    elif solution_browser.exhausted and not solution_browser.searching:
+        update_gui_with_found_coloring(None)
+    else:
+        set_waiting_for_next_coloring(True)
+        info_text_var.set("Finding coloring for " + str(ramsey_solver.n) + " vertices...")
+        info_label.config(fg="grey")
+
 
-    info_text_var.set("Finding coloring for " + str(ramsey_solver.n) + " vertices...")
-    info_label.config(fg="grey")
-    side_executor_thread_interactive = concurrent.futures.ThreadPoolExecutor()
-    next_solution_button['text'] = "Terminate computation"
-    next_solution_button.config(fg="red")
-    global future_avoiding_coloring
-    future_avoiding_coloring = side_executor_thread_interactive.submit(ramsey_solver.find_next_avoiding_drawing)
+def show_previous_coloring():
+    avoiding_coloring = solution_browser.previous()
+    if avoiding_coloring is not None:
+        update_gui_with_found_coloring(avoiding_coloring)
+
+
+def solution_browser_changed(browser):
+    """
+    Called in the GUI thread whenever a browser prefetched a coloring or its search stopped.
+    """
+    if browser is not solution_browser:
+        # A notification of the browser of a previous formula
+        return
+    if waiting_for_next_coloring:
+        if browser.get_prefetched_count() > 0:
+            set_waiting_for_next_coloring(False)
+            update_gui_with_found_coloring(browser.next())
+        elif not browser.searching:
+            set_waiting_for_next_coloring(False)
+            update_gui_with_found_coloring(None)
+    update_prefetched_label()
 
 
 def find_all_colorings():
@@ -367,7 +422,9 @@ def find_all_colorings():
     global side_executor_thread_all_solutions, future_all_solutions, all_colorings_exit_flag
     if side_executor_thread_all_solutions is not None:
         all_colorings_exit_flag = True
-        side_executor_thread_all_solutions.shutdown()
+        if all_colorings_solver is not None:
+            all_colorings_solver.cancel()
+        side_executor_thread_all_solutions.shutdown(wait=False)
         side_executor_thread_all_solutions = None
         all_solutions_button['text'] = "Find all solutions in a separate thread"
         all_solutions_button.config(fg='black')
@@ -382,6 +439,7 @@ def find_all_colorings():
     avoiding_graph_size = int(avoiding_graph_size_specifier.get())
     special_conditions_list = get_special_conditions(avoiding_graph_size)
     enforce_symmetry = bool(enforce_symmetry_var.get())
+    render_figures = bool(render_figures_var.get())
     r_graph = red_builder.graph
     b_graph = blue_builder.graph
     solver = solver_box.get()
@@ -393,39 +451,70 @@ def find_all_colorings():
     all_colorings_exit_flag = False
     future_all_solutions = side_executor_thread_all_solutions.submit(get_and_save_all_colorings, target_directory, avoiding_graph_size, r_graph, b_graph, solver,
                                                     enforce_symmetry,
-                                                    special_conditions_list)
+                                                    special_conditions_list, render_figures)
+    future_all_solutions.add_done_callback(lambda future: post_gui_event(lambda: all_colorings_finished(future)))
+
+
+def all_colorings_finished(future):
+    """
+    Called in the GUI thread once the all solutions search stops, restores the button.
+    """
+    global side_executor_thread_all_solutions, future_all_solutions
+    if future is not future_all_solutions:
+        # The search was terminated by the button, which is already restored
+        return
+    side_executor_thread_all_solutions.shutdown(wait=False)
+    side_executor_thread_all_solutions = None
+    future_all_solutions = None
+    all_solutions_button['text'] = "Find all solutions in a separate thread"
+    all_solutions_button.config(fg='black')
 
 
 def get_and_save_all_colorings(target_directory, avoiding_graph_size, r_graph, b_graph, solver, enforce_symmetry,
-                               special_conditions_list):
+                               special_conditions_list, render_figures=False):
     """
-    Searches exhaustively for all solutions for a given Ramsey problem and saves them in the specified folder. As it is
-    intended to be run in a separate ThreadPool, it contains an exit flag condition, which can be used to terminate this
-    function from outside.
+    Searches exhaustively for all solutions for a given Ramsey problem and saves them in a solution archive in the
+    specified folder. The figures are only rendered if render_figures is set, otherwise they can be rendered later
+    (all of them, a sample or a range) by render_colorings.py. As it is intended to be run in a separate ThreadPool,
+    it contains an exit flag condition, which can be used to terminate this function from outside (along with
+    cancelling all_colorings_solver, which interrupts the running solver call).
     """
+    global all_colorings_solver
     r_solver = RamseySolver(avoiding_graph_size, r_graph, b_graph,
                             solver=solver,
                             enforce_symmetry=enforce_symmetry,
                             special_conditions=special_conditions_list)
-    i = 1
-    while not all_colorings_exit_flag:
-        avoiding_coloring = r_solver.find_next_avoiding_drawing()
-        if avoiding_coloring is None:
-            return
-        # create figure
-
-        fig = plt.figure(figsize=(15, 6))
-        gs = fig.add_gridspec(1, 2)
-        ax1 = fig.add_subplot(gs[0, 0])
-        _, ax1 = avoiding_coloring.get_visualization(ax=ax1)
-        ax2 = fig.add_subplot(gs[0, 1])
-        _, ax2 = avoiding_coloring.get_matrix_visualization(ax=ax2)
-        plt.tight_layout()
-        # save figure
-        file_name = os.path.join(target_directory, str(i) + ".png")
-        plt.savefig(file_name)
-        plt.close()
-        i += 1
+    all_colorings_solver = r_solver
+    archive_flags = (FLAG_SYMMETRIC if enforce_symmetry else 0) | (FLAG_SPECIAL_CONDITIONS if special_conditions_list else 0)
+    archive = SolutionArchiveWriter(os.path.join(target_directory, DEFAULT_ARCHIVE_NAME), avoiding_graph_size,
+                                    r_graph, b_graph, archive_flags)
+    # The figures are rendered in separate processes while the solver keeps searching
+    render_pool = ColoringRenderPool() if render_figures else None
+    try:
+        i = 1
+        while not all_colorings_exit_flag:
+            avoiding_coloring = r_solver.find_next_avoiding_drawing()
+            if avoiding_coloring is None:
+                return
+            archive.write(avoiding_coloring)
+            if render_pool is not None:
+                render_pool.submit(avoiding_coloring, os.path.join(target_directory, str(i) + ".png"))
+            i += 1
+    finally:
+        archive.close()
+        if render_pool is not None:
+            render_pool.close(cancel=all_colorings_exit_flag)
+            if render_pool.errors:
+                error = render_pool.errors[0]
+                post_gui_event(lambda: show_rendering_error(error, len(render_pool.errors)))
+
+
+def show_rendering_error(error, error_count):
+    """
+    Reports in the info label that some figures of the all solutions search weren't rendered.
+    """
+    info_text_var.set(str(error_count) + " figure(s) couldn't be rendered: " + str(error))
+    info_label.config(fg="red")
 
 
 def copy_graph():
@@ -470,63 +559,123 @@ def save_figures():
     return
 
 
-help_button = tk.Button(master=control_menu_left, text="Help!", command=general_help_popup, fg="purple", width=8)
-help_button.grid(row=1, column=0, columnspan=2)
+def on_closing():
+    global all_colorings_exit_flag
+    all_colorings_exit_flag = True #terminates the all_solutions thread
+    if all_colorings_solver is not None:
+        all_colorings_solver.cancel()
+    solution_browser.stop() #terminates the prefetching thread
+    root.quit()
+    root.destroy()
+
+
+if __name__ == "__main__":
+    # The solver of the current formula
+    ramsey_solver = RamseySolver(5, G_DEFAULT_RED, G_DEFAULT_BLUE)
 
-solver_info_label = tk.Label(master=control_menu_left, text="SAT solver:")
-solver_info_label.grid(row=0, column=0)
+    # Create the main window
+    root = tk.Tk()
+    root.title("Ordered Ramsey numbers utility")
+    root.geometry('{}x{}'.format(1400, 900))
 
-solver_box = ttk.Combobox(master=control_menu_left, values=["minisat", "glucose"], width=8)
-solver_box.current(0)
-solver_box.grid(row=0, column=1)
+    # Create main frame containers
+    control_menu_left = tk.Frame(root)
+    control_menu_right = tk.Frame(root)
+    input_graph_builder = tk.Frame(root)
+    output_graph_visualiser = tk.Frame(root)
+    red_graph_frame = tk.Frame(input_graph_builder)
+    blue_graph_frame = tk.Frame(input_graph_builder)
 
-graph_size_info_label = tk.Label(master=control_menu_left, text="Avoiding graph size:")
-graph_size_info_label.grid(row=0, column=2)
+    # Layout these main containers inside the main window
+    control_menu_left.grid(row=0, column=0)
+    control_menu_right.grid(row=0, column=1)
+    input_graph_builder.grid(row=1, column=0)
+    output_graph_visualiser.grid(row=1, column=1)
+    red_graph_frame.grid(row=0, column=0)
+    blue_graph_frame.grid(row=1, column=0)
 
-avoiding_graph_size_specifier = tk.Spinbox(control_menu_left, from_=5, to=22, width=4)
-avoiding_graph_size_specifier.grid(row=0, column=3)
+    red_builder = GraphBuilder(red_graph_frame, G_DEFAULT_RED, 'r')
+    blue_builder = GraphBuilder(blue_graph_frame, G_DEFAULT_BLUE, 'b')
 
-enforce_symmetry_var = tk.IntVar()
-enforce_symmetry_checkbox = tk.Checkbutton(control_menu_left, text="Enforce symmetry", variable=enforce_symmetry_var)
-enforce_symmetry_checkbox.grid(row=0, column=4)
+    info_text_var = tk.StringVar(output_graph_visualiser)
+    info_text_var.set("Press a button to see something here")
 
-special_conditions_label = tk.Label(master=control_menu_left, text="Special conditions:")
-special_conditions_label.grid(row=0, column=5)
+    # The result figures and canvases are created once, found colorings are redrawn into their axes
+    graph_viz_figure = matplotlib.figure.Figure(figsize=(6, 3.7))
+    graph_viz_view = OrderedGraphView(graph_viz_figure.add_subplot(111))
+    graph_viz_canvas = FigureCanvasTkAgg(graph_viz_figure, master=output_graph_visualiser)
+    graph_viz_canvas.draw()
+    graph_viz_canvas.get_tk_widget().grid(row=1, column=0, sticky='N')
+    matrix_viz_figure = matplotlib.figure.Figure(figsize=(6, 3.7))
+    matrix_viz_view = MatrixView(matrix_viz_figure.add_subplot(111))
+    matrix_viz_canvas = FigureCanvasTkAgg(matrix_viz_figure, master=output_graph_visualiser)
+    matrix_viz_canvas.get_tk_widget().grid(row=2, column=0, sticky='S')
+    matrix_viz_canvas.draw()
 
-special_conditions_entry = tk.Entry(master=control_menu_left)
-special_conditions_entry.grid(row=0, column=6)
+    root.bind("<<WorkerEvent>>", process_gui_events)
 
-all_solutions_button = tk.Button(master=control_menu_left, text="Find all solutions in a separate thread",
-                                 command=find_all_colorings)
-all_solutions_button.grid(row=1, column=2, columnspan=2)
+    solution_browser = create_solution_browser(ramsey_solver)
 
-new_problem_button = tk.Button(master=control_menu_left, text="Create new SAT formula", command=create_new_solver)
-new_problem_button.grid(row=1, column=4, columnspan=3)
+    help_button = tk.Button(master=control_menu_left, text="Help!", command=general_help_popup, fg="purple", width=8)
+    help_button.grid(row=1, column=0, columnspan=2)
 
-next_solution_button = tk.Button(master=control_menu_right, text="Find next solution", command=find_coloring)
-next_solution_button.grid(row=0, column=0)
+    solver_info_label = tk.Label(master=control_menu_left, text="SAT solver:")
+    solver_info_label.grid(row=0, column=0)
 
+    solver_box = ttk.Combobox(master=control_menu_left, values=["minisat", "glucose"], width=8)
+    solver_box.current(0)
+    solver_box.grid(row=0, column=1)
 
-copy_solution_button = tk.Button(master=control_menu_right, text="Copy graph as text", command=copy_graph)
-copy_solution_button.grid(row=0, column=2)
+    graph_size_info_label = tk.Label(master=control_menu_left, text="Avoiding graph size:")
+    graph_size_info_label.grid(row=0, column=2)
 
-save_solution_button = tk.Button(master=control_menu_right, text="Save current figures", command=save_figures)
-save_solution_button.grid(row=0, column=3)
+    avoiding_graph_size_specifier = tk.Spinbox(control_menu_left, from_=5, to=22, width=4)
+    avoiding_graph_size_specifier.grid(row=0, column=3)
 
-info_label = tk.Label(master=output_graph_visualiser, textvariable=info_text_var)
-info_label.grid(row=0, column=0, sticky='N')
+    enforce_symmetry_var = tk.IntVar()
+    enforce_symmetry_checkbox = tk.Checkbutton(control_menu_left, text="Enforce symmetry",
+                                               variable=enforce_symmetry_var)
+    enforce_symmetry_checkbox.grid(row=0, column=4)
 
+    special_conditions_label = tk.Label(master=control_menu_left, text="Special conditions:")
+    special_conditions_label.grid(row=0, column=5)
 
-def on_closing():
-    global all_colorings_exit_flag
-    all_colorings_exit_flag = True #terminates the all_solutions thread
-    if side_executor_thread_interactive is not None:
-        side_executor_thread_interactive.shutdown() #terminates the interactive solutions thread
-    root.quit()
-    root.destroy()
+    special_conditions_entry = tk.Entry(master=control_menu_left)
+    special_conditions_entry.grid(row=0, column=6)
+
+    all_solutions_button = tk.Button(master=control_menu_left, text="Find all solutions in a separate thread",
+                                     command=find_all_colorings)
+    all_solutions_button.grid(row=1, column=2, columnspan=2)
+
+    render_figures_var = tk.IntVar()
+    render_figures_checkbox = tk.Checkbutton(control_menu_left, text="Render all figures", variable=render_figures_var)
+    render_figures_checkbox.grid(row=1, column=4)
+
+    new_problem_button = tk.Button(master=control_menu_left, text="Create new SAT formula", command=create_new_solver)
+    new_problem_button.grid(row=1, column=5, columnspan=2)
+
+    previous_solution_button = tk.Button(master=control_menu_right, text="Previous solution",
+                                         command=show_previous_coloring)
+    previous_solution_button.grid(row=0, column=0)
+
+    next_solution_button = tk.Button(master=control_menu_right, text="Next solution", command=show_next_coloring)
+    next_solution_button.grid(row=0, column=1)
+
+    prefetched_text_var = tk.StringVar(control_menu_right)
+    prefetched_label = tk.Label(master=control_menu_right, textvariable=prefetched_text_var, fg="grey")
+    prefetched_label.grid(row=1, column=0, columnspan=2)
+    update_prefetched_label()
+
+
+    copy_solution_button = tk.Button(master=control_menu_right, text="Copy graph as text", command=copy_graph)
+    copy_solution_button.grid(row=0, column=2)
+
+    save_solution_button = tk.Button(master=control_menu_right, text="Save current figures", command=save_figures)
+    save_solution_button.grid(row=0, column=3)
 
+    info_label = tk.Label(master=output_graph_visualiser, textvariable=info_text_var)
+    info_label.grid(row=0, column=0, sticky='N')
 
-root.protocol("WM_DELETE_WINDOW", on_closing)
+    root.protocol("WM_DELETE_WINDOW", on_closing)
 
-periodic_thread_check()
-tk.mainloop()
\ No newline at end of file
+    tk.mainloop()
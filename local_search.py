@@ -0,0 +1,235 @@
+import math
+import multiprocessing
+import random
+
+from colored_graph import ColoredGraph
+from sat_generator import generate_pattern_clauses, encode_edge
+from structured_colorings import verify_coloring
+
+LOCAL_SEARCH_METHODS = ("walksat", "annealing", "tabu")
+
+# The LocalSearch of the current pool worker, set by _initialize_worker
+_worker_search = None
+
+
+class _SearchState:
+    """
+    A coloring during the search - the number of edges with the "satisfying" color of every pattern copy clause and
+    the list of the violated clauses (the monochromatic copies), both updated incrementally by flip.
+    """
+
+    def __init__(self, search, values):
+        self.search = search
+        self.values = values
+        self.true_counts = [sum(values[variable] == sign for variable in clause)
+                            for clause, sign in zip(search.clauses, search.clause_signs)]
+        self.violated = [index for index, count in enumerate(self.true_counts) if count == 0]
+        # The position of every violated clause in self.violated, -1 for the other ones
+        self.positions = [-1] * len(search.clauses)
+        for position, index in enumerate(self.violated):
+            self.positions[index] = position
+
+    def get_break_count(self, variable):
+        """
+        :return: The number of clauses the flip of the variable would violate
+        """
+        value = self.values[variable]
+        signs = self.search.clause_signs
+        return sum(1 for index in self.search.occurrences[variable]
+                   if signs[index] == value and self.true_counts[index] == 1)
+
+    def get_delta(self, variable):
+        """
+        :return: The change of the number of violated clauses the flip of the variable would cause
+        """
+        value = self.values[variable]
+        signs = self.search.clause_signs
+        delta = 0
+        for index in self.search.occurrences[variable]:
+            if signs[index] == value:
+                if self.true_counts[index] == 1:
+                    delta += 1
+            elif self.true_counts[index] == 0:
+                delta -= 1
+        return delta
+
+    def flip(self, variable):
+        value = self.values[variable]
+        self.values[variable] = not value
+        signs = self.search.clause_signs
+        for index in self.search.occurrences[variable]:
+            if signs[index] == value:
+                self.true_counts[index] -= 1
+                if self.true_counts[index] == 0:
+                    self.positions[index] = len(self.violated)
+                    self.violated.append(index)
+            else:
+                self.true_counts[index] += 1
+                if self.true_counts[index] == 1:
+                    # Removes the clause from the violated ones by moving the last one into its place
+                    position, last = self.positions[index], self.violated[-1]
+                    self.violated[position] = last
+                    self.positions[last] = position
+                    self.violated.pop()
+                    self.positions[index] = -1
+
+
+class LocalSearch:
+    """
+    Stochastic local search for avoiding colorings working directly on the coloring of K_n. The cost of a coloring is
+    the number of monochromatic copies of the patterns, i.e. the number of violated pattern copy clauses. Every edge
+    has the list of the copies containing it precomputed, so the cost change of flipping one edge is evaluated from
+    these copies only.
+    """
+
+    def __init__(self, n, red_graph, blue_graph=None):
+        """
+        :param red_graph, blue_graph: ColoredGraph structures of the patterns (the diagonal case if blue_graph is None)
+        """
+        if blue_graph is None:
+            blue_graph = red_graph
+        if len(red_graph) > n or len(blue_graph) > n:
+            raise ValueError("One of the graphs is bigger than K_n, this doesn't make sense.")
+        if not red_graph.get_edge_list() or not blue_graph.get_edge_list():
+            raise ValueError("One of the graphs has no edges, this doesn't make sense.")
+        self.n = n
+        self.red_graph = red_graph
+        self.blue_graph = blue_graph
+        # The edges in the order of their indices, an edge value True means blue
+        self.edges = [(i, j) for i in range(1, n + 1) for j in range(i + 1, n + 1)]
+        edge_index = {encode_edge(i, j, n): index for index, (i, j) in enumerate(self.edges)}
+        # Every clause is a tuple of edge indices, satisfied if one of them has the value of the clause sign - blue
+        # (True) for the copies of the red pattern and red (False) for the blue ones
+        self.clauses = []
+        self.clause_signs = []
+        for graph, invert in ((red_graph, False), (blue_graph, True)):
+            for clause in generate_pattern_clauses(n, graph.get_adjacency_list(), invert):
+                self.clauses.append(tuple(edge_index[abs(literal)] for literal in clause))
+                self.clause_signs.append(not invert)
+        self.occurrences = [[] for _ in self.edges]
+        for index, clause in enumerate(self.clauses):
+            for variable in clause:
+                self.occurrences[variable].append(index)
+
+    def values_to_coloring(self, values):
+        """
+        :return: The ColoredGraph coloring of K_n given by the edge values
+        """
+        edge_coloring = {edge: 'b' if value else 'r' for edge, value in zip(self.edges, values)}
+        return ColoredGraph(self.n, list(edge_coloring.keys()), edge_coloring)
+
+    def coloring_to_values(self, coloring, rng=random):
+        """
+        :return: The edge values of a (partial) ColoredGraph coloring of K_n, uncolored edges get random values
+        """
+        return [coloring.edge_coloring[edge] == 'b' if edge in coloring.edge_coloring else rng.random() < 0.5
+                for edge in self.edges]
+
+    def run(self, method="walksat", max_flips=100000, seed=None, initial_values=None, noise=0.3,
+            initial_temperature=2.0, final_temperature=0.05, tabu_tenure=10):
+        """
+        Runs one search from a random (or the given) coloring until no pattern copy is monochromatic or max_flips
+        edges were flipped.
+        :param method: "walksat" - flips an edge of a random monochromatic copy, the one creating the fewest new
+        monochromatic copies (or a random one with the probability noise), "annealing" - simulated annealing over the
+        edges of the monochromatic copies with the temperature decreasing geometrically from initial_temperature to
+        final_temperature, or "tabu" - flips the best edge of the monochromatic copies which wasn't flipped in the
+        last tabu_tenure steps (unless the flip improves the best cost)
+        :param initial_values: If specified, the list of the starting edge values (True meaning blue)
+        :return: A pair (the lowest cost reached, the edge values reaching it)
+        """
+        if method not in LOCAL_SEARCH_METHODS:
+            raise ValueError("Unknown local search method " + str(method) + ".")
+        rng = random.Random(seed)
+        values = list(initial_values) if initial_values is not None else [rng.random() < 0.5 for _ in self.edges]
+        state = _SearchState(self, values)
+        best_cost, best_values = len(state.violated), list(values)
+        tabu_until = [0] * len(self.edges)
+        for step in range(max_flips):
+            if not state.violated:
+                break
+            clause = self.clauses[rng.choice(state.violated)]
+            if method == "walksat":
+                break_counts = [state.get_break_count(variable) for variable in clause]
+                if min(break_counts) > 0 and rng.random() < noise:
+                    variable = rng.choice(clause)
+                else:
+                    variable = clause[break_counts.index(min(break_counts))]
+            elif method == "annealing":
+                variable = rng.choice(clause)
+                delta = state.get_delta(variable)
+                temperature = initial_temperature * (final_temperature / initial_temperature) ** (step / max_flips)
+                if delta > 0 and rng.random() >= math.exp(-delta / temperature):
+                    continue
+            else:
+                candidates = {variable for index in rng.sample(state.violated, min(len(state.violated), 16))
+                              for variable in self.clauses[index]}
+                variable, best_delta = None, None
+                for candidate in candidates:
+                    delta = state.get_delta(candidate)
+                    if tabu_until[candidate] > step and len(state.violated) + delta >= best_cost:
+                        continue
+                    if best_delta is None or delta < best_delta:
+                        variable, best_delta = candidate, delta
+                if variable is None:
+                    variable = rng.choice(clause)
+                tabu_until[variable] = step + tabu_tenure
+            state.flip(variable)
+            if len(state.violated) < best_cost:
+                best_cost, best_values = len(state.violated), list(values)
+        return best_cost, best_values
+
+
+def _initialize_worker(n, red_graph, blue_graph):
+    global _worker_search
+    _worker_search = LocalSearch(n, red_graph, blue_graph)
+
+
+def _run_restart(task):
+    """
+    Runs one restart of the local search. Intended to be run in the process pool.
+    :param task: A tuple (method, seed, max_flips, initial values or None, dict of the method parameters)
+    :return: A pair (cost, edge values)
+    """
+    method, seed, max_flips, initial_values, parameters = task
+    return _worker_search.run(method, max_flips, seed, initial_values, **parameters)
+
+
+def find_avoiding_coloring_by_local_search(n, red_graph, blue_graph=None, method="walksat", restarts=8,
+                                           max_flips=100000, seed=0, initial_coloring=None, processes=None,
+                                           **parameters):
+    """
+    Searches for an avoiding coloring of K_n by independent restarts of the local search on a pool of processes. The
+    search is incomplete - not finding a coloring doesn't prove that none exists - but it reaches much larger n than
+    solving the whole formula, e.g. for lower bound witnesses.
+    :param red_graph, blue_graph: ColoredGraph structures of the patterns (the diagonal case if blue_graph is None)
+    :param method, max_flips, parameters: See LocalSearch.run
+    :param restarts: The number of independent searches, the seeds are seed, seed + 1, ...
+    :param initial_coloring: If specified, a (partial) ColoredGraph coloring of K_n every restart starts from, e.g. a
+    structured coloring, its uncolored edges are random
+    :param processes: The number of processes, defaults to the number of CPUs
+    :return: An avoiding ColoredGraph coloring verified against both patterns, or None if no restart found one
+    """
+    if blue_graph is None:
+        blue_graph = red_graph
+    search = LocalSearch(n, red_graph, blue_graph)
+
+    def tasks():
+        for restart in range(restarts):
+            initial_values = None
+            if initial_coloring is not None:
+                initial_values = search.coloring_to_values(initial_coloring, random.Random(seed + restart))
+            yield method, seed + restart, max_flips, initial_values, parameters
+
+    pool = multiprocessing.Pool(processes, initializer=_initialize_worker, initargs=(n, red_graph, blue_graph))
+    try:
+        for cost, values in pool.imap_unordered(_run_restart, tasks()):
+            if cost == 0:
+                coloring = search.values_to_coloring(values)
+                if not verify_coloring(coloring, red_graph, blue_graph):
+                    raise RuntimeError("The local search returned a coloring with a monochromatic pattern.")
+                return coloring
+        return None
+    finally:
+        pool.terminate()
+        pool.join()
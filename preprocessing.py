@@ -0,0 +1,399 @@
+from collections import defaultdict
+from functools import lru_cache
+from itertools import product
+
+
+class ReductionReport:
+    """
+    Describes how much a formula shrank by simplify_clauses.
+    """
+
+    def __init__(self, clauses_before, duplicates, subsumed, clauses_after):
+        self.clauses_before = clauses_before
+        self.duplicates = duplicates
+        self.subsumed = subsumed
+        self.clauses_after = clauses_after
+
+    def as_dict(self):
+        return {'clauses_before': self.clauses_before, 'duplicates': self.duplicates, 'subsumed': self.subsumed,
+                'clauses_after': self.clauses_after}
+
+    def __str__(self):
+        removed = self.clauses_before - self.clauses_after
+        return "%d -> %d clauses (%d duplicate, %d subsumed, %.1f %% removed)" % (
+            self.clauses_before, self.clauses_after, self.duplicates, self.subsumed,
+            100 * removed / self.clauses_before if self.clauses_before else 0)
+
+
+def deduplicate_clauses(clauses):
+    """
+    Removes repeated clauses (and repeated literals inside clauses). Patterns with isolated vertices or several
+    components generate the same clause for many vertex subsets.
+    :param clauses: A list of clauses, every clause being a list of integer literals
+    :return: A list of the distinct clauses as sorted tuples, in the order of their first occurrence
+    """
+    seen = set()
+    unique_clauses = []
+    for clause in clauses:
+        key = tuple(sorted(set(clause)))
+        if key not in seen:
+            seen.add(key)
+            unique_clauses.append(key)
+    return unique_clauses
+
+
+def remove_subsumed_clauses(clauses):
+    """
+    Removes the clauses which are supersets of other clauses, as they are satisfied whenever the smaller ones are. A
+    subsumed clause is kept if it's the last occurrence of one of its variables, so the formula keeps its variables
+    and its models (i.e. the enumerated colorings) stay the same.
+    :param clauses: A list of distinct clauses as sorted tuples, e.g. from deduplicate_clauses
+    :return: The list of the remaining clauses, in the original order
+    """
+    occurrences = defaultdict(list)
+    variable_occurrences = defaultdict(int)
+    for index, clause in enumerate(clauses):
+        for literal in clause:
+            occurrences[literal].append(index)
+            variable_occurrences[abs(literal)] += 1
+    removed = [False] * len(clauses)
+    for index in sorted(range(len(clauses)), key=lambda i: len(clauses[i])):
+        if removed[index]:
+            continue
+        clause = clauses[index]
+        literals = set(clause)
+        # Every superset of the clause contains its least frequent literal
+        rarest_literal = min(clause, key=lambda literal: len(occurrences[literal]))
+        for other_index in occurrences[rarest_literal]:
+            other_clause = clauses[other_index]
+            if other_index == index or removed[other_index] or len(other_clause) <= len(clause) or \
+                    not literals.issubset(other_clause):
+                continue
+            if any(variable_occurrences[abs(literal)] == 1 for literal in other_clause):
+                continue
+            removed[other_index] = True
+            for literal in other_clause:
+                variable_occurrences[abs(literal)] -= 1
+    return [clause for clause, is_removed in zip(clauses, removed) if not is_removed]
+
+
+def simplify_clauses(clauses):
+    """
+    Removes the duplicate and the subsumed clauses of a formula, its models stay the same.
+    :param clauses: A list of clauses, every clause being a list of integer literals
+    :return: A pair (list of the remaining clauses as lists of literals, ReductionReport)
+    """
+    unique_clauses = deduplicate_clauses(clauses)
+    remaining_clauses = remove_subsumed_clauses(unique_clauses)
+    report = ReductionReport(len(clauses), len(clauses) - len(unique_clauses),
+                             len(unique_clauses) - len(remaining_clauses), len(remaining_clauses))
+    return [list(clause) for clause in remaining_clauses], report
+
+
+# The preprocessing modes - PRESERVE_MODELS keeps a one-to-one correspondence of the models (unit propagation and
+# equivalent literal substitution), so all the colorings can still be enumerated. PRESERVE_SATISFIABILITY also
+# eliminates pure literals and variables, which keeps only the (un)satisfiability and loses some of the models.
+PRESERVE_MODELS = "models"
+PRESERVE_SATISFIABILITY = "satisfiability"
+
+# The number of preprocessed formulas kept by preprocess_clauses
+PREPROCESSING_CACHE_SIZE = 8
+# Bounded variable elimination only considers variables with at most this many pairs of resolved clauses
+MAX_ELIMINATION_PAIRS = 64
+
+
+class PreprocessingReport:
+    """
+    Describes what preprocess_clauses did to a formula.
+    """
+
+    def __init__(self, clauses_before, clauses_after, fixed, equivalent, pure, eliminated, free, unsatisfiable):
+        self.clauses_before = clauses_before
+        self.clauses_after = clauses_after
+        self.fixed = fixed
+        self.equivalent = equivalent
+        self.pure = pure
+        self.eliminated = eliminated
+        self.free = free
+        self.unsatisfiable = unsatisfiable
+
+    def as_dict(self):
+        return {'clauses_before': self.clauses_before, 'clauses_after': self.clauses_after, 'fixed': self.fixed,
+                'equivalent': self.equivalent, 'pure': self.pure, 'eliminated': self.eliminated, 'free': self.free,
+                'unsatisfiable': self.unsatisfiable}
+
+    def __str__(self):
+        if self.unsatisfiable:
+            return "%d clauses, unsatisfiable" % self.clauses_before
+        return "%d -> %d clauses (%d fixed, %d equivalent, %d pure, %d eliminated, %d free variables)" % (
+            self.clauses_before, self.clauses_after, self.fixed, self.equivalent, self.pure, self.eliminated,
+            self.free)
+
+
+class PreprocessedFormula:
+    """
+    The result of preprocess_clauses - the simplified clauses for the solver and the log of the simplifications,
+    which maps the models of the simplified formula back to models of the original one.
+    """
+
+    def __init__(self, clauses, variables, operations, free_variables, mode, report):
+        """
+        :param clauses: The simplified clauses as lists of literals. An unsatisfiable formula becomes [[x], [-x]] and
+        an empty one [[x]] for an auxiliary variable x, so there's always something to be passed to a solver. A
+        single clause is followed by the tautology [x, -x] - satispy parses a lone clause as a plain expression, not as
+        a Cnf, but it drops the tautology itself
+        :param variables: The variables of the original formula
+        :param operations: The simplifications in the order they were done, tuples ('fix', variable, value),
+        ('pure', variable, value), ('equivalent', variable, representative, parity) or ('eliminate', variable, clauses)
+        :param free_variables: The variables which don't occur in the simplified formula anymore, but can have any value
+        """
+        self.clauses = clauses
+        self.variables = variables
+        self.operations = operations
+        self.free_variables = free_variables
+        self.mode = mode
+        self.report = report
+
+    def expand_model(self, mapping):
+        """
+        Maps a model of the simplified formula back to the original variables. In the PRESERVE_MODELS mode every
+        combination of values of the free variables gives a different model, all of them are generated, otherwise
+        only one model is.
+        :param mapping: A dict of int:bool, a model of self.clauses
+        :return: A generator of models (dicts of int:bool) of the original formula
+        """
+        if self.mode == PRESERVE_MODELS:
+            free_values = product((False, True), repeat=len(self.free_variables))
+        else:
+            free_values = [(False,) * len(self.free_variables)]
+        for values in free_values:
+            model = dict(mapping)
+            model.update(zip(self.free_variables, values))
+            for operation in reversed(self.operations):
+                kind, variable = operation[0], operation[1]
+                if kind == 'fix' or kind == 'pure':
+                    model[variable] = operation[2]
+                elif kind == 'equivalent':
+                    model[variable] = model[operation[2]] != operation[3]
+                else:
+                    # An eliminated variable is true iff some of its positive clauses isn't satisfied otherwise
+                    model[variable] = any(variable in clause and
+                                          not any(model.get(abs(literal), False) == (literal > 0)
+                                                  for literal in clause if literal != variable)
+                                          for clause in operation[2])
+            yield {variable: model[variable] for variable in self.variables}
+
+
+class _Simplifier:
+    """
+    Runs the simplifications of preprocess_clauses until none of them changes the formula.
+    """
+
+    def __init__(self, clauses, mode):
+        self.mode = mode
+        # Tautologies are dropped right away (satispy would drop them anyway), their variables may become free
+        self.clauses = {frozenset(clause) for clause in clauses if not any(-literal in clause for literal in clause)}
+        self.clauses_before = len(clauses)
+        self.variables = sorted({abs(literal) for clause in clauses for literal in clause})
+        self.operations = []
+        self.unsatisfiable = False
+
+    def run(self):
+        changed = True
+        while changed and not self.unsatisfiable:
+            changed = self._propagate_units()
+            if not self.unsatisfiable:
+                changed = self._substitute_equivalent_literals() or changed
+            if self.mode == PRESERVE_SATISFIABILITY and not self.unsatisfiable:
+                changed = self._eliminate_pure_literals() or changed
+                changed = self._eliminate_variables() or changed
+
+        auxiliary_variable = max(self.variables, default=0) + 1
+        if self.unsatisfiable:
+            clauses = [[auxiliary_variable], [-auxiliary_variable]]
+        elif not self.clauses:
+            clauses = [[auxiliary_variable]]
+        else:
+            clauses = sorted(sorted(clause) for clause in self.clauses)
+        if len(clauses) == 1:
+            clauses.append([auxiliary_variable, -auxiliary_variable])
+        remaining_variables = {abs(literal) for clause in self.clauses for literal in clause}
+        removed_variables = {operation[1] for operation in self.operations}
+        free_variables = [variable for variable in self.variables
+                          if variable not in remaining_variables and variable not in removed_variables]
+        counts = defaultdict(int)
+        for operation in self.operations:
+            counts[operation[0]] += 1
+        report = PreprocessingReport(self.clauses_before, 0 if self.unsatisfiable else len(self.clauses),
+                                     counts['fix'], counts['equivalent'], counts['pure'], counts['eliminate'],
+                                     len(free_variables), self.unsatisfiable)
+        return PreprocessedFormula(clauses, self.variables, self.operations, free_variables, self.mode, report)
+
+    def _assign(self, true_literals):
+        """
+        Removes the clauses satisfied by the literals and the falsified literals from the other clauses.
+        """
+        false_literals = {-literal for literal in true_literals}
+        reduced_clauses = set()
+        for clause in self.clauses:
+            if not clause.isdisjoint(true_literals):
+                continue
+            reduced_clause = clause - false_literals
+            if not reduced_clause:
+                self.unsatisfiable = True
+                return
+            reduced_clauses.add(reduced_clause)
+        self.clauses = reduced_clauses
+
+    def _propagate_units(self):
+        changed = False
+        while not self.unsatisfiable:
+            units = {next(iter(clause)) for clause in self.clauses if len(clause) == 1}
+            if not units:
+                break
+            if any(-literal in units for literal in units):
+                self.unsatisfiable = True
+                break
+            for literal in units:
+                self.operations.append(('fix', abs(literal), literal > 0))
+            self._assign(units)
+            changed = True
+        return changed
+
+    def _substitute_equivalent_literals(self):
+        """
+        Finds the pairs of binary clauses (a | b), (-a | -b) - i.e. a = -b, e.g. tied edge colors - and
+        replaces every variable by a representative of its class of equivalent variables.
+        """
+        # A union-find of the variables, parent[v] = (parent variable, parity), v = parent XOR parity
+        parent = {}
+
+        def find(variable):
+            parity = False
+            path = []
+            while variable in parent:
+                path.append((variable, parity))
+                variable, step_parity = parent[variable]
+                parity ^= step_parity
+            root, root_parity = variable, parity
+            for path_variable, path_parity in path:
+                parent[path_variable] = (root, root_parity ^ path_parity)
+            return root, root_parity
+
+        binary_clauses = {clause for clause in self.clauses if len(clause) == 2}
+        for clause in binary_clauses:
+            a, b = clause
+            if frozenset((-a, -b)) not in binary_clauses:
+                continue
+            # a = -b, i.e. value(|a|) = value(|b|) XOR parity
+            parity = not ((a < 0) ^ (b < 0))
+            root_a, parity_a = find(abs(a))
+            root_b, parity_b = find(abs(b))
+            if root_a == root_b:
+                if parity_a ^ parity_b != parity:
+                    self.unsatisfiable = True
+                    return True
+                continue
+            # The smaller variable becomes the representative
+            if root_a < root_b:
+                parent[root_b] = (root_a, parity ^ parity_a ^ parity_b)
+            else:
+                parent[root_a] = (root_b, parity ^ parity_a ^ parity_b)
+        if not parent:
+            return False
+
+        substitution = {}
+        for variable in sorted(parent):
+            root, parity = find(variable)
+            substitution[variable] = (root, parity)
+            self.operations.append(('equivalent', variable, root, parity))
+
+        def substitute(literal):
+            if abs(literal) not in substitution:
+                return literal
+            root, parity = substitution[abs(literal)]
+            return -root if parity ^ (literal < 0) else root
+
+        substituted_clauses = set()
+        for clause in self.clauses:
+            substituted_clause = frozenset(substitute(literal) for literal in clause)
+            if not any(-literal in substituted_clause for literal in substituted_clause):
+                substituted_clauses.add(substituted_clause)
+        self.clauses = substituted_clauses
+        return True
+
+    def _eliminate_pure_literals(self):
+        literals = {literal for clause in self.clauses for literal in clause}
+        pure_literals = {literal for literal in literals if -literal not in literals}
+        if not pure_literals:
+            return False
+        for literal in pure_literals:
+            self.operations.append(('pure', abs(literal), literal > 0))
+        self.clauses = {clause for clause in self.clauses if clause.isdisjoint(pure_literals)}
+        return True
+
+    def _eliminate_variables(self):
+        """
+        Bounded variable elimination - replaces the clauses of a variable by all their non-tautological resolvents on
+        it, if there are not more of them than the replaced clauses.
+        """
+        occurrences = defaultdict(list)
+        for clause in self.clauses:
+            for literal in clause:
+                occurrences[literal].append(clause)
+        candidates = sorted({abs(literal) for literal in occurrences},
+                            key=lambda variable: len(occurrences[variable]) * len(occurrences[-variable]))
+        # Variables sharing a clause with an eliminated one wait for the next round, their occurrences changed
+        touched = set()
+        changed = False
+        for variable in candidates:
+            positive, negative = occurrences[variable], occurrences[-variable]
+            if len(positive) * len(negative) > MAX_ELIMINATION_PAIRS:
+                break
+            if variable in touched:
+                continue
+            resolvents = set()
+            for positive_clause in positive:
+                for negative_clause in negative:
+                    resolvent = (positive_clause - {variable}) | (negative_clause - {-variable})
+                    if not any(-literal in resolvent for literal in resolvent):
+                        resolvents.add(frozenset(resolvent))
+            if len(resolvents) > len(positive) + len(negative):
+                continue
+            if frozenset() in resolvents:
+                self.unsatisfiable = True
+                return True
+            removed_clauses = positive + negative
+            self.operations.append(('eliminate', variable, tuple(removed_clauses)))
+            self.clauses.difference_update(removed_clauses)
+            self.clauses.update(resolvents)
+            touched.update(abs(literal) for clause in removed_clauses for literal in clause)
+            changed = True
+        return changed
+
+
+def preprocess_clauses(clauses, mode=PRESERVE_MODELS):
+    """
+    Simplifies a formula before it's passed to a solver. Unit clauses are propagated and equivalent literals (pairs
+    of clauses (a | b), (-a | -b)) are substituted by one representative. In the PRESERVE_SATISFIABILITY mode pure
+    literals and variables (by bounded variable elimination) are eliminated as well.
+    The results are cached, so solvers created repeatedly for the same formula reuse the simplified one.
+    :param clauses: A list of clauses, every clause being a list of integer literals
+    :param mode: PRESERVE_MODELS or PRESERVE_SATISFIABILITY
+    :return: A PreprocessedFormula, see its expand_model for mapping the models back
+    """
+    if mode not in (PRESERVE_MODELS, PRESERVE_SATISFIABILITY):
+        raise ValueError("Unknown preprocessing mode " + str(mode) + ".")
+    return _preprocess_cached(tuple(tuple(clause) for clause in clauses), mode)
+
+
+@lru_cache(maxsize=PREPROCESSING_CACHE_SIZE)
+def _preprocess_cached(clauses, mode):
+    return _Simplifier(clauses, mode).run()
+
+
+def clear_preprocessing_cache():
+    """
+    Forgets the cached results of preprocess_clauses, e.g. so that repeated benchmark runs measure the preprocessing.
+    """
+    _preprocess_cached.cache_clear()
@@ -1,6 +1,59 @@
+from collections import defaultdict
+from itertools import product
+
 from colored_graph import ColoredGraph
-from sat_solver import MinisatSatFormulaSolver, GlucoseSatFormulaSolver
-from sat_generator import generate_general_ordered_ramsey_sat, decode_edge
+from preprocessing import simplify_clauses, preprocess_clauses, PRESERVE_MODELS
+from sat_solver import SAT_SOLVERS, SolverStatus
+from solver_stats import SolverStats
+from sat_generator import generate_general_ordered_ramsey_clauses, clause_list_to_sat_string, decode_edge, \
+    encode_edge, get_symmetry_edge_representatives
+
+
+def mapping_to_colored_graph(variable_mapping, n, edge_representatives=None):
+    """
+    Converts a mapping of SAT variables to their values to the corresponding coloring of K_n.
+    :param variable_mapping: A dict of int:bool, True meaning a blue edge
+    :param edge_representatives: If the formula was written over edge orbits (e.g. with enforce_symmetry), a dict
+    mapping every edge encoding to its orbit representative - every edge then gets the color of its representative
+    :return: The ColoredGraph coloring
+    """
+    if edge_representatives is not None:
+        variable_mapping = {variable: variable_mapping[representative]
+                            for variable, representative in edge_representatives.items()
+                            if representative in variable_mapping}
+    colored_graph = ColoredGraph(n, [], {})
+    for key, value in variable_mapping.items():
+        i, j = decode_edge(key, n)
+        colored_graph.add_edge((i, j), color="r" if not value else "b")
+    return colored_graph
+
+
+def shrink_satisfying_assignment(clauses, variable_mapping):
+    """
+    Greedily shrinks a satisfying assignment to a minimal partial assignment which still satisfies every clause, no
+    matter how the dropped variables are set. Literals satisfying the fewest clauses are tried to be dropped first.
+    :param clauses: A list of clauses (lists of integer literals) satisfied by variable_mapping
+    :param variable_mapping: A dict of int:bool
+    :return: The set of kept (true) literals
+    """
+    true_literals = {variable if value else -variable for variable, value in variable_mapping.items()}
+    # For every clause the number of kept literals satisfying it, for every literal the clauses it satisfies
+    support = []
+    satisfied_clauses = defaultdict(list)
+    for index, clause in enumerate(clauses):
+        count = 0
+        for literal in clause:
+            if literal in true_literals:
+                count += 1
+                satisfied_clauses[literal].append(index)
+        support.append(count)
+    kept_literals = set(true_literals)
+    for literal in sorted(true_literals, key=lambda l: len(satisfied_clauses[l])):
+        if all(support[index] > 1 for index in satisfied_clauses[literal]):
+            for index in satisfied_clauses[literal]:
+                support[index] -= 1
+            kept_literals.remove(literal)
+    return kept_literals
 
 
 class RamseySolver:
@@ -10,38 +63,263 @@ class RamseySolver:
     """
 
     def __init__(self, n, red_graph, blue_graph=None, solver="minisat", enforce_symmetry=False,
-                 special_conditions=None):
+                 special_conditions=None, timeout=None, memory_limit=None, minimize_blocking_clauses=False,
+                 projection=None, stats=None, stall_timeout=None, simplify=True,
+                 preprocessing=PRESERVE_MODELS, symmetry_group=None):
         """
 
         :param n: The number of vertices for the avoiding graph
         :param red_graph: A ColoredGraph data structure
         :param blue_graph: A ColoredGraph data structure (if not specified, does the Ramsey diagonal case for red graph)
-        :param solver: An underlying SAT solver - currently supported is Minisat #TODO glucose
+        :param solver: An underlying SAT solver - one of the keys of SAT_SOLVERS, i.e. "minisat" or "glucose"
         :param enforce_symmetry: If specified, the avoiding graph coloring will have to be symmetric.
-        Note that this may decrease the Ramsey number
+        Note that this may decrease the Ramsey number. The formula then has one variable per orbit of the reversal,
+        self.edge_representatives maps every edge encoding to the variable of its orbit
+        :param symmetry_group: If specified, only the colorings invariant under the edge symmetries are searched for -
+        a list of generators, each being a name of NAMED_EDGE_SYMMETRIES ('reversal', 'distance', 'sum', 'circulant'),
+        a vertex permutation or a dict mapping edges to edges (see get_edge_orbit_representatives). Like with
+        enforce_symmetry, the formula has one variable per edge orbit, so much larger n can be probed for structured
+        lower bound colorings
         :param special_conditions: A list of the form ((v1,v2),color) where (v1,v2) specifies an edge whose color is
         forced to be either 'r' or 'b'. Note that this may decrease the Ramsey number
+        :param timeout: If specified, the wall-clock limit in seconds for every single solver call
+        :param memory_limit: If specified, the memory limit in megabytes for the solver process
+        :param minimize_blocking_clauses: If True, find_next_avoiding_drawing enumerates the colorings through
+        find_next_avoiding_cube, so that one solver call covers many colorings
+        :param projection: If specified, a list of edges (v1,v2) - find_next_avoiding_drawing then returns colorings
+        with distinct restrictions to these edges only, e.g. to find out which colorings of the edges among the first
+        m vertices extend to an avoiding coloring. Can't be combined with minimize_blocking_clauses
+        :param stats: If specified, the SolverStats the measurements are added to (e.g. one shared by the solvers of
+        a batch run), a new one is created otherwise. Either way, it's available as self.stats - its hooks also receive
+        the live progress of the running solver
+        :param stall_timeout: If specified, a solver call which doesn't report any progress for this many seconds is
+        killed, the search then ends with the STALLED status
+        :param simplify: If True, the duplicate and subsumed clauses are removed from the formula (see
+        simplify_clauses, the colorings stay the same). The achieved reduction is kept in self.reduction_report
+        :param preprocessing: The preprocess_clauses mode of the formula passed to the solver of
+        find_next_avoiding_drawing, or None for no preprocessing. PRESERVE_MODELS (the default) still enumerates all
+        the colorings, PRESERVE_SATISFIABILITY may skip some of them. Not used with projection or
+        minimize_blocking_clauses, which block the colorings on the original edges. The report is kept in
+        self.preprocessing_report
         """
+        if projection is not None and minimize_blocking_clauses:
+            raise ValueError("Projected enumeration can't be combined with minimized blocking clauses.")
         self.n = n
         self.red_graph = red_graph
         self.blue_graph = red_graph if blue_graph == None else blue_graph
-        sat_string = generate_general_ordered_ramsey_sat(n, red_graph, blue_graph, enforce_symmetry, special_conditions)
-        if solver == "minisat":
-            self.solver = MinisatSatFormulaSolver(sat_string)
-        if solver == "glucose":
-            self.solver = GlucoseSatFormulaSolver(sat_string)
+        self.minimize_blocking_clauses = minimize_blocking_clauses
+        self.edge_representatives = get_symmetry_edge_representatives(n, enforce_symmetry, symmetry_group)
+        self.projection = None
+        if projection is not None:
+            self.projection = set()
+            for v1, v2 in projection:
+                if not (0 < v1 <= n and 0 < v2 <= n) or v1 == v2:
+                    raise ValueError("The projection edge " + str((v1, v2)) + " is not an edge of K_" + str(n) + ".")
+                edge = encode_edge(v1, v2, n)
+                self.projection.add(edge if self.edge_representatives is None else self.edge_representatives[edge])
+        if solver not in SAT_SOLVERS:
+            raise ValueError("Unknown SAT solver " + str(solver) + ".")
+        self.stats = stats if stats is not None else SolverStats()
+        with self.stats.measure("generate"):
+            self.clauses = generate_general_ordered_ramsey_clauses(n, red_graph, blue_graph, enforce_symmetry,
+                                                                   special_conditions, symmetry_group)
+            self.reduction_report = None
+            if simplify:
+                self.clauses, self.reduction_report = simplify_clauses(self.clauses)
+        self.preprocessed_formula = None
+        self.preprocessing_report = None
+        solver_clauses = self.clauses
+        if preprocessing is not None and projection is None and not minimize_blocking_clauses:
+            with self.stats.measure("preprocess"):
+                self.preprocessed_formula = preprocess_clauses(self.clauses, preprocessing)
+            self.preprocessing_report = self.preprocessed_formula.report
+            solver_clauses = self.preprocessed_formula.clauses
+        with self.stats.measure("generate"):
+            sat_string = clause_list_to_sat_string(solver_clauses)
+        self.solver_name = solver
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.stall_timeout = stall_timeout
+        self.solver = SAT_SOLVERS[solver](sat_string, timeout, memory_limit, self.stats, stall_timeout)
+        # A solver for one-shot questions (e.g. the backbone tests), kept so that it can be cancelled as well
+        self._auxiliary_solver = None
+        self._auxiliary_cancelled = False
+        # The SolverStatus of the last find_backbone call
+        self.backbone_status = None
+        # Clauses blocking the already found cubes and the colorings of the last cube which weren't returned yet
+        self._blocking_clauses = []
+        self._pending_colorings = iter(())
+
+    @property
+    def status(self):
+        """
+        The SolverStatus of the last search, e.g. to tell a non-existing coloring (UNSAT) from a timeout.
+        """
+        return self.solver.status
+
+    def cancel(self):
+        """
+        Interrupts the running search from another thread, find_next_avoiding_drawing then returns None with the
+        CANCELLED status.
+        """
+        self.solver.cancel()
+        # Also stops find_backbone between two of its solver calls
+        self._auxiliary_cancelled = True
+        auxiliary_solver = self._auxiliary_solver
+        if auxiliary_solver is not None:
+            auxiliary_solver.cancel()
+
+    def reset_cancel(self):
+        """
+        Forgets a cancel() which didn't interrupt any solver call (e.g. it came while pending colorings were returned),
+        so that the next find_next_avoiding_drawing searches instead of returning CANCELLED at once.
+        """
+        self.solver.reset_cancel()
+        self._auxiliary_cancelled = False
 
     def find_next_avoiding_drawing(self):
         """
-        :return: Returns the next ColoredGraph avoiding coloring, or None if it doesn't exist
+        :return: Returns the next ColoredGraph avoiding coloring, or None if it doesn't exist (or if the search was
+        not finished, see status)
         """
+        if self.minimize_blocking_clauses:
+            for avoiding_graph in self._pending_colorings:
+                return avoiding_graph
+            cube = self.find_next_avoiding_cube()
+            if cube is None:
+                return None
+            self._pending_colorings = self.expand_cube(*cube)
+            return next(self._pending_colorings)
+        if self.projection is not None:
+            return self._find_next_projected_drawing()
+        if self.preprocessed_formula is not None:
+            for avoiding_graph in self._pending_colorings:
+                return avoiding_graph
         variable_mapping = self.solver.find_next_solution()
         if variable_mapping is None:
             return None
-        avoiding_graph = ColoredGraph(self.n, [], {})
-        for key, value in variable_mapping.items():
-            i, j = decode_edge(key, self.n)
-            avoiding_graph.add_edge((i, j), color="r" if not value else "b")
-        return avoiding_graph
+        with self.stats.measure("decode"):
+            if self.preprocessed_formula is None:
+                return mapping_to_colored_graph(variable_mapping, self.n, self.edge_representatives)
+            # Every model of the preprocessed formula stands for one or more (with free edges) colorings
+            self._pending_colorings = (mapping_to_colored_graph(mapping, self.n, self.edge_representatives)
+                                       for mapping in self.preprocessed_formula.expand_model(variable_mapping))
+            return next(self._pending_colorings)
+
+    def _find_next_projected_drawing(self):
+        """
+        Finds an avoiding coloring whose restriction to the projection edges wasn't seen yet and blocks only this
+        restriction.
+        :return: The whole avoiding coloring (i.e. a witness that its projection extends), or None
+        """
+        variable_mapping = self.solver.find_next_solution(forbid_solution=False)
+        if variable_mapping is None:
+            return None
+        # Projection edges which don't occur in the formula can be colored arbitrarily, they are not blocked on
+        blocking_clause = [-variable if value else variable for variable, value in variable_mapping.items()
+                           if variable in self.projection]
+        if blocking_clause:
+            self.solver.add_clause(blocking_clause)
+        else:
+            # The formula doesn't constrain any projection edge, so there is exactly one projection to report
+            self.solver.stopped_searching = True
+        return mapping_to_colored_graph(variable_mapping, self.n, self.edge_representatives)
+
+    def find_backbone(self):
+        """
+        Finds the backbone - the edges which have the same color in every avoiding coloring - without enumerating
+        all the colorings. Starting from one model, every candidate edge is tested by a solver call with its color
+        flipped by a unit clause: UNSAT means the edge is forced, a new model rules out all the candidates whose color
+        differs in it. The enumeration state is not affected.
+        The outcome is kept in self.backbone_status - SAT if the backbone was found, UNSAT if there is no avoiding
+        coloring, or the status of the first solver call which didn't finish (e.g. TIMEOUT or CANCELLED), which stops
+        the search, as an incomplete backbone can't be told from a complete one.
+        :return: A ColoredGraph holding only the forced edges (get_matrix_visualization shows them as a matrix,
+        get_colored_edge_list gives them as special conditions), or None if no avoiding coloring was found or the
+        search didn't finish (see backbone_status)
+        """
+        self._auxiliary_cancelled = False
+        try:
+            variable_mapping = self._solve_once([])
+            self.backbone_status = self._auxiliary_solver.status
+            if variable_mapping is None:
+                return None
+            candidates = dict(variable_mapping)
+            backbone = {}
+            while candidates:
+                variable, value = candidates.popitem()
+                flipped_literal = variable if not value else -variable
+                variable_mapping = self._solve_once([[flipped_literal]])
+                if variable_mapping is None:
+                    if self._auxiliary_solver.status != SolverStatus.UNSAT:
+                        self.backbone_status = self._auxiliary_solver.status
+                        return None
+                    backbone[variable] = value
+                    continue
+                for other_variable, other_value in variable_mapping.items():
+                    if other_variable in candidates and candidates[other_variable] != other_value:
+                        del candidates[other_variable]
+            return mapping_to_colored_graph(backbone, self.n, self.edge_representatives)
+        finally:
+            self._auxiliary_solver = None
+
+    def _solve_once(self, extra_clauses):
+        """
+        Solves the original formula (without any blocking clauses) extended by extra_clauses by a fresh solver, which
+        is kept as self._auxiliary_solver.
+        :return: The found variable mapping or None
+        """
+        self._auxiliary_solver = SAT_SOLVERS[self.solver_name](clause_list_to_sat_string(self.clauses + extra_clauses),
+                                                               self.timeout, self.memory_limit, self.stats,
+                                                               self.stall_timeout)
+        if self._auxiliary_cancelled:
+            # Cancelled before this solver existed, so the call only reports the cancellation
+            self._auxiliary_solver.cancel()
+        return self._auxiliary_solver.find_next_solution(forbid_solution=False)
+
+    def find_next_avoiding_cube(self):
+        """
+        Finds the next avoiding cube - a partial coloring such that every way of coloring the remaining "don't care"
+        edges gives an avoiding coloring. The found model is shrunk by shrink_satisfying_assignment and only the kept
+        part is blocked, so one blocking clause covers many colorings. The blocking clauses of the previous cubes are
+        taken into account while shrinking, so no coloring belongs to two different cubes.
+        :return: A pair (partial ColoredGraph coloring, list of don't care edges), or None if there is no new cube
+        """
+        variable_mapping = self.solver.find_next_solution(forbid_solution=False)
+        if variable_mapping is None:
+            return None
+        kept_literals = shrink_satisfying_assignment(self.clauses + self._blocking_clauses, variable_mapping)
+        blocking_clause = [-literal for literal in kept_literals]
+        self._blocking_clauses.append(blocking_clause)
+        self.solver.add_clause(blocking_clause)
+        partial_coloring = mapping_to_colored_graph({abs(literal): literal > 0 for literal in kept_literals}, self.n,
+                                                    self.edge_representatives)
+        dont_care_edges = [decode_edge(variable, self.n) for variable in variable_mapping
+                           if variable not in kept_literals and -variable not in kept_literals]
+        return partial_coloring, dont_care_edges
+
+    def expand_cube(self, partial_coloring, dont_care_edges):
+        """
+        Generates all the colorings belonging to a cube returned by find_next_avoiding_cube. With edge orbits, a don't
+        care edge stands for its whole orbit.
+        """
+        orbits = [self._get_orbit_edges(edge) for edge in dont_care_edges]
+        for colors in product('rb', repeat=len(dont_care_edges)):
+            avoiding_graph = ColoredGraph(self.n, list(partial_coloring.get_edge_list()),
+                                          dict(partial_coloring.edge_coloring))
+            for orbit, color in zip(orbits, colors):
+                for edge in orbit:
+                    avoiding_graph.add_edge(edge, color)
+            yield avoiding_graph
+
+    def _get_orbit_edges(self, edge):
+        """
+        :return: The list of the edges colored the same as the given one in every coloring of the formula
+        """
+        if self.edge_representatives is None:
+            return [edge]
+        representative = self.edge_representatives[encode_edge(edge[0], edge[1], self.n)]
+        return [decode_edge(variable, self.n) for variable, variable_representative in self.edge_representatives.items()
+                if variable_representative == representative]
 
 #export obarvení jako text
@@ -0,0 +1,42 @@
+"""
+Renders colorings stored in a solution archive (as written by 'Find all solutions') into PNG images, so that the
+expensive rendering only has to be done for the colorings one is actually interested in.
+
+Examples:
+    python render_colorings.py colorings.archive figures/
+    python render_colorings.py colorings.archive figures/ --range 100 200
+    python render_colorings.py colorings.archive figures/ --sample 50
+"""
+import argparse
+import random
+
+from coloring_renderer import render_archived_colorings
+from solution_archive import SolutionArchiveReader
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders colorings stored in a solution archive into PNG images.")
+    parser.add_argument("archive", help="the solution archive")
+    parser.add_argument("target_directory", help="the directory for the images")
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument("--range", nargs=2, type=int, metavar=("FIRST", "LAST"),
+                           help="render only the colorings FIRST..LAST (one based, inclusive)")
+    selection.add_argument("--sample", type=int, metavar="K", help="render K randomly chosen colorings")
+    parser.add_argument("--seed", type=int, help="the random seed for --sample")
+    parser.add_argument("--processes", type=int, help="the number of rendering processes")
+    args = parser.parse_args()
+
+    with SolutionArchiveReader(args.archive) as archive:
+        count = len(archive)
+    indices = None
+    if args.range is not None:
+        first, last = args.range
+        indices = range(max(first, 1), min(last, count) + 1)
+    elif args.sample is not None:
+        indices = sorted(random.Random(args.seed).sample(range(1, count + 1), min(args.sample, count)))
+    rendered = render_archived_colorings(args.archive, args.target_directory, indices, args.processes)
+    print("Rendered " + str(rendered) + " of " + str(count) + " colorings.")
+
+
+if __name__ == '__main__':
+    main()
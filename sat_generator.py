@@ -1,4 +1,5 @@
 import math
+from itertools import combinations
 
 
 def encode_edge(i, j, n):
@@ -67,17 +68,97 @@ def generate_general_ordered_sat_clause(mask, ordered_graph, original_graph_size
     return clause
 
 
-def generate_general_ordered_ramsey_sat(n, red_graph, blue_graph=None, enforce_symmetry=False, special_conditions=None):
+def split_pattern_core(ordered_graph):
     """
-    Creates a SAT string expressing the given ordered ramsey problem for this diagonal case and 2 colours.
+    Splits an ordered pattern into its core - the vertices incident to an edge - and the gaps the isolated vertices
+    require. The isolated vertices only force the images of the core vertices apart, so a copy of the pattern in K_n is
+    determined by the positions of the core vertices alone.
+    :param ordered_graph: Adjacency list specifying the graph
+    :return: A pair (sorted list of the core vertices, list of gaps), where gaps[0] is the number of isolated vertices
+    before the first core vertex, gaps[i] the number between the i-th and (i+1)-th one and gaps[-1] the number after
+    the last one
+    """
+    core = set()
+    for i, neighbours in enumerate(ordered_graph, start=1):
+        for neighbour in neighbours:
+            core.add(i)
+            core.add(neighbour)
+    core = sorted(core)
+    boundaries = [0] + core + [len(ordered_graph) + 1]
+    return core, [boundaries[i + 1] - boundaries[i] - 1 for i in range(len(boundaries) - 1)]
+
+
+def generate_core_placements(n, gaps):
+    """
+    Generates all the placements of a pattern core into K_n leaving enough room for the isolated vertices, i.e. the
+    increasing positions p_1 < ... < p_k' with p_1 > gaps[0], p_{i+1} - p_i > gaps[i] and p_k' <= n - gaps[-1].
+    These are the C(n - I, k') combinations of {1, ..., n - I} (I being the number of isolated vertices), each shifted
+    by the preceding gaps.
+    :return: A generator of tuples of the positions
+    """
+    isolated = sum(gaps)
+    offsets = []
+    offset = 0
+    for gap in gaps[:-1]:
+        offset += gap
+        offsets.append(offset)
+    for positions in combinations(range(1, n - isolated + 1), len(offsets)):
+        yield tuple(position + offset for position, offset in zip(positions, offsets))
+
+
+def _needs_vertex(positions, gaps, n, vertex):
+    """
+    :return: True if the core placement in K_n uses the vertex - it places a core vertex on it, or the isolated
+    vertices don't fit without it
+    """
+    if vertex in positions:
+        return True
+    bounds = [0] + list(positions) + [n + 1]
+    return any(bounds[i] < vertex < bounds[i + 1] and bounds[i + 1] - bounds[i] - 1 == gap
+               for i, gap in enumerate(gaps))
+
+
+def generate_pattern_clauses(n, ordered_graph, invert=False, vertex=None):
+    """
+    Generates one clause per copy of an ordered pattern in K_n, forbidding the copy to be monochromatic (red, or blue
+    if invert is set). Only the core of the pattern is placed (see split_pattern_core), so patterns with isolated
+    vertices need C(n - I, k') placements instead of C(n, k) vertex subsets, and no clause is generated twice.
+    :param ordered_graph: Adjacency list specifying the graph
+    :param vertex: If specified, only the copies which need this vertex are generated, i.e. the ones which don't exist
+    in K_n with the vertex removed
+    :return: A generator of clauses, every clause being a list of integer literals
+    """
+    for i, neighbours in enumerate(ordered_graph, start=1):
+        if i in neighbours:
+            raise RuntimeError("Faulty graph, self-loop")
+    core, gaps = split_pattern_core(ordered_graph)
+    core_index = {vertex: index for index, vertex in enumerate(core)}
+    edges = [(core_index[min(i, neighbour)], core_index[max(i, neighbour)])
+             for i, neighbours in enumerate(ordered_graph, start=1) for neighbour in neighbours]
+    sign = -1 if invert else 1
+    for positions in generate_core_placements(n, gaps):
+        if vertex is not None and not _needs_vertex(positions, gaps, n, vertex):
+            continue
+        yield [sign * encode_edge(positions[x], positions[y], n) for x, y in edges]
+
+
+def generate_general_ordered_ramsey_clauses(n, red_graph, blue_graph=None, enforce_symmetry=False,
+                                             special_conditions=None, symmetry_group=None):
+    """
+    Creates the list of clauses expressing the given ordered ramsey problem for 2 colours. A positive literal v means
+    that the edge decoded from v is blue, a negative one that it is red.
 
     :param red_graph, blue_graph: ColoredGraph structures. If blue_graph
     is None, we clone the red one and it is the diagonal case
     :param n: The size of the complete graph we wish to find the ordered subgraph in
-    :param enforce_symmetry: If set to True, the variables are force to take symmetric values
+    :param enforce_symmetry: If set to True, the coloring is forced to be symmetric - the clauses are then written
+    over the representatives of the reversal orbits of the edges (see get_reversal_edge_representatives), a model
+    has to be expanded to the other edges by mapping_to_colored_graph
+    :param symmetry_group: If specified, the coloring is forced to be invariant under the generated edge symmetries
+    (see get_symmetry_edge_representatives), the clauses are written over the edge orbits as well
     :param special_conditions: Other custom conditions can be set, the format is a list of "conditions", where every
     condition is of the form ((v1,v2), color), where v1 and v2 are vertices and color is either 'r' or 'b'
-    :return: Corresponding SAT string, which can be fed into the SAT solver interface
+    :return: A list of clauses, every clause being a list of integer literals
     """
     cnf_clauses = []
     if blue_graph is None:
@@ -88,19 +169,28 @@ def generate_general_ordered_ramsey_sat(n, red_graph, blue_graph=None, enforce_s
         raise ValueError("One of the graphs is bigger than K_n, this doesn't make sense.")
     if not red_graph.get_edge_list() or not blue_graph.get_edge_list():
         raise ValueError("One of the graphs has no edges, this doesn't make sense.")
-    subset_masks = generate_all_k_subsets(n, k=red_size)
-    for mask in subset_masks:
-        cnf_clauses.append(generate_general_ordered_sat_clause(mask, red_graph.get_adjacency_list(),n))
-    subset_masks = generate_all_k_subsets(n, k=blue_size)
-    for mask in subset_masks:
-        cnf_clauses.append(generate_general_ordered_sat_clause(mask, blue_graph.get_adjacency_list(),n, invert=True))
+    cnf_clauses.extend(generate_pattern_clauses(n, red_graph.get_adjacency_list()))
+    cnf_clauses.extend(generate_pattern_clauses(n, blue_graph.get_adjacency_list(), invert=True))
     if special_conditions is not None:
         for edge, color in special_conditions:
             i, j = edge
             cnf_clauses.append(enforce_special_condition_clause(n, i, j, color))
-    if enforce_symmetry:
-        cnf_clauses.extend(enforce_symmetry_clauses(n))
-    return clause_list_to_sat_string(cnf_clauses)
+    representatives = get_symmetry_edge_representatives(n, enforce_symmetry, symmetry_group)
+    if representatives is not None:
+        cnf_clauses = encode_over_edge_orbits(cnf_clauses, representatives)
+    return cnf_clauses
+
+
+def generate_general_ordered_ramsey_sat(n, red_graph, blue_graph=None, enforce_symmetry=False, special_conditions=None,
+                                        symmetry_group=None):
+    """
+    Creates a SAT string expressing the given ordered ramsey problem for 2 colours, see
+    generate_general_ordered_ramsey_clauses for the parameters.
+    :return: Corresponding SAT string, which can be fed into the SAT solver interface
+    """
+    return clause_list_to_sat_string(
+        generate_general_ordered_ramsey_clauses(n, red_graph, blue_graph, enforce_symmetry, special_conditions,
+                                                symmetry_group))
 
 
 # effective remove space?
@@ -122,24 +212,133 @@ def clause_list_to_sat_string(cnf_clauses):
     return ' & '.join(sat_clauses_list)
 
 
-def enforce_symmetry_edge_clauses(n, i, j):
-    edge = encode_edge(i, j, n)
-    symmetric_edge = encode_edge(n + 1 - j, n + 1 - i, n)
-    return [edge, -symmetric_edge], [-edge, symmetric_edge]
-
-
 def enforce_special_condition_clause(n, i, j, color):
     edge = encode_edge(i, j, n)
     return [edge if color == 'b' else -edge]
 
 
-def enforce_symmetry_clauses(n):
-    sat_clauses_list = []
-    for i in range(1, n + 1):
-        for j in range(i + 1, n + 1):
-            if i + j == n + 1:
-                continue
-            cl1, cl2 = enforce_symmetry_edge_clauses(n, i, j)
-            sat_clauses_list.append(cl1)
-            sat_clauses_list.append(cl2)
-    return sat_clauses_list
+def _reversal_image(n, i, j):
+    return n + 1 - j, n + 1 - i
+
+
+def _distance_image(n, i, j):
+    return (i + 1, j + 1) if j < n else None
+
+
+def _sum_image(n, i, j):
+    return (i - 1, j + 1) if i > 1 and j < n else None
+
+
+def _circulant_image(n, i, j):
+    return tuple(sorted((i % n + 1, j % n + 1)))
+
+
+# The named edge symmetries - functions mapping an edge (i,j) of K_n to the edge it's tied to (or None). Reversal is
+# the mirror symmetry i -> n + 1 - i, under distance (sum) the color of (i,j) depends only on j - i (i + j), under
+# circulant only on the cyclic distance of i and j, i.e. the coloring is invariant under the rotation i -> i + 1 mod n
+NAMED_EDGE_SYMMETRIES = {'reversal': _reversal_image, 'distance': _distance_image, 'sum': _sum_image,
+                         'circulant': _circulant_image}
+
+
+def _get_edge_map(n, generator):
+    """
+    :param generator: A name of NAMED_EDGE_SYMMETRIES, a vertex permutation (a sequence of the images of 1, ..., n) or
+    a dict mapping edges (v1,v2) to edges
+    :return: A function mapping an edge (i,j), i < j, to an edge or None
+    """
+    if isinstance(generator, str):
+        if generator not in NAMED_EDGE_SYMMETRIES:
+            raise ValueError("Unknown symmetry " + generator + ", use one of " +
+                             ", ".join(sorted(NAMED_EDGE_SYMMETRIES)) + ".")
+        image = NAMED_EDGE_SYMMETRIES[generator]
+        return lambda i, j: image(n, i, j)
+    if isinstance(generator, dict):
+        edge_map = {}
+        for edge, image in generator.items():
+            for v1, v2 in (edge, image):
+                if not (0 < v1 <= n and 0 < v2 <= n) or v1 == v2:
+                    raise ValueError("The edge " + str((v1, v2)) + " is not an edge of K_" + str(n) + ".")
+            edge_map[tuple(sorted(edge))] = tuple(sorted(image))
+        return lambda i, j: edge_map.get((i, j))
+    permutation = list(generator)
+    if sorted(permutation) != list(range(1, n + 1)):
+        raise ValueError("The vertex permutation " + str(permutation) + " is not a permutation of 1, ..., " + str(n) +
+                         ".")
+    return lambda i, j: tuple(sorted((permutation[i - 1], permutation[j - 1])))
+
+
+def get_edge_orbit_representatives(n, generators):
+    """
+    Computes the orbits of the edges of K_n under the group generated by the given edge symmetries, i.e. the classes
+    of edges a coloring invariant under them colors the same. Every orbit is represented by its smallest edge
+    encoding.
+    :param generators: A list of generators, each being a name of NAMED_EDGE_SYMMETRIES, a vertex permutation (a
+    sequence of the images of the vertices 1, ..., n) or a dict mapping edges (v1,v2) to edges
+    :return: A dict mapping the encoding of every edge of K_n to the encoding of its orbit representative
+    """
+    # A union-find of the edge encodings, the smaller encoding of two merged roots becomes the root
+    parent = {}
+
+    def find(edge):
+        root = edge
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while edge != root:
+            parent[edge], edge = root, parent[edge]
+        return root
+
+    for generator in generators:
+        edge_map = _get_edge_map(n, generator)
+        for i in range(1, n + 1):
+            for j in range(i + 1, n + 1):
+                image = edge_map(i, j)
+                if image is None:
+                    continue
+                root, image_root = find(encode_edge(i, j, n)), find(encode_edge(image[0], image[1], n))
+                if root != image_root:
+                    parent[max(root, image_root)] = min(root, image_root)
+    return {encode_edge(i, j, n): find(encode_edge(i, j, n)) for i in range(1, n + 1) for j in range(i + 1, n + 1)}
+
+
+def get_reversal_edge_representatives(n):
+    """
+    The reversal i -> n + 1 - i maps the edge (i,j) to (n + 1 - j, n + 1 - i), a symmetric coloring colors both the
+    same. Every such orbit of one or two edges is represented by its smaller edge encoding.
+    :return: A dict mapping the encoding of every edge of K_n to the encoding of its orbit representative
+    """
+    return get_edge_orbit_representatives(n, ['reversal'])
+
+
+def get_symmetry_edge_representatives(n, enforce_symmetry=False, symmetry_group=None):
+    """
+    :param symmetry_group: None, or a list of generators of get_edge_orbit_representatives (a single name of
+    NAMED_EDGE_SYMMETRIES is accepted as well)
+    :return: The orbit representatives (see get_edge_orbit_representatives) of the group generated by the symmetry
+    group and the reversal (if enforce_symmetry is set), None if there is no symmetry to enforce
+    """
+    generators = [symmetry_group] if isinstance(symmetry_group, str) else list(symmetry_group or [])
+    if enforce_symmetry:
+        generators.append('reversal')
+    if not generators:
+        return None
+    return get_edge_orbit_representatives(n, generators)
+
+
+def encode_over_edge_orbits(cnf_clauses, representatives):
+    """
+    Rewrites the clauses onto the orbit representatives of the edges, so that there is one variable per orbit instead
+    of one per edge. Clauses which become identical are kept only once, tautologies are dropped.
+    :param representatives: A dict mapping every edge encoding to the encoding of its orbit representative
+    :return: The list of the rewritten clauses
+    """
+    orbit_clauses = []
+    seen_clauses = set()
+    for clause in cnf_clauses:
+        literals = sorted({representatives[literal] if literal > 0 else -representatives[-literal]
+                           for literal in clause})
+        key = tuple(literals)
+        if key in seen_clauses or any(-literal in literals for literal in literals if literal > 0):
+            continue
+        seen_clauses.add(key)
+        orbit_clauses.append(literals)
+    return orbit_clauses
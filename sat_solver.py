@@ -1,9 +1,53 @@
-import sys
-from subprocess import call
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from subprocess import Popen, PIPE, DEVNULL, TimeoutExpired
 from tempfile import NamedTemporaryFile
 
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, memory limits are silently ignored there
+    resource = None
+
 from satispy.io import DimacsCnf
 from satispy import CnfFromString
+from solver_stats import SolverStats, SolverProgress, parse_solver_statistics, parse_minisat_progress_line, \
+    parse_glucose_progress_line
+
+SAT_EXIT_CODE = 10
+UNSAT_EXIT_CODE = 20
+# The seconds to wait for the rest of the output of a killed solver
+KILLED_OUTPUT_WAIT = 1
+
+
+class SolverStatus:
+    """
+    The possible outcomes of a single solver call. Only UNSAT means there are no (more) solutions, the other
+    non-SAT values leave the search undecided and the call may be repeated.
+    """
+    SAT = "SAT"
+    UNSAT = "UNSAT"
+    TIMEOUT = "TIMEOUT"
+    # The solver didn't report any progress for too long, see stall_timeout
+    STALLED = "STALLED"
+    CANCELLED = "CANCELLED"
+    UNKNOWN = "UNKNOWN"
+    # The search failed with an exception (e.g. the solver couldn't be started), see SolutionBrowser.error
+    ERROR = "ERROR"
+
+
+def write_dimacs_string(satispy_cnf_expression):
+    """
+    Converts the satispy_cnf_expression to a DIMACS formatted string. This means a forced conversion from our variables
+    to other ordering (from 1 to #number of variables), therefore the mapping from the new variables to ours is returned
+    as well.
+    :return: A pair (DIMACS string, dictionary of the form {int: int} converting the SAT variables to our variables)
+    """
+    io = DimacsCnf()
+    dimacs_string = io.tostring(satispy_cnf_expression)
+    return dimacs_string, {int(k): int(str(v)[1:]) for k, v in io.varobj_dict.items()}
 
 
 def write_dimacs_input_file(satispy_cnf_expression, file_name):
@@ -12,172 +56,360 @@ def write_dimacs_input_file(satispy_cnf_expression, file_name):
     to other ordering (from 1 to #number of variables). Therefore we return the mapping from the new variables to our.
     :return: A dictionary of the form {int: int} converting the SAT variables to our former variables
     """
-    io = DimacsCnf()
-    file_name.write(io.tostring(satispy_cnf_expression))
+    dimacs_string, var_map = write_dimacs_string(satispy_cnf_expression)
+    file_name.write(dimacs_string)
     file_name.flush()
-    return {int(k): int(str(v)[1:]) for k, v in io.varobj_dict.items()}
+    return var_map
 
 
-def read_dimacs_output_file(file_name):
+def parse_dimacs_model_lines(lines):
     """
-    Reads the DIMACS formatted output file
+    Parses the model printed by a SAT solver. Both the minisat result file ("SAT" followed by "1 -2 3 0") and the
+    competition stdout format ("s SATISFIABLE" followed by "v 1 -2 3 0" lines) are understood.
     :return: A mapping from SAT variables to their values
     """
-    lines = file_name.readlines()
-
     variable_mapping = {}
 
     for line in lines:
-        if line in ["SAT", "UNSAT", "SATISFIABLE", "UNSATISFIABLE"]:
+        line = line.strip()
+        if not line or line[0] in 'cs' or line in ["SAT", "UNSAT", "SATISFIABLE", "UNSATISFIABLE", "INDET"]:
             continue
-        variable_tokens = line.split(" ")[:-1]
-        for v in variable_tokens:
-            v = v.strip()
-            value = v[0] != '-'
-            v = v.lstrip('-')
-            variable_mapping[int(v)] = value
+        if line[0] == 'v':
+            line = line[1:]
+        for v in line.split():
+            if v == '0':
+                continue
+            variable_mapping[int(v.lstrip('-'))] = v[0] != '-'
 
     return variable_mapping
 
 
+def read_dimacs_output_file(file_name):
+    """
+    Reads the DIMACS formatted output file
+    :return: A mapping from SAT variables to their values
+    """
+    return parse_dimacs_model_lines(file_name.readlines())
+
+
+def _read_file_lines(file_name):
+    with open(file_name) as f:
+        return f.readlines()
+
+
+@contextmanager
+def solver_output_file():
+    """
+    Provides a path for solvers which insist on writing their model into a file. On Linux, the file is an anonymous
+    memfd handed to the child process as /dev/fd/N, elsewhere a temporary file in /dev/shm (if present) is used, so the
+    model never hits the disk. The temporary file is closed while the solver runs, as Windows doesn't let another
+    process open a file which is open.
+    :return: Yields a triple (path for the solver, function returning the lines of the model, file descriptors to pass)
+    """
+    if hasattr(os, 'memfd_create'):
+        fd = os.memfd_create('ordered-ramsey-model')
+        output_file = os.fdopen(fd, 'r')
+        try:
+            yield '/dev/fd/%d' % fd, output_file.readlines, (fd,)
+        finally:
+            output_file.close()
+    else:
+        output_file = NamedTemporaryFile(mode='r', dir='/dev/shm' if os.path.isdir('/dev/shm') else None,
+                                         delete=False)
+        output_file.close()
+        try:
+            yield output_file.name, lambda: _read_file_lines(output_file.name), ()
+        finally:
+            os.remove(output_file.name)
+
+
+@contextmanager
+def solver_input_file(dimacs_string):
+    """
+    Provides a path for solvers which read the formula only from a file. Where /dev/stdin exists, it's used and the
+    formula is written to the solver's stdin, elsewhere (Windows) the formula is written into a temporary file, closed
+    before the solver opens it.
+    :return: Yields a pair (path for the solver, True iff the formula has to be written to the solver's stdin)
+    """
+    if os.path.exists('/dev/stdin'):
+        yield '/dev/stdin', True
+        return
+    input_file = NamedTemporaryFile(mode='w', suffix='.cnf', delete=False)
+    try:
+        with input_file:
+            input_file.write(dimacs_string)
+        yield input_file.name, False
+    finally:
+        os.remove(input_file.name)
+
+
+def _process_memory(pid):
+    """
+    :return: The resident memory of a running process in bytes, None if it can't be found out (e.g. outside Linux)
+    """
+    try:
+        with open('/proc/%d/statm' % pid) as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _write_formula(stdin, dimacs_string):
+    try:
+        stdin.write(dimacs_string)
+        stdin.close()
+    except (BrokenPipeError, OSError):
+        # The solver was killed (cancelled) before reading the whole formula
+        pass
+
+
+def _limit_memory(memory_limit):
+    """
+    Returns a function for Popen's preexec_fn limiting the address space of the child process.
+    :param memory_limit: The limit in megabytes
+    """
+    def set_limit():
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    return set_limit
+
+
 class SatFormulaSolver:
     """
-    Abstract class enforcing an interface for SAT Solver tools
+    Abstract class enforcing an interface for SAT Solver tools. Subclasses only specify how the solver binary is
+    invoked - the formula is fed over the solver's stdin (a temporary input file is only used for solvers which need
+    a path on systems without /dev/stdin), no shell is involved.
+    The running solver process can be killed from another thread by calling cancel(). The time spent in every stage,
+    the formula sizes and the search statistics printed by the solver are collected in self.stats.
     """
 
-    def __init__(self, sat_string):
+    # The solver command line as a list of arguments. An '{output}' argument marks solvers which can't print the model
+    # to stdout, it is replaced by a path to an in-memory file the model is read back from. An '{input}' argument marks
+    # solvers which can't read the formula from stdin, it is replaced by a path (see solver_input_file).
+    COMMAND = None
+    # A function parsing a line of the solver's progress table into a dict of SolverProgress values (or None for
+    # other lines), None if the progress isn't reported
+    PROGRESS_PARSER = None
+
+    def __init__(self, sat_string, timeout=None, memory_limit=None, stats=None, stall_timeout=None):
         """
         :param sat_string: A SAT string of the form "(v1 | v2) & (-v3 | ...)"
+        :param timeout: If specified, the wall-clock limit in seconds for a single solver call
+        :param memory_limit: If specified, the memory limit in megabytes for the solver process (POSIX only)
+        :param stats: If specified, the SolverStats the measurements are added to, a new one is created otherwise
+        :param stall_timeout: If specified, a solver call which doesn't print a progress line for this many seconds is
+        killed with the STALLED status. The solvers report progress less and less often as the search goes on, so it
+        should be set generously
         """
         self.sat_string = sat_string
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.stall_timeout = stall_timeout
+        # The SolverProgress last reported by the running (or last) solver call, None before the first report
+        self.progress = None
         self.stopped_searching = False
-        self.satispy_cnf_expression, _ = CnfFromString.create(sat_string)
-
-    def find_next_solution(self):
+        # SolverStatus of the last find_next_solution call, None before the first one
+        self.status = None
+        self.stats = stats if stats is not None else SolverStats()
+        with self.stats.measure("parse"):
+            self.satispy_cnf_expression, _ = CnfFromString.create(sat_string)
+        self._process = None
+        self._cancelled = False
+        # Reentrant, as cancel() can be called from a signal handler interrupting the same thread holding the lock
+        self._process_lock = threading.RLock()
+
+    def find_next_solution(self, forbid_solution=True):
         """
-        Finds a solution for the given SAT string. If there is no new solution (or no solution), returns None
+        Finds a solution for the given SAT string. If there is no new solution (or no solution), returns None. The
+        reason of returning None can be told by self.status - after a TIMEOUT, CANCELLED or UNKNOWN result the search
+        is not finished and the method can be called again.
+        :param forbid_solution: If True, the found solution is forbidden, so that the next call finds a new one. Set it
+        to False when the caller blocks the solution by itself (see add_clause).
         :return: A mapping between variables and their values, or None if no new solution is found
         """
-        pass
-        """
-        Could look like this:
-        
         if self.stopped_searching:
+            self.status = SolverStatus.UNSAT
             return None
+        # Stays UNKNOWN if the solver can't be run at all
+        self.status = SolverStatus.UNKNOWN
 
-        infile = NamedTemporaryFile(mode='w')
-        outfile = NamedTemporaryFile(mode='r')
-
-        var_map = write_dimacs_input_file(self.satispy_cnf_expression, infile)
+        with self.stats.measure("dimacs"):
+            dimacs_string, var_map = write_dimacs_string(self.satispy_cnf_expression)
+        with self.stats.measure("solve", child_process=True):
+            self.status, model_lines = self._run_solver(dimacs_string)
 
-        ret = call(SAT_SOLVER_COMMAND % (infile.name, outfile.name), shell=True)
-        infile.close()
-
-        if NO_SOLUTION_FOUND:
+        if self.status == SolverStatus.UNSAT:
             self.stopped_searching = True
+        if self.status != SolverStatus.SAT:
             return None
 
-        resulting_sat_mapping = read_dimacs_output_file(outfile)
-        # Convert the mapping to our graph values beforehand
-        resulting_mapping = {}
-        for k, v in resulting_sat_mapping.items():
-            resulting_mapping[var_map[k]] = v
-        # Close deletes the tmp files
-        outfile.close()
-        if NO_INNATE_SUPPORT_FOR_NEXT_SOLUTIONS_IN_THE_SAT_SOLVER:
+        with self.stats.measure("decode"):
+            resulting_sat_mapping = parse_dimacs_model_lines(model_lines)
+            # Convert the mapping to our graph values beforehand
+            resulting_mapping = {}
+            for k, v in resulting_sat_mapping.items():
+                resulting_mapping[var_map[k]] = v
+
+        if forbid_solution:
             self.forbid_given_solution_sat_string(resulting_mapping)
         return resulting_mapping
-        """
 
-
-class MinisatSatFormulaSolver(SatFormulaSolver):
-    def find_next_solution(self):
+    def cancel(self):
         """
-        Finds a solution for the given SAT string. If there is no new solution (or no solution), returns None
-        :return: A mapping between variables and their values, or None if no new solution is found
+        Kills the currently running solver process, the interrupted call returns with the CANCELLED status. If no
+        solver is running, the next call is cancelled instead. Safe to be called from another thread.
         """
-        if self.stopped_searching:
-            return None
-
-        infile = NamedTemporaryFile(mode='w')
-        outfile = NamedTemporaryFile(mode='r')
-
-        var_map = write_dimacs_input_file(self.satispy_cnf_expression, infile)
+        with self._process_lock:
+            self._cancelled = True
+            if self._process is not None:
+                self._process.kill()
 
-        ret = call(('minisat %s %s > ' + ('NUL' if sys.platform == 'win32' else '/dev/null')) %
-                   (infile.name, outfile.name), shell=True)
-        infile.close()
-
-        if ret != 10:
-            self.stopped_searching = True
-            return None
-
-        resulting_sat_mapping = read_dimacs_output_file(outfile)
-        # Convert the mapping to our graph values beforehand
-        resulting_mapping = {}
-        for k, v in resulting_sat_mapping.items():
-            resulting_mapping[var_map[k]] = v
-        # Close deletes the tmp files
-        outfile.close()
+    def reset_cancel(self):
+        """
+        Forgets a cancel() which came when no solver was running, so that the next call searches again.
+        """
+        with self._process_lock:
+            self._cancelled = False
 
-        self.forbid_given_solution_sat_string(resulting_mapping)
-        return resulting_mapping
+    def _run_solver(self, dimacs_string):
+        """
+        Runs the solver binary (without a shell) on the given DIMACS string passed over stdin, respecting the
+        timeout, the memory limit and cancellation. The call is recorded in self.stats.
+        :raises RuntimeError: If the solver binary can't be started, e.g. when it isn't installed
+        :return: A pair (SolverStatus, list of lines containing the model)
+        """
+        status, model_lines, output_lines = self._run_solver_process(dimacs_string)
+        # The header is "p cnf <variables> <clauses>", every clause line has a space after each of its literals
+        _, _, variables, clauses = dimacs_string[:dimacs_string.find('\n')].split()
+        self.stats.record_solver_call(status, int(clauses), int(variables), dimacs_string.count(' ') - 3,
+                                      len(dimacs_string), parse_solver_statistics(output_lines))
+        return status, model_lines
+
+    def _run_solver_process(self, dimacs_string):
+        """
+        Runs the solver process. The formula is written by a separate thread, while the output is read line by line as
+        it's printed, so that the progress lines can be reported to self.stats right away.
+        :return: A triple (SolverStatus, list of lines containing the model, list of all the solver stdout lines)
+        """
+        input_context = solver_input_file(dimacs_string) if '{input}' in self.COMMAND else nullcontext((None, True))
+        with solver_output_file() as (output_path, read_model, pass_fds), input_context as (input_path, use_stdin):
+            model_on_stdout = '{output}' not in self.COMMAND
+            command = [output_path if arg == '{output}' else input_path if arg == '{input}' else arg
+                       for arg in self.COMMAND]
+            with self._process_lock:
+                if self._cancelled:
+                    self._cancelled = False
+                    return SolverStatus.CANCELLED, [], []
+                preexec_fn = None
+                if self.memory_limit is not None and resource is not None:
+                    preexec_fn = _limit_memory(self.memory_limit)
+                try:
+                    self._process = Popen(command, stdin=PIPE if use_stdin else DEVNULL, stdout=PIPE, stderr=DEVNULL,
+                                          universal_newlines=True, pass_fds=pass_fds, preexec_fn=preexec_fn)
+                except OSError as error:
+                    raise RuntimeError("The SAT solver " + command[0] + " can't be run (" + str(error) +
+                                       "), check that it's installed and in PATH.") from error
+            process = self._process
+            start = time.monotonic()
+            output_lines = []
+            # The time of the last progress report, shared with the reader thread
+            last_report = [start]
+            writer = threading.Thread(target=_write_formula, args=(process.stdin, dimacs_string), daemon=True)
+            reader = threading.Thread(target=self._read_output, args=(process, start, output_lines, last_report),
+                                      daemon=True)
+            if use_stdin:
+                writer.start()
+            reader.start()
+            timed_out = stalled = False
+            while True:
+                now = time.monotonic()
+                limits = []
+                if self.timeout is not None:
+                    limits.append(start + self.timeout - now)
+                if self.stall_timeout is not None:
+                    limits.append(last_report[0] + self.stall_timeout - now)
+                try:
+                    process.wait(timeout=max(min(limits), 0) if limits else None)
+                    break
+                except TimeoutExpired:
+                    now = time.monotonic()
+                    timed_out = self.timeout is not None and now - start >= self.timeout
+                    stalled = self.stall_timeout is not None and now - last_report[0] >= self.stall_timeout
+                    if timed_out or stalled:
+                        process.kill()
+                        process.wait()
+                        break
+            # The output of a killed solver is not needed, so a child process it left holding the pipe isn't waited for
+            output_wait = KILLED_OUTPUT_WAIT if process.returncode < 0 else None
+            if use_stdin:
+                writer.join(output_wait)
+            reader.join(output_wait)
+            with self._process_lock:
+                self._process = None
+                cancelled, self._cancelled = self._cancelled, False
+
+            if cancelled:
+                return SolverStatus.CANCELLED, [], output_lines
+            if timed_out:
+                return SolverStatus.TIMEOUT, [], output_lines
+            if stalled:
+                return SolverStatus.STALLED, [], output_lines
+            if process.returncode == UNSAT_EXIT_CODE:
+                return SolverStatus.UNSAT, [], output_lines
+            if process.returncode != SAT_EXIT_CODE:
+                return SolverStatus.UNKNOWN, [], output_lines
+            if model_on_stdout:
+                return SolverStatus.SAT, [line for line in output_lines if line.startswith('v')], output_lines
+            return SolverStatus.SAT, read_model(), output_lines
+
+    def _read_output(self, process, start, output_lines, last_report):
+        """
+        Collects the solver stdout lines until the process ends, reporting the progress lines to self.stats.
+        """
+        for line in process.stdout:
+            line = line.rstrip('\n')
+            output_lines.append(line)
+            values = self.PROGRESS_PARSER(line) if self.PROGRESS_PARSER is not None else None
+            if values is not None:
+                last_report[0] = time.monotonic()
+                self.progress = SolverProgress(last_report[0] - start, memory=_process_memory(process.pid), **values)
+                self.stats.record_progress(self.progress)
+        process.stdout.close()
 
     def forbid_given_solution_sat_string(self, mapping):
         """
-        Appends a clause which forbids a given sat_string, so that new solutions are found. Unfortunately, Minisat
-        solver probably doesn't just support this "find next solution" function by itself.
+        Appends a clause which forbids a given sat_string, so that new solutions are found. Unfortunately, the
+        supported solvers don't just support this "find next solution" function by themselves.
         :param mapping: A dict of int:bool denoting the values for every symbol.
         """
-        literal_list = []
-        for symbol_name, value in mapping.items():
-            literal = ("v" if not value else "-v") + str(symbol_name)
-            literal_list.append(literal)
-        self.sat_string += ' & (' + ' | '.join(literal_list) + ')'
-        self.satispy_cnf_expression, _ = CnfFromString.create(self.sat_string)
-
+        self.add_clause([-symbol_name if value else symbol_name for symbol_name, value in mapping.items()])
 
-# TODO test this somehow more... basically the same as for Minisat
-class GlucoseSatFormulaSolver(SatFormulaSolver):
-    def find_next_solution(self):
+    def add_clause(self, clause):
         """
-        Finds a solution for the given SAT string. If there is no new solution (or no solution), returns None
-        :return: A mapping between variables and their values, or None if no new solution is found
+        Appends a clause to the formula, e.g. a clause blocking a part of an already found solution.
+        :param clause: A list of non-zero integer literals, a negative one meaning a negated variable
         """
-        if self.stopped_searching:
-            return None
-
-        infile = NamedTemporaryFile(mode='w')
-        outfile = NamedTemporaryFile(mode='r')
+        literal_list = ['v' + str(literal) if literal > 0 else '-v' + str(-literal) for literal in clause]
+        self.sat_string += ' & (' + ' | '.join(literal_list) + ')'
+        with self.stats.measure("parse"):
+            self.satispy_cnf_expression, _ = CnfFromString.create(self.sat_string)
 
-        var_map = write_dimacs_input_file(self.satispy_cnf_expression, infile)
 
-        ret = call(('glucose %s %s > ' + ('NUL' if sys.platform == 'win32' else '/dev/null')) %
-                   (infile.name, outfile.name), shell=True)
-        infile.close()
+class MinisatSatFormulaSolver(SatFormulaSolver):
+    # Minisat only writes the model into a result file and reads the formula from a file, /dev/stdin where it exists.
+    # Verbosity 1 makes it print the search statistics
+    COMMAND = ['minisat', '-verb=1', '{input}', '{output}']
+    PROGRESS_PARSER = staticmethod(parse_minisat_progress_line)
 
-        if ret != 10:
-            self.stopped_searching = True
-            return None
 
-        resulting_sat_mapping = read_dimacs_output_file(outfile)
-        # Convert the mapping to our graph values beforehand
-        resulting_mapping = {}
-        for k, v in resulting_sat_mapping.items():
-            resulting_mapping[var_map[k]] = v
-        # Close deletes the tmp files
-        outfile.close()
+class GlucoseSatFormulaSolver(SatFormulaSolver):
+    # Without an input file glucose reads stdin, '-model' prints the model as "v ..." lines
+    COMMAND = ['glucose', '-verb=1', '-model']
+    PROGRESS_PARSER = staticmethod(parse_glucose_progress_line)
 
-        self.forbid_given_solution_sat_string(resulting_mapping)
-        return resulting_mapping
 
-    def forbid_given_solution_sat_string(self, mapping):
-        """
-        Probably not needed here, but need to find out more about Glucose
-        """
-        literal_list = []
-        for symbol_name, value in mapping.items():
-            literal = ("v" if not value else "-v") + str(symbol_name)
-            literal_list.append(literal)
-        self.sat_string += ' & (' + ' | '.join(literal_list) + ')'
-        self.satispy_cnf_expression, _ = CnfFromString.create(self.sat_string)
+# The solver adapters selectable by name
+SAT_SOLVERS = {
+    "minisat": MinisatSatFormulaSolver,
+    "glucose": GlucoseSatFormulaSolver,
+}
@@ -0,0 +1,204 @@
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+from colored_graph import ColoredGraph
+
+# The name of the archive written into the target directory by the GUI
+DEFAULT_ARCHIVE_NAME = "colorings.archive"
+
+ARCHIVE_MAGIC = b'ORCA'
+ARCHIVE_VERSION = 1
+# magic, version, n, flags, red graph fingerprint, blue graph fingerprint, record size in bytes
+HEADER_FORMAT = '<4sHHI8s8sI'
+# The header is padded, so that the records start at a nicely aligned offset
+HEADER_SIZE = 64
+
+# Header flags describing the formula the colorings were found for
+FLAG_SYMMETRIC = 1
+FLAG_SPECIAL_CONDITIONS = 2
+
+
+def archive_edges(n):
+    """
+    :return: The edges of K_n in the order they are stored in the archive records, i.e. (1,2), (1,3), ..., (n-1,n)
+    """
+    return [(i, j) for i in range(1, n + 1) for j in range(i + 1, n + 1)]
+
+
+def archive_edge_index(i, j, n):
+    """
+    :return: The position of the edge (i,j) in archive_edges(n), i.e. the number of its bit in a record
+    """
+    if i > j:
+        i, j = j, i
+    return (i - 1) * (2 * n - i) // 2 + (j - i - 1)
+
+
+def archive_record_size(n):
+    """
+    :return: The size of one record in bytes - C(n,2) bits, padded to whole 64-bit words
+    """
+    return (n * (n - 1) // 2 + 63) // 64 * 8
+
+
+def graph_fingerprint(graph):
+    """
+    :return: An 8 byte fingerprint of an ordered graph (its size and edges), b'\\0' * 8 for None
+    """
+    if graph is None:
+        return b'\0' * 8
+    description = str(len(graph)) + ";" + ",".join(str(v1) + " " + str(v2) for v1, v2 in sorted(graph.get_edge_list()))
+    return hashlib.sha1(description.encode()).digest()[:8]
+
+
+class SolutionArchiveWriter:
+    """
+    Appends avoiding colorings of K_n to a bit-packed binary archive. The archive consists of
+    - a HEADER_SIZE bytes header (see HEADER_FORMAT) holding n, the fingerprints of the red and blue graph and flags,
+    - one record marking the edges which have a color (the edges the formula doesn't contain have none),
+    - one record per coloring,
+    where a record has C(n,2) bits, one per edge in archive_edges order (bit k is bit k % 8 of byte k // 8, i.e. bit
+    k % 64 of the k // 64-th little endian 64-bit word), a set bit meaning a blue edge. Records are padded to whole
+    64-bit words, so the archive can be memory-mapped as a uint8 or uint64 array.
+    """
+
+    def __init__(self, file_name, n, red_graph=None, blue_graph=None, flags=0):
+        """
+        :param file_name: The path of the archive, an existing file is overwritten
+        :param n: The number of vertices of the stored colorings
+        :param red_graph, blue_graph: If specified, the ColoredGraph patterns whose fingerprints are stored
+        :param flags: A combination of the FLAG_* constants
+        """
+        self.n = n
+        self.record_size = archive_record_size(n)
+        self.count = 0
+        self.edge_indices = {edge: archive_edge_index(edge[0], edge[1], n) for edge in archive_edges(n)}
+        self._colored_edges = None
+        self.file = open(file_name, 'wb')
+        header = struct.pack(HEADER_FORMAT, ARCHIVE_MAGIC, ARCHIVE_VERSION, n, flags, graph_fingerprint(red_graph),
+                             graph_fingerprint(blue_graph), self.record_size)
+        self.file.write(header.ljust(HEADER_SIZE, b'\0'))
+        # The colored edges record is rewritten once the first coloring is known
+        self.file.write(b'\0' * self.record_size)
+
+    def _pack(self, edges):
+        bits = np.zeros(self.record_size * 8, dtype=np.uint8)
+        bits[[self.edge_indices[edge] for edge in edges]] = 1
+        return np.packbits(bits, bitorder='little').tobytes()
+
+    def write(self, avoiding_coloring):
+        """
+        Appends one ColoredGraph coloring of K_n to the archive. All the stored colorings have to color the same
+        edges.
+        """
+        if avoiding_coloring.size != self.n:
+            raise ValueError("Only colorings of K_" + str(self.n) + " can be stored in this archive.")
+        colored_edges = set(avoiding_coloring.get_edge_list())
+        if self._colored_edges is None:
+            self._colored_edges = colored_edges
+            self.file.seek(HEADER_SIZE)
+            self.file.write(self._pack(colored_edges))
+            self.file.seek(0, os.SEEK_END)
+        elif colored_edges != self._colored_edges:
+            raise ValueError("All the colorings in the archive have to color the same edges.")
+        self.file.write(self._pack([edge for edge, color in avoiding_coloring.edge_coloring.items() if color == 'b']))
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SolutionArchiveReader:
+    """
+    Memory-maps an archive written by SolutionArchiveWriter. The colorings are available without any parsing as the
+    (count x record_size) uint8 array records (or as a uint64 array by get_words), single colorings can be converted
+    to ColoredGraph structures by indexing.
+    """
+
+    def __init__(self, file_name):
+        with open(file_name, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+            file_size = os.fstat(f.fileno()).st_size
+        if len(header) < HEADER_SIZE or header[:4] != ARCHIVE_MAGIC:
+            raise RuntimeError("The file " + file_name + " is not a coloring archive.")
+        _, version, self.n, self.flags, self.red_fingerprint, self.blue_fingerprint, self.record_size = \
+            struct.unpack_from(HEADER_FORMAT, header)
+        if version != ARCHIVE_VERSION:
+            raise RuntimeError("Unsupported coloring archive version " + str(version) + ".")
+        self.edges = archive_edges(self.n)
+        self._count = max(file_size - HEADER_SIZE - self.record_size, 0) // self.record_size
+        self.colored_edges_record = np.fromfile(file_name, dtype=np.uint8, count=self.record_size, offset=HEADER_SIZE)
+        if self._count == 0:
+            self.records = np.zeros((0, self.record_size), dtype=np.uint8)
+        else:
+            self.records = np.memmap(file_name, dtype=np.uint8, mode='r', offset=HEADER_SIZE + self.record_size,
+                                     shape=(self._count, self.record_size))
+
+    def __len__(self):
+        return self._count
+
+    def get_words(self):
+        """
+        :return: The records as a (count x record_size / 8) array of 64-bit words
+        """
+        return self.records.view('<u8')
+
+    def get_edge_bits(self, record):
+        """
+        :return: A uint8 array with one 0/1 entry per edge (in archive_edges order) of a record
+        """
+        return np.unpackbits(record, bitorder='little')[:len(self.edges)]
+
+    def __getitem__(self, index):
+        """
+        :return: The ColoredGraph coloring with the given (zero based) index
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("The archive contains only " + str(self._count) + " colorings.")
+        colored = self.get_edge_bits(self.colored_edges_record)
+        blue = self.get_edge_bits(self.records[index])
+        edge_list = [edge for edge, is_colored in zip(self.edges, colored) if is_colored]
+        edge_coloring = {edge: 'b' if blue[archive_edge_index(edge[0], edge[1], self.n)] else 'r'
+                         for edge in edge_list}
+        return ColoredGraph(self.n, edge_list, edge_coloring)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def find_matching(self, conditions):
+        """
+        Finds the colorings agreeing with the given partial coloring, using vectorized bit operations on the records.
+        :param conditions: A list of the special conditions form [((v1,v2), color), ...]
+        :return: An array of the (zero based) indices of the matching colorings
+        """
+        mask_bits = np.zeros(self.record_size * 8, dtype=np.uint8)
+        value_bits = np.zeros(self.record_size * 8, dtype=np.uint8)
+        for (v1, v2), color in conditions:
+            index = archive_edge_index(v1, v2, self.n)
+            mask_bits[index] = 1
+            value_bits[index] = color == 'b'
+        mask = np.packbits(mask_bits, bitorder='little').view('<u8')
+        value = np.packbits(value_bits, bitorder='little').view('<u8')
+        return np.flatnonzero(((self.get_words() & mask) == value).all(axis=1))
+
+    def close(self):
+        # Dropping the reference unmaps the file
+        self.records = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,159 @@
+import collections
+import threading
+
+from sat_solver import SolverStatus
+
+# The number of colorings found ahead of the currently shown one
+DEFAULT_PREFETCH = 8
+
+
+class SolutionBrowser:
+    """
+    Pages through the avoiding colorings found by a RamseySolver. A background producer thread keeps up to prefetch
+    not yet shown colorings in a bounded buffer, so stepping forward usually doesn't wait for the solver. The shown
+    colorings are kept, so stepping back never calls the solver at all.
+    """
+
+    def __init__(self, ramsey_solver, prefetch=DEFAULT_PREFETCH, on_change=None):
+        """
+        :param ramsey_solver: The RamseySolver whose colorings are browsed, it must not be used by anything else
+        :param prefetch: The maximal number of colorings found ahead
+        :param on_change: If specified, a function called without arguments (from the producer thread) whenever a
+        coloring is prefetched or the producer stops, e.g. to notify the GUI
+        """
+        self.ramsey_solver = ramsey_solver
+        self.prefetch = prefetch
+        self.on_change = on_change
+        # The shown colorings, history[position] is the current one
+        self.history = []
+        self.position = -1
+        self._buffer = collections.deque()
+        self._condition = threading.Condition()
+        self._producer = None
+        self._stopped = False
+        self._searching = False
+        self._finished = True
+        # The exception which stopped the producer, None if it didn't fail
+        self.error = None
+
+    @property
+    def status(self):
+        """
+        The SolverStatus of the last search of the producer, ERROR if it failed (see error).
+        """
+        if self.error is not None:
+            return SolverStatus.ERROR
+        return self.ramsey_solver.status
+
+    @property
+    def exhausted(self):
+        """
+        True if all the colorings were found (and the producer won't be restarted).
+        """
+        return self.ramsey_solver.status == SolverStatus.UNSAT
+
+    @property
+    def searching(self):
+        """
+        True while the producer is running.
+        """
+        with self._condition:
+            return not self._finished
+
+    def get_prefetched_count(self):
+        """
+        :return: The number of found colorings after the current one
+        """
+        with self._condition:
+            return len(self._buffer) + len(self.history) - self.position - 1
+
+    def current(self):
+        """
+        :return: The currently shown coloring, None before the first call of next
+        """
+        return self.history[self.position] if self.position >= 0 else None
+
+    def next(self):
+        """
+        Steps to the next coloring. If it's not found yet, the producer is (re)started and on_change is called once
+        it's available or the search stops.
+        :return: The next ColoredGraph coloring, or None if it's not available (yet)
+        """
+        if self.position + 1 < len(self.history):
+            self.position += 1
+            return self.history[self.position]
+        with self._condition:
+            coloring = self._buffer.popleft() if self._buffer else None
+            # A slot of the buffer is free again
+            self._condition.notify_all()
+        if coloring is None:
+            self.start()
+            return None
+        self.history.append(coloring)
+        self.position += 1
+        return coloring
+
+    def previous(self):
+        """
+        Steps back to the previously shown coloring.
+        :return: The previous ColoredGraph coloring, or None if the current one is the first
+        """
+        if self.position <= 0:
+            return None
+        self.position -= 1
+        return self.history[self.position]
+
+    def start(self):
+        """
+        Starts the producer, unless it's already running or all the colorings were found. A producer stopped by stop,
+        a timeout or a solver failure is resumed.
+        """
+        with self._condition:
+            if not self._finished or self.exhausted:
+                return
+            self._stopped = False
+            self._finished = False
+            self.error = None
+            # A stop which came while no solver process was running would cancel the first search of the producer
+            self.ramsey_solver.reset_cancel()
+            self._producer = threading.Thread(target=self._produce, daemon=True)
+            self._producer.start()
+
+    def stop(self):
+        """
+        Stops the producer, interrupting the running solver call. The already found colorings stay available.
+        """
+        with self._condition:
+            self._stopped = True
+            if self._searching:
+                self.ramsey_solver.cancel()
+            self._condition.notify_all()
+
+    def _produce(self):
+        try:
+            while True:
+                with self._condition:
+                    while len(self._buffer) >= self.prefetch and not self._stopped:
+                        self._condition.wait()
+                    if self._stopped:
+                        return
+                    self._searching = True
+                coloring = self.ramsey_solver.find_next_avoiding_drawing()
+                with self._condition:
+                    self._searching = False
+                    if coloring is None:
+                        return
+                    self._buffer.append(coloring)
+                self._notify()
+        except Exception as error:
+            # Kept for the consumer, the producer thread has no one else to report to
+            self.error = error
+        finally:
+            with self._condition:
+                self._searching = False
+                self._finished = True
+            self._notify()
+
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change()
@@ -0,0 +1,206 @@
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, the CPU time of the solver processes is reported as 0 there
+    resource = None
+
+# The measured stages of finding a coloring - clause generation, preprocessing, satispy parsing, DIMACS writing, the
+# solver process and decoding the model into a coloring
+STAGES = ("generate", "preprocess", "parse", "dimacs", "solve", "decode")
+
+# The search statistics printed by minisat and glucose (prefixed by "c " in the latter) at the end of a run
+_SOLVER_STATISTICS_LINE = re.compile(r'^(?:c\s+)?(restarts|conflicts|decisions|propagations)\s*:\s*(\d+)')
+# The minisat progress table row "| Conflicts | Vars Clauses Literals | Limit Clauses Lit/Cl | Progress |"
+_MINISAT_PROGRESS_LINE = re.compile(r'^\|\s*(\d+)\s*\|\s*\d+\s+\d+\s+\d+\s*\|'
+                                    r'\s*\d+\s+(\d+)\s+\S+\s*\|\s*([\d.]+)\s*%\s*\|')
+# The glucose progress table row
+# "c | NB Blocked Avg Cfc | Vars Clauses Literals | Red Learnts LBD2 Removed | Progress |"
+_GLUCOSE_PROGRESS_LINE = re.compile(r'^c\s*\|\s*(\d+)\s+\d+\s+(\d+)\s*\|\s*\d+\s+\d+\s+\d+\s*\|'
+                                    r'\s*\d+\s+(\d+)\s+\d+\s+\d+\s*\|\s*([\d.]+)\s*%\s*\|')
+
+
+def parse_solver_statistics(lines):
+    """
+    Extracts the final search statistics from the output of a solver run with a non-zero verbosity.
+    :param lines: The lines of the solver stdout
+    :return: A dict of the found counters, e.g. {'conflicts': 27, 'decisions': 45, ...}
+    """
+    statistics = {}
+    for line in lines:
+        match = _SOLVER_STATISTICS_LINE.match(line)
+        if match:
+            statistics[match.group(1)] = int(match.group(2))
+    return statistics
+
+
+class SolverProgress:
+    """
+    One progress report of a running solver - the values parsed from a line of its progress table (None for the ones
+    the solver doesn't print) along with the elapsed time and the memory used by the solver process.
+    """
+
+    def __init__(self, elapsed, conflicts=None, restarts=None, learnt_clauses=None, progress=None, memory=None):
+        """
+        :param elapsed: The seconds since the solver was started
+        :param progress: The solver's estimate of the searched part of the search space in percent
+        :param memory: The resident memory of the solver process in bytes
+        """
+        self.elapsed = elapsed
+        self.conflicts = conflicts
+        self.restarts = restarts
+        self.learnt_clauses = learnt_clauses
+        self.progress = progress
+        self.memory = memory
+
+    def as_dict(self):
+        return {'elapsed': self.elapsed, 'conflicts': self.conflicts, 'restarts': self.restarts,
+                'learnt_clauses': self.learnt_clauses, 'progress': self.progress, 'memory': self.memory}
+
+    def __str__(self):
+        parts = ["%.1f s" % self.elapsed]
+        for label, value in (("conflicts", self.conflicts), ("restarts", self.restarts),
+                             ("learnt clauses", self.learnt_clauses)):
+            if value is not None:
+                parts.append(label + " " + str(value))
+        if self.progress is not None:
+            parts.append("%.3f %%" % self.progress)
+        if self.memory is not None:
+            parts.append("%.1f MB" % (self.memory / 2 ** 20))
+        return ", ".join(parts)
+
+
+def parse_minisat_progress_line(line):
+    """
+    :return: A dict of the values of a minisat progress table row (conflicts, learnt_clauses, progress), None if the
+    line isn't one
+    """
+    match = _MINISAT_PROGRESS_LINE.match(line)
+    if match is None:
+        return None
+    return {'conflicts': int(match.group(1)), 'learnt_clauses': int(match.group(2)),
+            'progress': float(match.group(3))}
+
+
+def parse_glucose_progress_line(line):
+    """
+    :return: A dict of the values of a glucose progress table row (restarts, conflicts, learnt_clauses, progress),
+    None if the line isn't one. Glucose only prints the average number of conflicts per restart, so the conflicts are
+    estimated from it.
+    """
+    match = _GLUCOSE_PROGRESS_LINE.match(line)
+    if match is None:
+        return None
+    restarts = int(match.group(1))
+    return {'restarts': restarts, 'conflicts': restarts * int(match.group(2)), 'learnt_clauses': int(match.group(3)),
+            'progress': float(match.group(4))}
+
+
+def _children_cpu_time():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class SolverStats:
+    """
+    Measurements of the work done for one RamseySolver (including its SAT solver adapters):
+    - wall_times, cpu_times: for every stage of STAGES the accumulated wall-clock and CPU seconds. The CPU time of the
+      solve stage is the one of the solver processes, the other stages count the CPU time of the whole Python process,
+    - counters: the number of solver calls, the clauses, variables and literals of the last formula passed to the
+      solver, the bytes written to the solvers and the restarts, conflicts, decisions and propagations they reported.
+    Every measurement is also passed to the hooks, functions hook(stats, event) where event is a dict describing it -
+    {'event': 'stage', 'stage', 'wall_time', 'cpu_time'}, {'event': 'solver_call', 'status', ...counters of the call}
+    or {'event': 'progress', ...values of a SolverProgress} while a solver is running.
+    """
+
+    COUNTERS = ("solver_calls", "clauses", "variables", "literals", "bytes_written", "restarts", "conflicts",
+                "decisions", "propagations")
+    # The counters describing the last formula instead of being summed over the calls
+    FORMULA_COUNTERS = ("clauses", "variables", "literals")
+
+    def __init__(self):
+        self.wall_times = {stage: 0.0 for stage in STAGES}
+        self.cpu_times = {stage: 0.0 for stage in STAGES}
+        self.counters = {counter: 0 for counter in self.COUNTERS}
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        """
+        :param hook: A function hook(stats, event), called (in the measuring thread) after every measurement
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self._hooks.remove(hook)
+
+    @contextmanager
+    def measure(self, stage, child_process=False):
+        """
+        A context manager adding the time spent in its body to the given stage.
+        :param child_process: If True, the CPU time of the finished child processes is measured instead of this one's
+        """
+        cpu_time = _children_cpu_time if child_process else time.process_time
+        wall_start, cpu_start = time.perf_counter(), cpu_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, cpu_time() - cpu_start
+            with self._lock:
+                self.wall_times[stage] += wall
+                self.cpu_times[stage] += cpu
+            self._emit({'event': 'stage', 'stage': stage, 'wall_time': wall, 'cpu_time': cpu})
+
+    def record_solver_call(self, status, clauses, variables, literals, bytes_written, solver_statistics):
+        """
+        Records one finished solver call.
+        :param status: The SolverStatus of the call
+        :param solver_statistics: The counters reported by the solver, see parse_solver_statistics
+        """
+        call = dict(solver_statistics, clauses=clauses, variables=variables, literals=literals,
+                    bytes_written=bytes_written, solver_calls=1)
+        with self._lock:
+            for counter, value in call.items():
+                if counter in self.FORMULA_COUNTERS:
+                    self.counters[counter] = value
+                else:
+                    self.counters[counter] += value
+        self._emit(dict(call, event='solver_call', status=status))
+
+    def record_progress(self, progress):
+        """
+        Passes a SolverProgress of the running solver to the hooks.
+        """
+        self._emit(dict(progress.as_dict(), event='progress'))
+
+    def as_dict(self):
+        """
+        :return: A JSON serializable snapshot {'wall_time': {stage: seconds}, 'cpu_time': {stage: seconds}, counters...}
+        """
+        with self._lock:
+            return dict(self.counters, wall_time=dict(self.wall_times), cpu_time=dict(self.cpu_times))
+
+    def _emit(self, event):
+        for hook in list(self._hooks):
+            hook(self, event)
+
+
+def logging_hook(logger=None, level=logging.INFO):
+    """
+    A SolverStats hook writing every measurement into a logger as one "key=value ..." line, e.g. for aggregating the
+    statistics of batch runs.
+    :param logger: A logging.Logger, the "ordered_ramsey.stats" logger by default
+    """
+    logger = logger or logging.getLogger("ordered_ramsey.stats")
+
+    def hook(stats, event):
+        logger.log(level, " ".join(key + "=" + (("%.6f" % value) if isinstance(value, float) else str(value))
+                                   for key, value in event.items()))
+    return hook
@@ -0,0 +1,342 @@
+import multiprocessing
+from itertools import combinations, combinations_with_replacement
+
+from colored_graph import ColoredGraph
+from ramsey_solver import RamseySolver
+from sat_generator import split_pattern_core
+
+# The structured coloring families - the color of an edge (i,j) depends only on j - i (distance), or only on the
+# blocks of consecutive vertices i and j belong to (block)
+STRUCTURED_FAMILIES = ("distance", "block")
+SEARCH_METHODS = ("exhaustive", "sat")
+# The number of distance colorings checked by one pool task
+DISTANCE_CHUNK_SIZE = 4096
+
+# The red and blue pattern matchers and graphs of the current pool worker, set by _initialize_worker
+_worker_matchers = None
+_worker_graphs = None
+
+
+class PatternMatcher:
+    """
+    Decides whether one color class of a coloring contains a copy of an ordered pattern. The color class is given by
+    bitsets, so the candidate positions of every pattern vertex are computed by a few ANDs of the bitsets of its
+    already placed neighbours. Isolated vertices of the pattern only reserve room (see split_pattern_core).
+    """
+
+    def __init__(self, ordered_graph):
+        """
+        :param ordered_graph: Adjacency list specifying the pattern
+        """
+        core, gaps = split_pattern_core(ordered_graph)
+        if not core:
+            raise ValueError("The pattern has no edges, this doesn't make sense.")
+        core_index = {vertex: index for index, vertex in enumerate(core)}
+        # For every core vertex the (indices of the) core vertices before it it's adjacent to
+        self.earlier_neighbours = [[] for _ in core]
+        for i, neighbours in enumerate(ordered_graph, start=1):
+            for neighbour in neighbours:
+                if i == neighbour:
+                    raise RuntimeError("Faulty graph, self-loop")
+                self.earlier_neighbours[core_index[max(i, neighbour)]].append(core_index[min(i, neighbour)])
+        self.gaps = gaps
+        self.core_size = len(core)
+
+    def contains_copy(self, forward_masks, n):
+        """
+        :param forward_masks: A list of n + 1 integers, bit j of forward_masks[i] is set iff i < j and the edge (i,j)
+        has the color of the checked class (forward_masks[0] is unused)
+        :return: True iff the color class contains a copy of the pattern
+        """
+        k = self.core_size
+        # The last possible position of every core vertex, leaving room for the vertices after it
+        latest = [0] * k
+        latest[-1] = n - self.gaps[-1]
+        for t in range(k - 2, -1, -1):
+            latest[t] = latest[t + 1] - self.gaps[t + 1] - 1
+        positions = [0] * k
+
+        def candidates(t):
+            first = self.gaps[0] + 1 if t == 0 else positions[t - 1] + self.gaps[t] + 1
+            mask = ((1 << (latest[t] + 1)) - 1) & ~((1 << first) - 1)
+            for s in self.earlier_neighbours[t]:
+                mask &= forward_masks[positions[s]]
+            return mask
+
+        # A depth-first search, stack[t] holding the untried candidate positions of the core vertex t
+        stack = [candidates(0)]
+        while stack:
+            t = len(stack) - 1
+            if not stack[t]:
+                stack.pop()
+                continue
+            lowest_bit = stack[t] & -stack[t]
+            stack[t] ^= lowest_bit
+            positions[t] = lowest_bit.bit_length() - 1
+            if t == k - 1:
+                return True
+            stack.append(candidates(t + 1))
+        return False
+
+
+def get_color_masks(coloring):
+    """
+    :param coloring: A ColoredGraph coloring
+    :return: A pair (red forward masks, blue forward masks) in the format of PatternMatcher.contains_copy
+    """
+    red_masks = [0] * (coloring.size + 1)
+    blue_masks = [0] * (coloring.size + 1)
+    for (v1, v2), color in coloring.edge_coloring.items():
+        v1, v2 = min(v1, v2), max(v1, v2)
+        if color == 'r':
+            red_masks[v1] |= 1 << v2
+        else:
+            blue_masks[v1] |= 1 << v2
+    return red_masks, blue_masks
+
+
+def verify_coloring(coloring, red_graph, blue_graph=None):
+    """
+    :param red_graph, blue_graph: ColoredGraph structures of the patterns (the diagonal case if blue_graph is None)
+    :return: True iff the coloring contains neither a red copy of the red pattern nor a blue copy of the blue one
+    """
+    if blue_graph is None:
+        blue_graph = red_graph
+    red_masks, blue_masks = get_color_masks(coloring)
+    return not PatternMatcher(red_graph.get_adjacency_list()).contains_copy(red_masks, coloring.size) and \
+        not PatternMatcher(blue_graph.get_adjacency_list()).contains_copy(blue_masks, coloring.size)
+
+
+def get_distance_masks(n, parameters):
+    """
+    :param parameters: An integer, bit d - 1 is set iff the edges (i, i + d) are blue
+    :return: A pair (red forward masks, blue forward masks) of the distance coloring of K_n
+    """
+    all_vertices = (1 << (n + 1)) - 2
+    red_masks, blue_masks = [0], [0]
+    for i in range(1, n + 1):
+        later_vertices = all_vertices & ~((1 << (i + 1)) - 1)
+        blue_mask = (parameters << (i + 1)) & later_vertices
+        red_masks.append(later_vertices & ~blue_mask)
+        blue_masks.append(blue_mask)
+    return red_masks, blue_masks
+
+
+def lift_distance_coloring(n, parameters):
+    """
+    :param parameters: An integer, bit d - 1 is set iff the edges (i, i + d) are blue
+    :return: The ColoredGraph coloring of K_n
+    """
+    edge_coloring = {(i, j): 'b' if parameters >> (j - i - 1) & 1 else 'r'
+                     for i in range(1, n + 1) for j in range(i + 1, n + 1)}
+    return ColoredGraph(n, list(edge_coloring.keys()), edge_coloring)
+
+
+def get_block_labels(block_sizes):
+    """
+    :param block_sizes: The sizes of the blocks of consecutive vertices, from the first one
+    :return: A list of the block index of every vertex (index 0 unused)
+    """
+    labels = [None]
+    for block, size in enumerate(block_sizes):
+        labels.extend([block] * size)
+    return labels
+
+
+def get_block_pairs(number_of_blocks):
+    """
+    :return: The list of the block pairs (a, b), a <= b - bit p of the block coloring parameters colors the pair p
+    """
+    return list(combinations_with_replacement(range(number_of_blocks), 2))
+
+
+def lift_block_coloring(block_sizes, parameters):
+    """
+    :param block_sizes: The sizes of the blocks of consecutive vertices
+    :param parameters: An integer, bit p is set iff the edges between the blocks of the p-th pair of get_block_pairs
+    (or inside the block, for a pair (a, a)) are blue
+    :return: The ColoredGraph coloring of K_n, n being the sum of the block sizes
+    """
+    labels = get_block_labels(block_sizes)
+    pair_index = {pair: index for index, pair in enumerate(get_block_pairs(len(block_sizes)))}
+    n = len(labels) - 1
+    edge_coloring = {(i, j): 'b' if parameters >> pair_index[(labels[i], labels[j])] & 1 else 'r'
+                     for i in range(1, n + 1) for j in range(i + 1, n + 1)}
+    return ColoredGraph(n, list(edge_coloring.keys()), edge_coloring)
+
+
+def get_block_edge_map(block_sizes):
+    """
+    :return: A symmetry generator for RamseySolver (a dict edge: edge) chaining the edges of every block pair, so
+    that their edge orbits are exactly the block pairs
+    """
+    labels = get_block_labels(block_sizes)
+    n = len(labels) - 1
+    last_edge = {}
+    edge_map = {}
+    for i in range(1, n + 1):
+        for j in range(i + 1, n + 1):
+            pair = (labels[i], labels[j])
+            if pair in last_edge:
+                edge_map[last_edge[pair]] = (i, j)
+            last_edge[pair] = (i, j)
+    return edge_map
+
+
+def generate_block_sizes(n, number_of_blocks):
+    """
+    Generates all the ways to split 1, ..., n into the given number of non-empty blocks of consecutive vertices.
+    :return: A generator of tuples of the block sizes
+    """
+    for cuts in combinations(range(1, n), number_of_blocks - 1):
+        boundaries = (0,) + cuts + (n,)
+        yield tuple(boundaries[b + 1] - boundaries[b] for b in range(number_of_blocks))
+
+
+def _initialize_worker(red_graph, blue_graph):
+    global _worker_matchers, _worker_graphs
+    _worker_matchers = (PatternMatcher(red_graph.get_adjacency_list()), PatternMatcher(blue_graph.get_adjacency_list()))
+    _worker_graphs = (red_graph, blue_graph)
+
+
+def _avoids(n, red_masks, blue_masks):
+    red_matcher, blue_matcher = _worker_matchers
+    return not red_matcher.contains_copy(red_masks, n) and not blue_matcher.contains_copy(blue_masks, n)
+
+
+def _search_distance_chunk(task):
+    """
+    Checks a range of distance colorings exhaustively. Intended to be run in the process pool.
+    :param task: A tuple (n, first parameters, last parameters + 1)
+    :return: The parameters of the first avoiding coloring, or None
+    """
+    n, start, stop = task
+    for parameters in range(start, stop):
+        if _avoids(n, *get_distance_masks(n, parameters)):
+            return parameters
+    return None
+
+
+def _search_blocks(task):
+    """
+    Searches the block colorings with the given block sizes, either exhaustively over all the 2^(B(B+1)/2) colorings
+    of the block pairs or by a SAT solver over the edge orbits. Intended to be run in the process pool.
+    :param task: A tuple (block sizes, method, solver name)
+    :return: A pair (block sizes, parameters of an avoiding coloring) or None
+    """
+    block_sizes, method, solver = task
+    n = sum(block_sizes)
+    labels = get_block_labels(block_sizes)
+    block_pairs = get_block_pairs(len(block_sizes))
+    if method == "sat":
+        red_graph, blue_graph = _worker_graphs
+        ramsey_solver = RamseySolver(n, red_graph, blue_graph, solver=solver,
+                                     symmetry_group=[get_block_edge_map(block_sizes)])
+        coloring = ramsey_solver.find_next_avoiding_drawing()
+        if coloring is None:
+            return None
+        parameters = 0
+        for (v1, v2), color in coloring.get_colored_edge_list():
+            if color == 'b':
+                parameters |= 1 << block_pairs.index((labels[v1], labels[v2]))
+        return block_sizes, parameters
+
+    block_vertices = [0] * len(block_sizes)
+    for vertex in range(1, n + 1):
+        block_vertices[labels[vertex]] |= 1 << vertex
+    all_vertices = (1 << (n + 1)) - 2
+    for parameters in range(1 << len(block_pairs)):
+        # The vertices of the blue blocks of every block
+        blue_blocks = [0] * len(block_sizes)
+        for index, (a, b) in enumerate(block_pairs):
+            if parameters >> index & 1:
+                blue_blocks[a] |= block_vertices[b]
+                blue_blocks[b] |= block_vertices[a]
+        red_masks, blue_masks = [0], [0]
+        for i in range(1, n + 1):
+            later_vertices = all_vertices & ~((1 << (i + 1)) - 1)
+            blue_mask = blue_blocks[labels[i]] & later_vertices
+            red_masks.append(later_vertices & ~blue_mask)
+            blue_masks.append(blue_mask)
+        if _avoids(n, red_masks, blue_masks):
+            return block_sizes, parameters
+    return None
+
+
+def _run_search(tasks, task_function, red_graph, blue_graph, processes):
+    """
+    Runs the tasks on a pool of processes until one of them finds an avoiding coloring.
+    :return: The first non-None task result, or None
+    """
+    pool = multiprocessing.Pool(processes, initializer=_initialize_worker, initargs=(red_graph, blue_graph))
+    try:
+        for result in pool.imap_unordered(task_function, tasks):
+            if result is not None:
+                return result
+        return None
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def find_distance_coloring(n, red_graph, blue_graph=None, method="exhaustive", solver="minisat", processes=None):
+    """
+    Searches the 2^(n-1) distance colorings of K_n - the color of (i,j) depends only on j - i - for an avoiding one.
+    The exhaustive method checks them by the bitset verifier on a pool of processes, the sat method solves the formula
+    with one variable per distance (the 'distance' symmetry group of RamseySolver), which scales to larger n.
+    :param red_graph, blue_graph: ColoredGraph structures of the patterns (the diagonal case if blue_graph is None)
+    :param processes: The number of processes of the exhaustive search, defaults to the number of CPUs
+    :return: A pair (the avoiding ColoredGraph coloring of K_n, its parameters for lift_distance_coloring), or None
+    """
+    if blue_graph is None:
+        blue_graph = red_graph
+    if method not in SEARCH_METHODS:
+        raise ValueError("Unknown search method " + str(method) + ".")
+    if method == "sat":
+        coloring = RamseySolver(n, red_graph, blue_graph, solver=solver,
+                                symmetry_group=['distance']).find_next_avoiding_drawing()
+        if coloring is None:
+            return None
+        # Distances not occurring in any pattern copy are left uncolored by the solver, they stay red
+        parameters = 0
+        for (v1, v2), color in coloring.get_colored_edge_list():
+            if color == 'b':
+                parameters |= 1 << (v2 - v1 - 1)
+    else:
+        tasks = ((n, start, min(start + DISTANCE_CHUNK_SIZE, 1 << (n - 1)))
+                 for start in range(0, 1 << (n - 1), DISTANCE_CHUNK_SIZE))
+        parameters = _run_search(tasks, _search_distance_chunk, red_graph, blue_graph, processes)
+        if parameters is None:
+            return None
+    coloring = lift_distance_coloring(n, parameters)
+    if not verify_coloring(coloring, red_graph, blue_graph):
+        raise RuntimeError("The found distance coloring contains a monochromatic pattern.")
+    return coloring, parameters
+
+
+def find_block_coloring(n, red_graph, blue_graph=None, number_of_blocks=3, method="exhaustive", solver="minisat",
+                        processes=None):
+    """
+    Searches the block colorings of K_n - the vertices are split into blocks of consecutive vertices and the color of
+    (i,j) depends only on the blocks of i and j - for an avoiding one. Every split into the blocks is one pool task,
+    which either tries all the colorings of the block pairs by the bitset verifier or solves them by a SAT solver.
+    :param number_of_blocks: The number of the blocks B, there are C(n-1, B-1) splits with 2^(B(B+1)/2) colorings
+    :param processes: The number of processes, defaults to the number of CPUs
+    :return: A triple (the avoiding ColoredGraph coloring of K_n, the block sizes and the parameters for
+    lift_block_coloring), or None
+    """
+    if blue_graph is None:
+        blue_graph = red_graph
+    if method not in SEARCH_METHODS:
+        raise ValueError("Unknown search method " + str(method) + ".")
+    if not 0 < number_of_blocks <= n:
+        raise ValueError("The number of blocks has to be between 1 and " + str(n) + ".")
+    tasks = ((block_sizes, method, solver) for block_sizes in generate_block_sizes(n, number_of_blocks))
+    result = _run_search(tasks, _search_blocks, red_graph, blue_graph, processes)
+    if result is None:
+        return None
+    block_sizes, parameters = result
+    coloring = lift_block_coloring(block_sizes, parameters)
+    if not verify_coloring(coloring, red_graph, blue_graph):
+        raise RuntimeError("The found block coloring contains a monochromatic pattern.")
+    return coloring, block_sizes, parameters
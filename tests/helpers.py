@@ -0,0 +1,25 @@
+import shutil
+from itertools import product
+
+import pytest
+
+requires_minisat = pytest.mark.skipif(shutil.which("minisat") is None, reason="minisat is not installed")
+
+
+def get_clause_variables(clauses):
+    """
+    :return: The sorted list of the variables occurring in the clauses
+    """
+    return sorted({abs(literal) for clause in clauses for literal in clause})
+
+
+def get_models(clauses, variables):
+    """
+    :return: The set of all models of the clauses over the variables, every model as a sorted tuple of (variable, value)
+    """
+    models = set()
+    for values in product((False, True), repeat=len(variables)):
+        model = dict(zip(variables, values))
+        if all(any(model[abs(literal)] == (literal > 0) for literal in clause) for clause in clauses):
+            models.add(tuple(sorted(model.items())))
+    return models
@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+import pytest
+
+from coloring_analysis import compute_coloring_statistics, popcount
+from colored_graph import ColoredGraph
+from solution_archive import SolutionArchiveWriter, archive_edges
+
+
+def create_archive(file_name, rng, n, count, forced_edges=()):
+    """
+    Writes count random colorings of K_n (with some edges uncolored and the forced edges always having their color).
+    :return: The list of the written edge colorings
+    """
+    colored_edges = [edge for edge in archive_edges(n) if rng.random() < 0.9 or edge in dict(forced_edges)]
+    edge_colorings = []
+    with SolutionArchiveWriter(file_name, n) as archive:
+        for _ in range(count):
+            edge_coloring = {edge: rng.choice('rb') for edge in colored_edges}
+            edge_coloring.update(forced_edges)
+            archive.write(ColoredGraph(n, list(colored_edges), edge_coloring))
+            edge_colorings.append(edge_coloring)
+    return edge_colorings
+
+
+@pytest.mark.parametrize("table_lookup", [False, True])
+def test_popcount(monkeypatch, table_lookup):
+    if table_lookup:
+        # The numpy versions before 2.0 have no bitwise_count
+        monkeypatch.delattr(np, "bitwise_count", raising=False)
+    words = np.array([[0, 1, 2 ** 64 - 1], [0x8000000000000001, 0xF0F0, 7]], dtype=np.uint64)
+    assert popcount(words).tolist() == [[0, 1, 64], [2, 8, 3]]
+
+
+# 37 colorings are processed in chunks of 5 (not dividing the count), 37 and 1000 records
+@pytest.mark.parametrize("n, chunk_size", [(6, 5), (6, 37), (12, 5), (12, 1000), (12, 1)])
+def test_statistics_agree_with_brute_force(tmp_path, n, chunk_size):
+    rng = random.Random(n)
+    file_name = str(tmp_path / "colorings.archive")
+    forced_edges = [((1, 2), 'r'), ((2, n), 'b')]
+    edge_colorings = create_archive(file_name, rng, n, 37, forced_edges)
+    statistics = compute_coloring_statistics(file_name, chunk_size)
+    edges = archive_edges(n)
+    assert statistics.count == 37
+    assert list(statistics.colored) == [edge in edge_colorings[0] for edge in edges]
+    assert list(statistics.red_counts) == [sum(coloring.get(edge) == 'r' for coloring in edge_colorings)
+                                           for edge in edges]
+    expected_forced = [(edge, edge_colorings[0][edge]) for edge in edges if edge in edge_colorings[0] and
+                       all(coloring[edge] == edge_colorings[0][edge] for coloring in edge_colorings)]
+    assert statistics.get_forced_edges() == expected_forced
+    assert set(forced_edges) <= set(expected_forced)
+    expected_histogram = np.zeros((n, n), dtype=np.int64)
+    for coloring in edge_colorings:
+        for v in range(1, n + 1):
+            expected_histogram[v - 1][sum(1 for edge, color in coloring.items() if v in edge and color == 'r')] += 1
+    assert (statistics.red_degree_histogram == expected_histogram).all()
+    frequencies = statistics.get_red_frequencies()
+    for index, edge in enumerate(edges):
+        if edge in edge_colorings[0]:
+            assert frequencies[index] == statistics.red_counts[index] / 37
+        else:
+            assert np.isnan(frequencies[index])
+
+
+def test_statistics_of_empty_archive(tmp_path):
+    file_name = str(tmp_path / "colorings.archive")
+    create_archive(file_name, random.Random(0), 5, 0)
+    statistics = compute_coloring_statistics(file_name)
+    assert statistics.count == 0
+    assert statistics.get_forced_edges() == []
+    assert not statistics.red_degree_histogram.any()
@@ -0,0 +1,34 @@
+
+import pytest
+
+from colored_graph import ColoredGraph
+from cube_and_conquer import CubeAndConquerSolver
+from graph_generator import GraphGenerator
+from sat_solver import SolverStatus
+from helpers import requires_minisat
+
+
+def create_pattern(adjacency_list, color):
+    return ColoredGraph.create_colored_graph_from_adj_list(adjacency_list, color)
+
+
+@requires_minisat
+def test_resume_rejects_a_report_of_another_formula(tmp_path):
+    report_file = str(tmp_path / "report.json")
+    red_graph = create_pattern(GraphGenerator.monotone_path(4), 'r')
+    solver = CubeAndConquerSolver(10, red_graph, number_of_cube_edges=2, processes=2, report_file=report_file)
+    assert solver.solve() is None and solver.status == SolverStatus.UNSAT
+    # The same formula resumes with every cube refuted
+    resumed_solver = CubeAndConquerSolver(10, red_graph, number_of_cube_edges=2, report_file=report_file)
+    assert not resumed_solver.get_unfinished_cubes()
+    for arguments in (dict(enforce_symmetry=True), dict(special_conditions=[((1, 2), 'r')]),
+                      dict(blue_graph=create_pattern(GraphGenerator.monotone_path(3), 'b'))):
+        with pytest.raises(ValueError):
+            CubeAndConquerSolver(10, red_graph, number_of_cube_edges=2, report_file=report_file, **arguments)
+
+
+@requires_minisat
+def test_satisfiable_cube_is_found():
+    red_graph = create_pattern(GraphGenerator.monotone_path(4), 'r')
+    solver = CubeAndConquerSolver(9, red_graph, number_of_cube_edges=2, processes=2)
+    assert solver.solve() is not None and solver.status == SolverStatus.SAT
@@ -0,0 +1,84 @@
+import random
+from itertools import product
+
+import pytest
+
+from colored_graph import ColoredGraph
+from extension_search import extend_coloring, insert_vertex
+from graph_generator import GraphGenerator
+from sat_generator import generate_pattern_clauses, encode_edge, decode_edge
+from structured_colorings import verify_coloring
+
+
+def create_random_pattern(rng, size, edge_probability=0.5):
+    adjacency_list = [[j for j in range(i + 1, size + 1) if rng.random() < edge_probability] for i in range(1, size)]
+    adjacency_list.append([])
+    if not any(adjacency_list):
+        adjacency_list[0].append(size)
+    return adjacency_list
+
+
+def relabel_clause(clause, n, vertex):
+    """
+    Maps a clause over K_n to K_{n+1} with a new vertex inserted at the given position.
+    """
+    relabeled_clause = []
+    for literal in clause:
+        v1, v2 = (v + 1 if v >= vertex else v for v in decode_edge(abs(literal), n))
+        relabeled_clause.append(encode_edge(v1, v2, n + 1) * (1 if literal > 0 else -1))
+    return frozenset(relabeled_clause)
+
+
+def test_clauses_needing_a_vertex_are_the_new_copies():
+    rng = random.Random(5)
+    for _ in range(40):
+        pattern = create_random_pattern(rng, rng.randint(2, 5), rng.choice((0.3, 0.7)))
+        n = rng.randint(len(pattern), 8)
+        all_clauses = {frozenset(clause) for clause in generate_pattern_clauses(n, pattern)}
+        for vertex in range(1, n + 1):
+            old_clauses = {relabel_clause(clause, n - 1, vertex) for clause in generate_pattern_clauses(n - 1, pattern)}
+            new_clauses = [frozenset(clause) for clause in generate_pattern_clauses(n, pattern, vertex=vertex)]
+            assert len(set(new_clauses)) == len(new_clauses)
+            assert set(new_clauses) == all_clauses - old_clauses
+
+
+def brute_force_extends(coloring, n, position, red_graph, blue_graph):
+    partial_coloring = insert_vertex(coloring.edge_coloring, position)
+    new_edges = [(min(v, position), max(v, position)) for v in range(1, n + 2) if v != position]
+    for colors in product('rb', repeat=len(new_edges)):
+        edge_coloring = dict(partial_coloring)
+        edge_coloring.update(zip(new_edges, colors))
+        if verify_coloring(ColoredGraph(n + 1, list(edge_coloring.keys()), edge_coloring), red_graph, blue_graph):
+            return True
+    return False
+
+
+@pytest.mark.parametrize("red_adjacency, blue_adjacency", [
+    (GraphGenerator.monotone_path(3), GraphGenerator.monotone_path(3)),
+    ([[3], [], []], GraphGenerator.monotone_path(3)),
+    ([[], [4], [], []], [[2], [], [4], []])])
+def test_extension_matches_brute_force(red_adjacency, blue_adjacency):
+    rng = random.Random(7)
+    red_graph = ColoredGraph.create_colored_graph_from_adj_list(red_adjacency, 'r')
+    blue_graph = ColoredGraph.create_colored_graph_from_adj_list(blue_adjacency, 'b')
+    patterns = [(red_adjacency, 'r'), (blue_adjacency, 'b')]
+    tested = 0
+    while tested < 30:
+        n = rng.randint(3, 5)
+        edge_coloring = {(v1, v2): rng.choice('rb') for v1 in range(1, n + 1) for v2 in range(v1 + 1, n + 1)}
+        coloring = ColoredGraph(n, list(edge_coloring.keys()), edge_coloring)
+        if not verify_coloring(coloring, red_graph, blue_graph):
+            continue
+        tested += 1
+        for position in range(1, n + 2):
+            extended_coloring = extend_coloring(edge_coloring, n, position, patterns)
+            assert (extended_coloring is not None) == brute_force_extends(coloring, n, position, red_graph, blue_graph)
+            if extended_coloring is not None:
+                assert verify_coloring(ColoredGraph(n + 1, list(extended_coloring.keys()), extended_coloring),
+                                       red_graph, blue_graph)
+
+
+def test_pattern_bigger_than_the_extension_is_rejected():
+    edge_coloring = {(1, 2): 'r', (1, 3): 'b', (2, 3): 'r'}
+    with pytest.raises(ValueError):
+        extend_coloring(edge_coloring, 3, 1, [(GraphGenerator.monotone_path(5), 'r'), ([[2], []], 'b')])
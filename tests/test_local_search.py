@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from colored_graph import ColoredGraph
+from graph_generator import GraphGenerator
+from local_search import LocalSearch, LOCAL_SEARCH_METHODS, _SearchState, find_avoiding_coloring_by_local_search
+from structured_colorings import verify_coloring
+
+
+def create_pattern(adjacency_list, color):
+    return ColoredGraph.create_colored_graph_from_adj_list(adjacency_list, color)
+
+
+def test_incremental_cost_matches_recomputation():
+    search = LocalSearch(8, create_pattern(GraphGenerator.monotone_path(4), 'r'),
+                         create_pattern(GraphGenerator.full(3), 'b'))
+    rng = random.Random(1)
+    state = _SearchState(search, [rng.random() < 0.5 for _ in search.edges])
+    for _ in range(500):
+        variable = rng.randrange(len(search.edges))
+        expected_cost = len(state.violated) + state.get_delta(variable)
+        state.flip(variable)
+        violated = [index for index, (clause, sign) in enumerate(zip(search.clauses, search.clause_signs))
+                    if not any(state.values[edge] == sign for edge in clause)]
+        assert len(state.violated) == expected_cost
+        assert sorted(state.violated) == violated
+
+
+@pytest.mark.parametrize("method", LOCAL_SEARCH_METHODS)
+def test_local_search_finds_verified_colorings(method):
+    red_graph = create_pattern(GraphGenerator.monotone_path(4), 'r')
+    coloring = find_avoiding_coloring_by_local_search(9, red_graph, method=method, restarts=4, max_flips=20000,
+                                                      processes=2)
+    assert coloring is not None and verify_coloring(coloring, red_graph)
+    # No avoiding coloring of K_10 exists, so no restart may claim one
+    assert find_avoiding_coloring_by_local_search(10, red_graph, method=method, restarts=2, max_flips=2000,
+                                                  processes=2) is None
+
+
+def test_local_search_starts_from_the_initial_coloring():
+    red_graph = create_pattern(GraphGenerator.monotone_path(4), 'r')
+    coloring = find_avoiding_coloring_by_local_search(9, red_graph, restarts=2, max_flips=20000, processes=2)
+    assert find_avoiding_coloring_by_local_search(9, red_graph, restarts=1, max_flips=0, initial_coloring=coloring,
+                                                  processes=1).edge_coloring == coloring.edge_coloring
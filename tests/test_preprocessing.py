@@ -0,0 +1,129 @@
+import random
+
+import pytest
+
+from colored_graph import ColoredGraph
+from graph_generator import GraphGenerator
+from preprocessing import preprocess_clauses, PRESERVE_MODELS, PRESERVE_SATISFIABILITY, simplify_clauses, \
+    remove_subsumed_clauses, deduplicate_clauses
+from ramsey_solver import RamseySolver
+from sat_generator import generate_all_k_subsets, generate_general_ordered_sat_clause
+from helpers import requires_minisat, get_clause_variables, get_models
+
+
+def get_random_clauses(rng, variable_count, clause_count, max_length=3):
+    clauses = []
+    for _ in range(clause_count):
+        length = rng.randint(1, max_length)
+        clauses.append(list({rng.choice((-1, 1)) * rng.randint(1, variable_count) for _ in range(length)}))
+    if variable_count > 1 and rng.random() < 0.5:
+        # An equivalence a = -b, like two edges tied to the same color
+        a, b = rng.sample(range(1, variable_count + 1), 2)
+        clauses += [[a, b], [-a, -b]]
+    return clauses
+
+
+def get_expanded_models(formula):
+    # Tautologies are dropped like satispy does, their variables don't get to the solver
+    clauses = [clause for clause in formula.clauses if not any(-literal in clause for literal in clause)]
+    reduced_variables = sorted({abs(literal) for clause in clauses for literal in clause})
+    expanded = []
+    for model in get_models(clauses, reduced_variables):
+        expanded += [tuple(sorted(mapping.items())) for mapping in formula.expand_model(dict(model))]
+    return expanded
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_preserve_models_keeps_every_model(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        clauses = get_random_clauses(rng, rng.randint(1, 7), rng.randint(1, 12))
+        variables = sorted({abs(literal) for clause in clauses for literal in clause})
+        expanded = get_expanded_models(preprocess_clauses(clauses, PRESERVE_MODELS))
+        assert sorted(expanded) == sorted(get_models(clauses, variables))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_preserve_satisfiability_gives_only_models(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        clauses = get_random_clauses(rng, rng.randint(1, 7), rng.randint(1, 12))
+        variables = sorted({abs(literal) for clause in clauses for literal in clause})
+        models = get_models(clauses, variables)
+        expanded = get_expanded_models(preprocess_clauses(clauses, PRESERVE_SATISFIABILITY))
+        assert bool(expanded) == bool(models)
+        assert set(expanded) <= models
+
+
+@pytest.mark.parametrize("clauses", [[[1, 2], [-1, -2]], [[1]], [[1, 2, 3]], [[1], [-1]]])
+def test_preprocessed_formula_has_at_least_two_clauses(clauses):
+    # satispy parses a lone clause as a plain expression instead of a Cnf, which the solver adapters can't handle
+    for mode in (PRESERVE_MODELS, PRESERVE_SATISFIABILITY):
+        assert len(preprocess_clauses(clauses, mode).clauses) >= 2
+
+
+def enumerate_colorings(ramsey_solver):
+    colorings = set()
+    while True:
+        coloring = ramsey_solver.find_next_avoiding_drawing()
+        if coloring is None:
+            return colorings
+        colorings.add(tuple(sorted(coloring.get_colored_edge_list())))
+
+
+@requires_minisat
+@pytest.mark.parametrize("n", [3, 4, 5])
+def test_trivial_preprocessed_formula_is_solved(n):
+    # Monotone path 3 reduces to an empty or a single clause formula, which used to crash the solver adapter
+    red_graph = ColoredGraph.create_colored_graph_from_adj_list(GraphGenerator.monotone_path(3), 'r')
+    expected = enumerate_colorings(RamseySolver(n, red_graph, preprocessing=None))
+    assert enumerate_colorings(RamseySolver(n, red_graph)) == expected
+
+
+@requires_minisat
+@pytest.mark.parametrize("enforce_symmetry, special_conditions", [
+    (False, [((1, 2), 'r'), ((2, 3), 'b'), ((1, 6), 'r')]), (True, None), (True, [((1, 2), 'r'), ((3, 4), 'b')])])
+def test_preprocessing_keeps_the_colorings(enforce_symmetry, special_conditions):
+    red_graph = ColoredGraph.create_colored_graph_from_adj_list(GraphGenerator.monotone_path(4), 'r')
+    arguments = dict(enforce_symmetry=enforce_symmetry, special_conditions=special_conditions)
+    expected = enumerate_colorings(RamseySolver(6, red_graph, preprocessing=None, **arguments))
+    assert enumerate_colorings(RamseySolver(6, red_graph, **arguments)) == expected
+    found = enumerate_colorings(RamseySolver(6, red_graph, preprocessing=PRESERVE_SATISFIABILITY, **arguments))
+    assert found and found <= expected
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_simplification_keeps_the_models_and_variables(seed):
+    rng = random.Random(seed)
+    clauses = get_random_clauses(rng, rng.randint(2, 7), rng.randint(1, 25), max_length=rng.randint(2, 4))
+    # Repeated clauses and supersets of other clauses, like the ones of patterns with isolated vertices
+    clauses += [list(clause) for clause in rng.sample(clauses, rng.randint(0, len(clauses)))]
+    clauses += [clause + [rng.choice((-1, 1)) * rng.randint(1, 7)] for clause in rng.sample(clauses, len(clauses) // 2)]
+    variables = get_clause_variables(clauses)
+    simplified_clauses, report = simplify_clauses(clauses)
+    assert get_clause_variables(simplified_clauses) == variables
+    assert get_models(simplified_clauses, variables) == get_models(clauses, variables)
+    assert report.clauses_before == len(clauses) and report.clauses_after == len(simplified_clauses)
+    assert report.clauses_before - report.duplicates - report.subsumed == report.clauses_after
+    unique_clauses = deduplicate_clauses(clauses)
+    remaining_clauses = remove_subsumed_clauses(unique_clauses)
+    assert len(set(remaining_clauses)) == len(remaining_clauses) and set(remaining_clauses) <= set(unique_clauses)
+    assert get_models(remaining_clauses, variables) == get_models(unique_clauses, variables)
+
+
+def test_subsumed_clause_keeps_its_last_variable():
+    assert remove_subsumed_clauses([(1,), (1, 2), (1, 3), (2, 3)]) == [(1,), (2, 3)]
+    assert remove_subsumed_clauses([(1,), (1, 2)]) == [(1,), (1, 2)]
+
+
+def test_simplification_keeps_the_ramsey_models():
+    # The vertex subset encoding repeats the copies of a pattern with isolated vertices
+    red_pattern, blue_pattern = [[3], [], [], []], GraphGenerator.monotone_path(3)
+    clauses = [generate_general_ordered_sat_clause(mask, pattern, 6, invert)
+               for pattern, invert in ((red_pattern, False), (blue_pattern, True))
+               for mask in generate_all_k_subsets(6, len(pattern))]
+    simplified_clauses, report = simplify_clauses(clauses)
+    assert report.duplicates > 0
+    variables = get_clause_variables(clauses)
+    assert get_clause_variables(simplified_clauses) == variables
+    assert get_models(simplified_clauses, variables) == get_models(clauses, variables)
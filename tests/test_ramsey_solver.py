@@ -0,0 +1,135 @@
+import random
+from collections import Counter
+from itertools import product
+
+import pytest
+
+from colored_graph import ColoredGraph
+from graph_generator import GraphGenerator
+from ramsey_solver import RamseySolver, shrink_satisfying_assignment
+from sat_solver import SolverStatus
+from structured_colorings import verify_coloring
+from helpers import requires_minisat
+
+
+def create_patterns():
+    red_graph = ColoredGraph.create_colored_graph_from_adj_list(GraphGenerator.monotone_path(3), 'r')
+    blue_graph = ColoredGraph.create_colored_graph_from_adj_list(GraphGenerator.monotone_path(4), 'b')
+    return red_graph, blue_graph
+
+
+def create_solver(n, **arguments):
+    return RamseySolver(n, *create_patterns(), **arguments)
+
+
+def get_avoiding_colorings(n, red_graph, blue_graph, special_conditions=()):
+    """
+    :return: All the avoiding colorings of K_n found by brute force, every one as a sorted tuple of (edge, color)
+    """
+    edges = [(v1, v2) for v1 in range(1, n + 1) for v2 in range(v1 + 1, n + 1)]
+    colorings = []
+    for colors in product('rb', repeat=len(edges)):
+        edge_coloring = dict(zip(edges, colors))
+        if any(edge_coloring[edge] != color for edge, color in special_conditions):
+            continue
+        if verify_coloring(ColoredGraph(n, edges, edge_coloring), red_graph, blue_graph):
+            colorings.append(tuple(sorted(edge_coloring.items())))
+    return colorings
+
+
+def list_colorings(ramsey_solver):
+    return [tuple(sorted(coloring.edge_coloring.items()))
+            for coloring in iter(ramsey_solver.find_next_avoiding_drawing, None)]
+
+
+@requires_minisat
+def test_backbone_is_common_to_all_colorings():
+    solver = create_solver(5, special_conditions=[((1, 2), 'r')])
+    backbone = solver.find_backbone()
+    assert solver.backbone_status == SolverStatus.SAT
+    colorings = list(iter(create_solver(5, special_conditions=[((1, 2), 'r')]).find_next_avoiding_drawing, None))
+    assert colorings
+    common_edges = {edge: color for edge, color in colorings[0].edge_coloring.items()
+                    if all(coloring.edge_coloring.get(edge) == color for coloring in colorings)}
+    assert backbone.edge_coloring == common_edges
+
+
+@requires_minisat
+def test_backbone_of_unsatisfiable_formula():
+    solver = create_solver(7)
+    assert solver.find_backbone() is None
+    assert solver.backbone_status == SolverStatus.UNSAT
+
+
+@requires_minisat
+def test_cancelled_backbone_stops(monkeypatch):
+    solver = create_solver(5)
+    solve_once = solver._solve_once
+    calls = []
+
+    def cancelling_solve_once(extra_clauses):
+        calls.append(extra_clauses)
+        result = solve_once(extra_clauses)
+        # The cancellation comes between two solver calls, when no solver is running
+        solver.cancel()
+        return result
+
+    monkeypatch.setattr(solver, "_solve_once", cancelling_solve_once)
+    assert solver.find_backbone() is None
+    assert solver.backbone_status == SolverStatus.CANCELLED
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_shrunk_assignment_is_minimal_and_satisfies_the_clauses(seed):
+    rng = random.Random(seed)
+    variables = list(range(1, rng.randint(2, 8) + 1))
+    variable_mapping = {variable: rng.random() < 0.5 for variable in variables}
+    true_literals = [variable if value else -variable for variable, value in variable_mapping.items()]
+    clauses = []
+    for _ in range(rng.randint(1, 20)):
+        # Every clause contains a true literal, so the assignment satisfies the formula
+        clause = {rng.choice(true_literals)}
+        clause.update(rng.choice((-1, 1)) * rng.choice(variables) for _ in range(rng.randint(0, 3)))
+        clauses.append(list(clause))
+    kept_literals = shrink_satisfying_assignment(clauses, variable_mapping)
+    assert kept_literals <= set(true_literals)
+    assert all(any(literal in kept_literals for literal in clause) for clause in clauses)
+    for literal in kept_literals:
+        assert not all(any(other in kept_literals - {literal} for other in clause) for clause in clauses)
+
+
+@requires_minisat
+@pytest.mark.parametrize("n, special_conditions", [(5, ()), (6, ()), (6, (((1, 2), 'b'), ((2, 5), 'r')))])
+def test_minimized_blocking_lists_every_coloring_once(n, special_conditions):
+    red_graph, blue_graph = create_patterns()
+    colorings = list_colorings(RamseySolver(n, red_graph, blue_graph, minimize_blocking_clauses=True,
+                                            special_conditions=list(special_conditions) or None))
+    expected = get_avoiding_colorings(n, red_graph, blue_graph, special_conditions)
+    assert expected and colorings
+    # Edges in no pattern copy (like (1, n) for monotone paths) aren't colored, any color of theirs is avoiding
+    colored_edges = {edge for edge, color in colorings[0]}
+    restrictions = Counter(tuple((edge, color) for edge, color in coloring if edge in colored_edges)
+                           for coloring in expected)
+    free_edge_count = n * (n - 1) // 2 - len(colored_edges)
+    assert set(restrictions.values()) == {2 ** free_edge_count}
+    assert Counter(colorings) == Counter(set(restrictions))
+
+
+@requires_minisat
+@pytest.mark.parametrize("seed", range(6))
+def test_projection_yields_the_distinct_restrictions(seed):
+    rng = random.Random(seed)
+    n = rng.choice((5, 6))
+    red_graph, blue_graph = create_patterns()
+    # (1, n) is in no copy of a monotone path, so every edge of the projection occurs in the formula
+    edges = [(v1, v2) for v1 in range(1, n + 1) for v2 in range(v1 + 1, n + 1) if (v1, v2) != (1, n)]
+    projection = rng.sample(edges, rng.randint(1, 5))
+    colorings = list(iter(RamseySolver(n, red_graph, blue_graph, projection=projection).find_next_avoiding_drawing,
+                          None))
+    assert all(verify_coloring(coloring, red_graph, blue_graph) for coloring in colorings)
+    restrictions = [tuple(coloring.edge_coloring[edge] for edge in projection) for coloring in colorings]
+    expected = {tuple(dict(coloring)[edge] for edge in projection)
+                for coloring in get_avoiding_colorings(n, red_graph, blue_graph)}
+    assert len(set(restrictions)) == len(restrictions)
+    assert set(restrictions) == expected
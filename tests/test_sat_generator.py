@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from colored_graph import ColoredGraph
+from graph_generator import GraphGenerator
+from sat_generator import generate_general_ordered_ramsey_clauses, get_reversal_edge_representatives, encode_edge, \
+    get_edge_orbit_representatives, generate_pattern_clauses, generate_all_k_subsets, \
+    generate_general_ordered_sat_clause
+from helpers import get_clause_variables, get_models
+
+
+@pytest.mark.parametrize("n, red_adjacency, blue_adjacency", [
+    (4, GraphGenerator.monotone_path(3), None), (5, GraphGenerator.full(3), GraphGenerator.monotone_path(3)),
+    (6, GraphGenerator.monotone_path(3), GraphGenerator.monotone_path(4))])
+def test_symmetric_encoding_gives_the_symmetric_colorings(n, red_adjacency, blue_adjacency):
+    red_graph = ColoredGraph.create_colored_graph_from_adj_list(red_adjacency, 'r')
+    blue_graph = None if blue_adjacency is None else \
+        ColoredGraph.create_colored_graph_from_adj_list(blue_adjacency, 'b')
+    clauses = generate_general_ordered_ramsey_clauses(n, red_graph, blue_graph)
+    symmetric_clauses = generate_general_ordered_ramsey_clauses(n, red_graph, blue_graph, enforce_symmetry=True)
+    representatives = get_reversal_edge_representatives(n)
+    assert set(get_clause_variables(symmetric_clauses)) <= set(representatives.values())
+    assert len({tuple(clause) for clause in symmetric_clauses}) == len(symmetric_clauses)
+
+    # The symmetric models of the plain formula, restricted to the orbits the symmetric formula constrains
+    orbit_variables = get_clause_variables(symmetric_clauses)
+    constrained = [variable for variable in get_clause_variables(clauses)
+                   if representatives[variable] in orbit_variables]
+    expected = set()
+    for model in map(dict, get_models(clauses, get_clause_variables(clauses))):
+        if all(model.get(encode_edge(n + 1 - j, n + 1 - i, n), model.get(encode_edge(i, j, n))) ==
+               model.get(encode_edge(i, j, n)) for i in range(1, n + 1) for j in range(i + 1, n + 1)):
+            expected.add(tuple(model[variable] for variable in constrained))
+    found = {tuple(model[representatives[variable]] for variable in constrained)
+             for model in map(dict, get_models(symmetric_clauses, orbit_variables))}
+    assert found == expected
+
+
+@pytest.mark.parametrize("n", [5, 6, 9])
+@pytest.mark.parametrize("name, invariant", [
+    ('reversal', lambda n, i, j: min((i, j), (n + 1 - j, n + 1 - i))), ('distance', lambda n, i, j: j - i),
+    ('sum', lambda n, i, j: i + j), ('circulant', lambda n, i, j: min(j - i, n - j + i))])
+def test_named_symmetry_orbits(n, name, invariant):
+    representatives = get_edge_orbit_representatives(n, [name])
+    orbits = {}
+    for i in range(1, n + 1):
+        for j in range(i + 1, n + 1):
+            orbits.setdefault(invariant(n, i, j), set()).add(representatives[encode_edge(i, j, n)])
+    assert all(len(orbit) == 1 for orbit in orbits.values())
+    assert len(set(representatives.values())) == len(orbits)
+
+
+def test_rotation_generates_the_circulant_orbits():
+    rotation = [2, 3, 4, 5, 6, 7, 1]
+    assert get_edge_orbit_representatives(7, [rotation]) == get_edge_orbit_representatives(7, ['circulant'])
+
+
+@pytest.mark.parametrize("generator", ['shift', [1, 1, 2, 3], {(1, 2): (2, 5)}])
+def test_invalid_symmetry_generator(generator):
+    with pytest.raises(ValueError):
+        get_edge_orbit_representatives(4, [generator])
+
+
+def create_random_pattern(rng, size):
+    edge_probability = rng.choice((0.2, 0.5, 0.8))
+    adjacency_list = [[j for j in range(i + 1, size + 1) if rng.random() < edge_probability]
+                      for i in range(1, size + 1)]
+    if not any(adjacency_list):
+        i = rng.randint(1, size - 1)
+        adjacency_list[i - 1].append(rng.randint(i + 1, size))
+    return adjacency_list
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_core_placements_match_the_subset_encoding(seed):
+    rng = random.Random(seed)
+    pattern = create_random_pattern(rng, rng.randint(2, 6))
+    n = rng.randint(len(pattern), 9)
+    invert = rng.random() < 0.5
+    clauses = list(generate_pattern_clauses(n, pattern, invert))
+    expected = {frozenset(generate_general_ordered_sat_clause(mask, pattern, n, invert))
+                for mask in generate_all_k_subsets(n, len(pattern))}
+    assert len({frozenset(clause) for clause in clauses}) == len(clauses)
+    assert {frozenset(clause) for clause in clauses} == expected
@@ -0,0 +1,168 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import sat_solver
+from sat_solver import MinisatSatFormulaSolver, GlucoseSatFormulaSolver, SolverStatus
+from helpers import requires_minisat
+
+
+class MissingSatFormulaSolver(MinisatSatFormulaSolver):
+    COMMAND = ['ordered-ramsey-missing-solver', '{input}', '{output}']
+
+
+# A stub solver answering like minisat - the formula file and the result file are its arguments
+STUB_SAT_SOLVER = """
+import sys
+with open(sys.argv[2], 'w') as f:
+    f.write("SAT\\n-1 2 0\\n")
+sys.exit(10)
+"""
+# A stub solver which never finishes
+STUB_SLEEPING_SOLVER = """
+import time
+time.sleep(60)
+"""
+
+# A stub solver printing minisat progress lines every 0.2 seconds for the given number of seconds, then answering UNSAT
+# (or going silent if the exit is replaced)
+STUB_PROGRESSING_SOLVER = """
+import sys, time
+for conflicts in range(100, 100 * (int(%s / 0.2) + 1), 100):
+    print("| %%9d |     435     1880     5640 |      689      100     13 | 12.644 %%%% |" %% conflicts, flush=True)
+    time.sleep(0.2)
+sys.exit(20)
+"""
+
+# A stub solver answering like glucose - the formula comes over stdin, the model is printed in "v" lines split over
+# two lines, once the blocking clause of the first model is added, the formula is unsatisfiable
+STUB_GLUCOSE_SOLVER = """
+import sys
+clauses = [line for line in sys.stdin.read().splitlines() if line and line[0] not in 'cp']
+print("c |        1         0    10000 |     435     1880     5640 |     1    7815     456        0 | 11.264 % |")
+if len(clauses) > 2:
+    print("s UNSATISFIABLE")
+    sys.exit(20)
+print("s SATISFIABLE")
+print("v -1")
+print("v 2 0")
+sys.exit(10)
+"""
+
+
+def create_stub_solver(tmp_path, script):
+    """
+    :return: A minisat adapter class running the Python script instead of minisat
+    """
+    script_path = tmp_path / "stub_solver.py"
+    script_path.write_text(script)
+
+    class StubSatFormulaSolver(MinisatSatFormulaSolver):
+        COMMAND = [sys.executable, str(script_path), '{input}', '{output}']
+    return StubSatFormulaSolver
+
+
+def test_missing_solver_binary_is_reported():
+    solver = MissingSatFormulaSolver("(v1 | v2) & (-v1)")
+    with pytest.raises(RuntimeError, match="ordered-ramsey-missing-solver"):
+        solver.find_next_solution()
+    assert solver.status == SolverStatus.UNKNOWN
+
+
+@requires_minisat
+def test_temporary_files_without_dev_stdin_and_memfd(monkeypatch):
+    # The Windows code path - the formula and the model are passed in closed temporary files
+    exists = os.path.exists
+    monkeypatch.setattr(sat_solver.os.path, "exists", lambda path: path != '/dev/stdin' and exists(path))
+    monkeypatch.delattr(sat_solver.os, "memfd_create", raising=False)
+    solver = MinisatSatFormulaSolver("(v1 | v2) & (-v1)")
+    assert solver.find_next_solution() == {1: False, 2: True}
+    assert solver.find_next_solution() is None and solver.status == SolverStatus.UNSAT
+
+
+def test_solver_binary_which_cant_be_started_is_reported(tmp_path):
+    not_executable = tmp_path / "solver"
+    not_executable.write_text("not a program")
+
+    class NotExecutableSatFormulaSolver(MinisatSatFormulaSolver):
+        COMMAND = [str(not_executable), '{input}', '{output}']
+
+    solver = NotExecutableSatFormulaSolver("(v1 | v2) & (-v1)")
+    with pytest.raises(RuntimeError, match="can't be run"):
+        solver.find_next_solution()
+    assert solver.status == SolverStatus.UNKNOWN
+
+
+def test_timeout_kills_the_solver(tmp_path):
+    solver = create_stub_solver(tmp_path, STUB_SLEEPING_SOLVER)("(v1 | v2) & (-v1)", timeout=0.5)
+    start = time.monotonic()
+    assert solver.find_next_solution() is None
+    assert solver.status == SolverStatus.TIMEOUT
+    assert time.monotonic() - start < 10
+    # An undecided search isn't finished, the call may be repeated
+    assert not solver.stopped_searching
+    assert solver.stats.counters["solver_calls"] == 1
+
+
+def test_cancel_from_another_thread(tmp_path):
+    solver = create_stub_solver(tmp_path, STUB_SLEEPING_SOLVER)("(v1 | v2) & (-v1)")
+    canceller = threading.Timer(0.5, solver.cancel)
+    canceller.start()
+    start = time.monotonic()
+    assert solver.find_next_solution() is None
+    canceller.join()
+    assert solver.status == SolverStatus.CANCELLED
+    assert time.monotonic() - start < 10
+
+
+def test_cancel_without_running_solver_cancels_the_next_call(tmp_path):
+    solver = create_stub_solver(tmp_path, STUB_SAT_SOLVER)("(v1 | v2) & (-v1)")
+    solver.cancel()
+    assert solver.find_next_solution() is None
+    assert solver.status == SolverStatus.CANCELLED
+    # Only the next call is cancelled
+    assert solver.find_next_solution() is not None
+    assert solver.status == SolverStatus.SAT
+    solver.cancel()
+    solver.reset_cancel()
+    assert solver.find_next_solution() is not None
+    assert solver.status == SolverStatus.SAT
+
+
+def test_silent_solver_is_stalled(tmp_path):
+    solver = create_stub_solver(tmp_path, (STUB_PROGRESSING_SOLVER % 0.2).replace("sys.exit(20)", "time.sleep(60)"))(
+        "(v1 | v2) & (-v1)", stall_timeout=1)
+    start = time.monotonic()
+    assert solver.find_next_solution() is None
+    assert solver.status == SolverStatus.STALLED
+    assert time.monotonic() - start < 10
+    assert solver.progress is not None and solver.progress.conflicts == 100
+
+
+def test_progressing_solver_is_not_stalled(tmp_path):
+    solver = create_stub_solver(tmp_path, STUB_PROGRESSING_SOLVER % 2)("(v1 | v2) & (-v1)", stall_timeout=1)
+    progress_events = []
+    solver.stats.add_hook(lambda stats, event: progress_events.append(event) if event['event'] == 'progress' else None)
+    assert solver.find_next_solution() is None
+    assert solver.status == SolverStatus.UNSAT
+    # The solver ran longer than the stall timeout, but every progress line reset it
+    assert len(progress_events) >= 5
+    assert [event['conflicts'] for event in progress_events] == sorted(event['conflicts'] for event in progress_events)
+
+
+def test_glucose_adapter_reads_the_model_from_stdout(tmp_path):
+    script_path = tmp_path / "stub_glucose.py"
+    script_path.write_text(STUB_GLUCOSE_SOLVER)
+
+    class StubGlucoseSatFormulaSolver(GlucoseSatFormulaSolver):
+        COMMAND = [sys.executable, str(script_path)]
+
+    solver = StubGlucoseSatFormulaSolver("(v1 | v2) & (-v1)")
+    assert solver.find_next_solution() == {1: False, 2: True}
+    assert solver.status == SolverStatus.SAT
+    assert solver.progress is not None and solver.progress.restarts == 1
+    assert solver.find_next_solution() is None
+    assert solver.status == SolverStatus.UNSAT
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from colored_graph import ColoredGraph
+from graph_generator import GraphGenerator
+from solution_archive import SolutionArchiveWriter, SolutionArchiveReader, archive_edges, archive_record_size, \
+    graph_fingerprint, FLAG_SYMMETRIC, FLAG_SPECIAL_CONDITIONS
+
+
+def create_random_colorings(rng, n, count):
+    """
+    :return: count random colorings of K_n, all leaving the same random edges (about a tenth of them) uncolored
+    """
+    colored_edges = [edge for edge in archive_edges(n) if rng.random() < 0.9]
+    colorings = []
+    for _ in range(count):
+        edge_coloring = {edge: rng.choice('rb') for edge in colored_edges}
+        colorings.append(ColoredGraph(n, list(colored_edges), edge_coloring))
+    return colorings
+
+
+def write_archive(file_name, n, colorings, red_graph=None, blue_graph=None, flags=0):
+    with SolutionArchiveWriter(file_name, n, red_graph, blue_graph, flags) as archive:
+        for coloring in colorings:
+            archive.write(coloring)
+
+
+# K_12 has 66 edges, so its records span two 64-bit words
+@pytest.mark.parametrize("n, count", [(4, 1), (7, 37), (12, 50)])
+def test_archive_round_trip(tmp_path, n, count):
+    rng = random.Random(n)
+    file_name = str(tmp_path / "colorings.archive")
+    red_graph = ColoredGraph.create_colored_graph_from_adj_list(GraphGenerator.monotone_path(3), 'r')
+    blue_graph = ColoredGraph.create_colored_graph_from_adj_list(GraphGenerator.full(3), 'b')
+    colorings = create_random_colorings(rng, n, count)
+    write_archive(file_name, n, colorings, red_graph, blue_graph, FLAG_SYMMETRIC | FLAG_SPECIAL_CONDITIONS)
+    with SolutionArchiveReader(file_name) as archive:
+        assert archive.n == n and len(archive) == count
+        assert archive.flags == FLAG_SYMMETRIC | FLAG_SPECIAL_CONDITIONS
+        assert archive.red_fingerprint == graph_fingerprint(red_graph)
+        assert archive.blue_fingerprint == graph_fingerprint(blue_graph)
+        assert archive.record_size == archive_record_size(n) and archive.record_size % 8 == 0
+        colored_bits = archive.get_edge_bits(archive.colored_edges_record)
+        assert [edge for edge, bit in zip(archive_edges(n), colored_bits) if bit] == \
+            sorted(colorings[0].edge_coloring)
+        for coloring, stored_coloring in zip(colorings, archive):
+            assert stored_coloring.edge_coloring == coloring.edge_coloring
+        assert archive[-1].edge_coloring == colorings[-1].edge_coloring
+        with pytest.raises(IndexError):
+            archive[count]
+
+
+@pytest.mark.parametrize("n", [6, 12])
+def test_find_matching_agrees_with_brute_force(tmp_path, n):
+    rng = random.Random(n)
+    file_name = str(tmp_path / "colorings.archive")
+    colorings = create_random_colorings(rng, n, 200)
+    write_archive(file_name, n, colorings)
+    colored_edges = sorted(colorings[0].edge_coloring)
+    with SolutionArchiveReader(file_name) as archive:
+        for _ in range(20):
+            conditions = [(edge, rng.choice('rb')) for edge in rng.sample(colored_edges, rng.randint(0, 4))]
+            expected = [index for index, coloring in enumerate(colorings)
+                        if all(coloring.edge_coloring[edge] == color for edge, color in conditions)]
+            assert list(archive.find_matching(conditions)) == expected
+
+
+def test_empty_archive(tmp_path):
+    file_name = str(tmp_path / "colorings.archive")
+    write_archive(file_name, 5, [])
+    with SolutionArchiveReader(file_name) as archive:
+        assert len(archive) == 0 and list(archive) == []
+        assert len(archive.find_matching([((1, 2), 'r')])) == 0
+
+
+def test_writer_rejects_incompatible_colorings(tmp_path):
+    colorings = create_random_colorings(random.Random(1), 5, 1)
+    with SolutionArchiveWriter(str(tmp_path / "colorings.archive"), 5) as archive:
+        archive.write(colorings[0])
+        with pytest.raises(ValueError):
+            archive.write(create_random_colorings(random.Random(1), 6, 1)[0])
+        with pytest.raises(ValueError):
+            archive.write(ColoredGraph(5, [(1, 2)], {(1, 2): 'r'}))
+
+
+def test_reader_rejects_other_files(tmp_path):
+    file_name = tmp_path / "colorings.txt"
+    file_name.write_text("1 2 r, 1 3 b\n" * 10)
+    with pytest.raises(RuntimeError):
+        SolutionArchiveReader(str(file_name))
@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from colored_graph import ColoredGraph
+from graph_generator import GraphGenerator
+from ramsey_solver import RamseySolver
+from sat_solver import SolverStatus
+from solution_browser import SolutionBrowser
+from helpers import requires_minisat
+
+
+class FailingSolver:
+    """
+    Stands for a RamseySolver whose solver binary can't be started.
+    """
+    status = None
+
+    def find_next_avoiding_drawing(self):
+        raise RuntimeError("The SAT solver minisat can't be run.")
+
+    def cancel(self):
+        pass
+
+    def reset_cancel(self):
+        pass
+
+
+def test_producer_failure_is_reported():
+    stopped = threading.Event()
+    browser = SolutionBrowser(FailingSolver(), on_change=stopped.set)
+    assert browser.next() is None
+    assert stopped.wait(10)
+    browser._producer.join(10)
+    assert not browser.searching
+    assert browser.status == SolverStatus.ERROR
+    assert isinstance(browser.error, RuntimeError) and "minisat" in str(browser.error)
+    # Restarting the producer clears the previous failure until the next one
+    browser.start()
+    browser._producer.join(10)
+    assert browser.status == SolverStatus.ERROR
+
+
+@requires_minisat
+def test_stop_without_running_solver_does_not_cancel_the_restarted_search():
+    red_graph = ColoredGraph.create_colored_graph_from_adj_list(GraphGenerator.monotone_path(3), 'r')
+    blue_graph = ColoredGraph.create_colored_graph_from_adj_list(GraphGenerator.monotone_path(4), 'b')
+    ramsey_solver = RamseySolver(5, red_graph, blue_graph)
+    changed = threading.Event()
+    browser = SolutionBrowser(ramsey_solver, on_change=changed.set)
+    find_next_avoiding_drawing = ramsey_solver.find_next_avoiding_drawing
+
+    def stopping_find_next_avoiding_drawing():
+        coloring = find_next_avoiding_drawing()
+        # The stop comes after the solver call finished, while the producer still counts as searching
+        browser.stop()
+        return coloring
+
+    ramsey_solver.find_next_avoiding_drawing = stopping_find_next_avoiding_drawing
+    assert browser.next() is None
+    browser._producer.join(10)
+    assert browser.next() is not None
+    # The stop → start → next sequence finds the second coloring instead of reporting a cancelled search
+    ramsey_solver.find_next_avoiding_drawing = find_next_avoiding_drawing
+    changed.clear()
+    assert browser.next() is None
+    assert changed.wait(10)
+    assert browser.status != SolverStatus.CANCELLED
+    assert browser.next() is not None
+    browser.stop()
@@ -0,0 +1,104 @@
+import pytest
+
+from solver_stats import parse_minisat_progress_line, parse_glucose_progress_line, parse_solver_statistics, \
+    SolverStats, SolverProgress
+
+# Output lines in the format minisat 2.2 prints them
+MINISAT_OUTPUT = """\
+============================[ Search Statistics ]==============================
+| Conflicts |          ORIGINAL         |          LEARNT          | Progress |
+|           |    Vars  Clauses Literals |    Limit  Clauses Lit/Cl |          |
+===============================================================================
+|       100 |     435     1880     5640 |      689      100     13 | 12.644 % |
+|     26881 |     435     1880     5640 |     1241     1016     24 | 31.034 % |
+===============================================================================
+restarts              : 87
+conflicts             : 27092          (77406 /sec)
+decisions             : 31045          (0.00 % random) (88700 /sec)
+propagations          : 1725841        (4930974 /sec)
+conflict literals     : 621475         (28.79 % deleted)
+Memory used           : 22.00 MB
+CPU time              : 0.35 s
+
+SATISFIABLE"""
+
+# Output lines in the format glucose 4 prints them
+GLUCOSE_OUTPUT = """\
+c ========================================[ Search Statistics ]========================================
+c | RESTARTS           |          ORIGINAL         |              LEARNT              | Progress |
+c |       NB   Blocked  Avg Cfc |    Vars  Clauses Literals |   Red   Learnts    LBD2  Removed |          |
+c =====================================================================================================
+c |        1         0    10000 |     435     1880     5640 |     1    7815     456        0 | 11.264 % |
+c |       41        12     4651 |     435     1880     5640 |     9   12245     789     4321 | 14.943 % |
+c =====================================================================================================
+c restarts              : 41 (4651 conflicts in avg)
+c blocked restarts      : 12 (multiple: 0)
+c last block at restart : 38
+c nb ReduceDB           : 9
+c conflicts             : 190691         (31250 /sec)
+c decisions             : 226543         (0.00 % random) (37125 /sec)
+c propagations          : 9876543        (1618560 /sec)
+c CPU time              : 6.102 s
+
+s SATISFIABLE"""
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("|       100 |     435     1880     5640 |      689      100     13 | 12.644 % |",
+     {'conflicts': 100, 'learnt_clauses': 100, 'progress': 12.644}),
+    ("|     26881 |     435     1880     5640 |     1241     1016     24 | 31.034 % |",
+     {'conflicts': 26881, 'learnt_clauses': 1016, 'progress': 31.034}),
+    ("| Conflicts |          ORIGINAL         |          LEARNT          | Progress |", None),
+    ("|           |    Vars  Clauses Literals |    Limit  Clauses Lit/Cl |          |", None),
+    ("===============================================================================", None),
+    ("restarts              : 87", None),
+    ("c |        1         0    10000 |     435     1880     5640 |     1    7815     456        0 | 11.264 % |",
+     None),
+])
+def test_minisat_progress_line(line, expected):
+    assert parse_minisat_progress_line(line) == expected
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("c |        1         0    10000 |     435     1880     5640 |     1    7815     456        0 | 11.264 % |",
+     {'restarts': 1, 'conflicts': 10000, 'learnt_clauses': 7815, 'progress': 11.264}),
+    ("c |       41        12     4651 |     435     1880     5640 |     9   12245     789     4321 | 14.943 % |",
+     {'restarts': 41, 'conflicts': 41 * 4651, 'learnt_clauses': 12245, 'progress': 14.943}),
+    ("c | RESTARTS           |          ORIGINAL         |              LEARNT              | Progress |", None),
+    ("c restarts              : 41 (4651 conflicts in avg)", None),
+    ("|       100 |     435     1880     5640 |      689      100     13 | 12.644 % |", None),
+])
+def test_glucose_progress_line(line, expected):
+    assert parse_glucose_progress_line(line) == expected
+
+
+@pytest.mark.parametrize("output, expected", [
+    (MINISAT_OUTPUT, {'restarts': 87, 'conflicts': 27092, 'decisions': 31045, 'propagations': 1725841}),
+    (GLUCOSE_OUTPUT, {'restarts': 41, 'conflicts': 190691, 'decisions': 226543, 'propagations': 9876543}),
+    ("UNSATISFIABLE", {}),
+])
+def test_solver_statistics(output, expected):
+    assert parse_solver_statistics(output.splitlines()) == expected
+
+
+def test_progress_lines_of_whole_output():
+    minisat_progress = [parse_minisat_progress_line(line) for line in MINISAT_OUTPUT.splitlines()]
+    assert [values['conflicts'] for values in minisat_progress if values is not None] == [100, 26881]
+    glucose_progress = [parse_glucose_progress_line(line) for line in GLUCOSE_OUTPUT.splitlines()]
+    assert [values['restarts'] for values in glucose_progress if values is not None] == [1, 41]
+
+
+def test_stats_hooks_receive_the_measurements():
+    stats = SolverStats()
+    events = []
+    stats.add_hook(lambda hook_stats, event: events.append(event))
+    with stats.measure("generate"):
+        pass
+    stats.record_solver_call("SAT", 10, 5, 30, 100, {'conflicts': 7})
+    stats.record_solver_call("UNSAT", 11, 5, 32, 110, {'conflicts': 3})
+    stats.record_progress(SolverProgress(1.5, conflicts=100, progress=12.5))
+    assert [event['event'] for event in events] == ['stage', 'solver_call', 'solver_call', 'progress']
+    # The formula counters describe the last call, the other ones are summed
+    assert stats.counters['clauses'] == 11 and stats.counters['conflicts'] == 10
+    assert stats.counters['solver_calls'] == 2 and stats.counters['bytes_written'] == 210
+    assert events[-1]['conflicts'] == 100 and events[-1]['elapsed'] == 1.5
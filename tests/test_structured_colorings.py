@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from colored_graph import ColoredGraph
+from graph_generator import GraphGenerator
+from sat_generator import generate_general_ordered_ramsey_clauses, encode_edge
+from structured_colorings import verify_coloring, lift_distance_coloring, lift_block_coloring, \
+    find_distance_coloring, find_block_coloring
+from helpers import requires_minisat
+
+
+PATTERNS = [GraphGenerator.monotone_path(3), GraphGenerator.monotone_path(4), GraphGenerator.full(3),
+            [[3], [4], [], []], [[4], [3], [], []], [[2], [], [5], [], []], [[], [3], [], []]]
+
+
+def create_pattern(adjacency_list, color):
+    return ColoredGraph.create_colored_graph_from_adj_list(adjacency_list, color)
+
+
+def satisfies_clauses(coloring, red_graph, blue_graph):
+    n = coloring.size
+    mapping = {encode_edge(v1, v2, n): color == 'b' for (v1, v2), color in coloring.get_colored_edge_list()}
+    return all(any(mapping[abs(literal)] == (literal > 0) for literal in clause)
+               for clause in generate_general_ordered_ramsey_clauses(n, red_graph, blue_graph))
+
+
+def test_verifier_agrees_with_the_clauses():
+    rng = random.Random(3)
+    for _ in range(500):
+        n = rng.randint(5, 8)
+        red_graph = create_pattern(rng.choice(PATTERNS), 'r')
+        blue_graph = create_pattern(rng.choice(PATTERNS), 'b')
+        edge_coloring = {(i, j): rng.choice('rb') for i in range(1, n + 1) for j in range(i + 1, n + 1)}
+        coloring = ColoredGraph(n, list(edge_coloring.keys()), edge_coloring)
+        assert verify_coloring(coloring, red_graph, blue_graph) == satisfies_clauses(coloring, red_graph, blue_graph)
+
+
+def test_lifted_colorings():
+    distance_coloring = lift_distance_coloring(5, 0b0101)
+    assert distance_coloring.edge_coloring[(1, 2)] == 'b' and distance_coloring.edge_coloring[(2, 4)] == 'r'
+    assert distance_coloring.edge_coloring[(2, 5)] == 'b' and len(distance_coloring.get_edge_list()) == 10
+    # The pairs are (0, 0), (0, 1), (1, 1) - only the edges between the blocks are blue
+    block_coloring = lift_block_coloring((2, 3), 0b010)
+    assert {edge for edge, color in block_coloring.get_colored_edge_list() if color == 'b'} == \
+        {(i, j) for i in (1, 2) for j in (3, 4, 5)}
+
+
+@requires_minisat
+@pytest.mark.parametrize("n", [4, 5, 6, 7])
+def test_exhaustive_and_sat_searches_agree(n):
+    red_graph = create_pattern(GraphGenerator.monotone_path(3), 'r')
+    blue_graph = create_pattern([[3], [4], [], []], 'b')
+    for find in (find_distance_coloring, find_block_coloring):
+        exhaustive = find(n, red_graph, blue_graph, processes=2)
+        sat = find(n, red_graph, blue_graph, method="sat", processes=2)
+        assert (exhaustive is None) == (sat is None)
+        for result in (exhaustive, sat):
+            if result is not None:
+                assert satisfies_clauses(result[0], red_graph, blue_graph)